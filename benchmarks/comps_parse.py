@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Benchmark of parsing a large comps.xml, scaled up from the test data.
+
+Usage: python benchmarks/comps_parse.py [--copies N] [--languages N]
+"""
+import os
+import re
+import timeit
+import tracemalloc
+from argparse import ArgumentParser
+from io import BytesIO
+
+from pubtools.pulplib._impl.comps import units_for_xml
+
+SAMPLE = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "data", "sample-comps.xml"
+)
+
+
+def scaled_comps(copies, languages):
+    # Returns a comps.xml document holding every group, category and
+    # environment from the sample `copies' times over (with distinct ids),
+    # each with `languages' extra translated names and descriptions,
+    # as found in large multi-language comps files.
+    with open(SAMPLE, "rt", encoding="utf-8") as f:
+        sample = f.read()
+
+    body = sample[sample.index("<comps>") + len("<comps>") : sample.index("</comps>")]
+    translations = "".join(
+        '<name xml:lang="l%d">Name %d</name>'
+        '<description xml:lang="l%d">Description %d</description>' % (i, i, i, i)
+        for i in range(0, languages)
+    )
+    body = re.sub(r"(<id>[^<]*)(</id>)", r"\1-@COPY@\2" + translations, body)
+
+    # langpacks may appear only once, so keep them out of the copies.
+    langpacks = re.search(r"<langpacks>.*</langpacks>", body, re.S).group(0)
+    body = body.replace(langpacks, "")
+
+    out = ["<comps>", langpacks]
+    for copy in range(0, copies):
+        out.append(body.replace("@COPY@", str(copy)))
+    out.append("</comps>")
+    return "\n".join(out).encode("utf-8")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--languages", type=int, default=50)
+    args = parser.parse_args()
+
+    doc = scaled_comps(args.copies, args.languages)
+    units = units_for_xml(BytesIO(doc))
+
+    elapsed = min(
+        timeit.repeat(lambda: units_for_xml(BytesIO(doc)), number=1, repeat=3)
+    )
+    print(
+        "Parsed %d units (%.1f MiB) in %.2fs (%.1f us/unit)"
+        % (len(units), len(doc) / 2**20, elapsed, elapsed * 1e6 / len(units))
+    )
+
+    del units
+    tracemalloc.start()
+    units = units_for_xml(BytesIO(doc))
+    (size, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("Memory: %.1f MiB held, %.1f MiB peak" % (size / 2**20, peak / 2**20))
+
+
+if __name__ == "__main__":
+    main()
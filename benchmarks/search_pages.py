@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark of paginated searches against a simulated slow Pulp server.
+
+Measures the time taken to get the first page and all pages of a repository
+search, using skip/limit pagination, keyset pagination and page readahead.
+
+The simulated server responds to each search after a fixed latency, plus a
+cost per result skipped via 'skip', as MongoDB must scan past skipped results.
+
+Usage: python benchmarks/search_pages.py [--count N] [--page-size N]
+           [--readahead N] [--latency SECONDS] [--skip-cost SECONDS]
+"""
+import json
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pubtools.pulplib import Client
+
+
+def make_handler(repo_ids, latency, skip_cost):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            criteria = json.loads(body)["criteria"]
+
+            skip = criteria.get("skip", 0)
+            limit = criteria["limit"]
+            after = criteria["filters"].get("id", {}).get("$gt", "")
+
+            found = [{"id": repo_id} for repo_id in repo_ids if repo_id > after]
+            time.sleep(latency + skip * skip_cost)
+
+            out = json.dumps(found[skip : skip + limit]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *_args):
+            pass
+
+    return Handler
+
+
+def run_search(url, page_size, keyset, readahead):
+    # Returns (first page seconds, total seconds, number of requests) for
+    # a search of all repos.
+    with Client(url, page_readahead=readahead, threads=max(readahead, 4)) as client:
+        client._PAGE_SIZE = page_size
+        client._KEYSET_PAGINATION = keyset
+
+        start = time.monotonic()
+        page = client.search_repository().result()
+        first = time.monotonic() - start
+
+        count = len(list(page))
+        total = time.monotonic() - start
+
+    return (first, total, count)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--readahead", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--skip-cost", type=float, default=2e-6)
+    args = parser.parse_args()
+
+    repo_ids = ["repo-%08d" % i for i in range(0, args.count)]
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(repo_ids, args.latency, args.skip_cost)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%s/" % server.server_address[1]
+
+    modes = [
+        ("skip", False, 1),
+        ("keyset", True, 1),
+        # keyset pagination is not used with readahead
+        ("readahead=%s" % args.readahead, True, args.readahead),
+    ]
+
+    try:
+        for (name, keyset, readahead) in modes:
+            (first, total, count) = run_search(url, args.page_size, keyset, readahead)
+            assert count == args.count
+            print(
+                "%-14s %d repos: first page %.3fs, total %.2fs"
+                % (name, count, first, total)
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Micro-benchmark of Unit.from_data on a large number of RPM units.
+
+Usage: python benchmarks/unit_from_data.py [--count N] [--mode MODE ...]
+"""
+import timeit
+from argparse import ArgumentParser
+
+from pubtools.pulplib import Unit
+from pubtools.pulplib._impl.model.common import (
+    VALIDATION_MODES,
+    validating,
+    validation_policy,
+)
+
+
+def rpm_data(i):
+    return {
+        "_content_type_id": "rpm",
+        "_id": "unit-%08d" % i,
+        "name": "package-%s" % (i % 5000),
+        "version": "1.%s" % (i % 20),
+        "release": "%s.el8" % (i % 7),
+        "epoch": "0",
+        "arch": "x86_64",
+        "checksum": "%064x" % i,
+        "checksumtype": "sha256",
+        "signing_key": "fd431d51",
+        "filename": "package-%s-1.0-1.el8.x86_64.rpm" % i,
+        "sourcerpm": "package-%s-1.0-1.el8.src.rpm" % (i % 5000),
+        "repository_memberships": ["repo-a", "repo-b"],
+        "provides": [{"name": "package-%s" % i, "version": "1.0", "flags": "EQ"}],
+        "requires": [{"name": "glibc", "version": "2.28", "flags": "GE"}],
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument(
+        "--mode", action="append", choices=VALIDATION_MODES, help="(default: all)"
+    )
+    args = parser.parse_args()
+
+    data = [rpm_data(i) for i in range(0, args.count)]
+
+    for mode in args.mode or VALIDATION_MODES:
+
+        def load():
+            with validating(validation_policy(mode, 100)):
+                for elem in data:
+                    Unit.from_data(elem)
+
+        elapsed = timeit.timeit(load, number=1)
+        print(
+            "%-8s %d units in %.2fs (%.1f us/unit)"
+            % (mode, args.count, elapsed, elapsed * 1e6 / args.count)
+        )
+
+
+if __name__ == "__main__":
+    main()
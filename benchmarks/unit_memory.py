@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Memory benchmark of loading a synthetic RPM corpus, with and without interning.
+
+Usage: python benchmarks/unit_memory.py [--count N]
+"""
+import gc
+import json
+import random
+import tracemalloc
+from argparse import ArgumentParser
+
+from pubtools.pulplib import Unit
+from pubtools.pulplib._impl.model.common import InternPool, interning
+
+ARCHES = ["x86_64", "noarch", "aarch64", "ppc64le", "s390x", "i686", "src"]
+SIGNING_KEYS = ["fd431d51", "f21541eb", "5a6340b3", None]
+
+
+def rpm_corpus(count):
+    # A corpus roughly resembling the content of a large Pulp server:
+    # RPMs from a few thousand packages, each in several of a few hundred repos.
+    rand = random.Random(1234)
+    repos = ["rhel-%s-for-%s-rpms" % (i, arch) for i in range(0, 50) for arch in ARCHES]
+    # Content is typically published to the same sets of repos many times over.
+    memberships = [sorted(rand.sample(repos, 4)) for _ in range(0, 50)]
+
+    out = []
+    for i in range(0, count):
+        name = "package-%s" % (i % 5000)
+        out.append(
+            {
+                "_content_type_id": "rpm",
+                "_id": "unit-%08d" % i,
+                "name": name,
+                "version": "1.%s" % (i % 20),
+                "release": "%s.el8" % (i % 7),
+                "epoch": "0",
+                "arch": rand.choice(ARCHES),
+                "checksum": "%064x" % i,
+                "checksumtype": "sha256",
+                "signing_key": rand.choice(SIGNING_KEYS),
+                "filename": "%s-1.0-1.el8.rpm" % name,
+                "sourcerpm": "%s-1.0-1.el8.src.rpm" % name,
+                "repository_memberships": list(rand.choice(memberships)),
+            }
+        )
+
+    # Round-trip through JSON so that, as in a real search response,
+    # equal strings are not shared.
+    return json.loads(json.dumps(out))
+
+
+def measure(count, pool):
+    # Measures memory held by units loaded from a corpus, once the corpus
+    # itself has been discarded (as are decoded search responses).
+    gc.collect()
+    tracemalloc.start()
+    data = rpm_corpus(count)
+    with interning(pool):
+        units = [Unit.from_data(elem) for elem in data]
+    del data
+    gc.collect()
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del units
+    return size
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    plain = measure(args.count, None)
+    interned = measure(args.count, InternPool())
+
+    print("%d units, without interning: %.1f MiB" % (args.count, plain / 2**20))
+    print("%d units, with interning:    %.1f MiB" % (args.count, interned / 2**20))
+    print("Saved: %.1f%%" % (100.0 * (plain - interned) / plain))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from ._impl.client import Client, PulpException, TaskFailedException, CopyOptions
 from ._impl.criteria import Criteria, Matcher
 from ._impl.page import Page
+from ._impl.table import UnitTable
 from ._impl.model import (
     PulpObject,
     DetachedException,
@@ -0,0 +1,89 @@
+import heapq
+import itertools
+import threading
+from time import monotonic
+
+
+class BandwidthLimiter(object):
+    # Limits the rate at which data is sent by several concurrent uploads,
+    # sharing the available bandwidth fairly between them.
+    #
+    # This is a token bucket: tokens (bytes) accumulate at the configured rate,
+    # up to a maximum of `burst', and are consumed by sending data. Sending a
+    # chunk larger than the available tokens is permitted as long as the bucket
+    # is not empty, leaving the bucket in debt; later chunks then wait for the
+    # debt to be repaid. This keeps the average rate correct regardless of
+    # chunk size.
+    #
+    # When several uploads are waiting, they're served by start-time fair
+    # queuing: each upload (a flow) has a virtual time which advances by the
+    # size of each chunk divided by the flow's weight, and the waiting chunk
+    # with the lowest virtual time goes first. Over time, each flow therefore
+    # gets bandwidth in proportion to its weight, no matter how much data it
+    # tries to send.
+
+    def __init__(self, rate, burst=None):
+        self._rate = float(rate)
+        self._burst = float(burst or rate)
+        self._tokens = self._burst
+        self._last_refill = monotonic()
+
+        # Virtual time of the most recently served chunk.
+        self._vtime = 0.0
+
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def flow(self, weight=1):
+        # Returns a new flow for an upload sharing this limiter.
+        return BandwidthFlow(self, weight)
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._last_refill) * self._rate
+        )
+        self._last_refill = now
+
+    def _acquire(self, flow, size):
+        with self._cond:
+            # A flow which has been idle doesn't get credit for the time
+            # it wasn't sending.
+            start = max(flow.vtime, self._vtime)
+            flow.vtime = start + size / flow.weight
+
+            ticket = (start, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+
+            while True:
+                self._refill()
+                if self._waiting[0] is ticket and self._tokens > 0:
+                    break
+
+                timeout = None
+                if self._waiting[0] is ticket:
+                    timeout = -self._tokens / self._rate + 0.001
+                self._cond.wait(timeout)
+
+            heapq.heappop(self._waiting)
+            self._tokens -= size
+            self._vtime = start
+
+            # Let the next waiter (if any) check whether it can proceed.
+            self._cond.notify_all()
+
+
+class BandwidthFlow(object):
+    # A single upload sharing a BandwidthLimiter with others.
+
+    def __init__(self, limiter, weight):
+        if weight <= 0:
+            raise ValueError("Upload weight must be positive, got: %s" % weight)
+        self._limiter = limiter
+        self.weight = float(weight)
+        self.vtime = 0.0
+
+    def acquire(self, size):
+        # Blocks until `size' bytes may be sent.
+        self._limiter._acquire(self, size)
@@ -0,0 +1,65 @@
+import json
+import logging
+import os
+import threading
+
+LOG = logging.getLogger("pubtools.pulplib")
+
+
+def file_key(path):
+    # Returns a key identifying a particular version of a local file, or None
+    # if the file can't be stat'd.
+    #
+    # It's assumed that a file's content doesn't change without also changing
+    # at least one of these values.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return "%s-%s-%s-%s" % (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ChecksumCache(object):
+    # A directory holding checksums of local files previously calculated by
+    # this library, so that the same files need not be hashed again
+    # (e.g. when uploaded to several repositories, or retried).
+    #
+    # Each file's checksum is stored in a small JSON file named after the
+    # file's key (see file_key). Entries are written atomically, so a cache
+    # may be shared between processes.
+
+    def __init__(self, directory):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _filename(self, key):
+        return os.path.join(self._directory, key + ".json")
+
+    def get(self, path):
+        # Returns a (sha256, size) tuple for the given file, or None if not cached.
+        key = file_key(path)
+        if not key:
+            return None
+        try:
+            with open(self._filename(key), "rt") as f:
+                data = json.load(f)
+            return (data["sha256"], data["size"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, path, key, sha256, size):
+        # Stores the checksum of a file, where key is the file's key as
+        # returned by file_key *before* the file was read. If the file has
+        # changed since then, nothing is stored.
+        if not key or file_key(path) != key:
+            return
+
+        filename = self._filename(key)
+        tmp = "%s.%s.%s.tmp" % (filename, os.getpid(), threading.get_ident())
+        try:
+            with open(tmp, "wt") as f:
+                json.dump({"sha256": sha256, "size": size}, f)
+            os.replace(tmp, filename)
+        except OSError:
+            # Cache is only an optimization, don't fail the upload.
+            LOG.debug("Failed to write checksum cache %s", filename, exc_info=True)
@@ -0,0 +1,64 @@
+import threading
+
+
+class AdaptiveChunkSize(object):
+    # Chooses the size of chunks for an upload according to the throughput
+    # observed for the chunks uploaded so far.
+    #
+    # Each PUT of a chunk has a fixed overhead (round trip to Pulp, Pulp
+    # opening and writing the upload file...) which dominates when chunks are
+    # small relative to the bandwidth-delay product of the link. The aim is
+    # for each PUT to take about TARGET_SECONDS: long enough that the overhead
+    # is small, but short enough that progress is regular and a retry of a
+    # failed chunk is cheap.
+    #
+    # The size changes by at most a factor of 2 per observed chunk, and always
+    # stays between the configured bounds.
+
+    TARGET_SECONDS = 2.0
+
+    # Weight of the latest observation in the throughput estimate.
+    SMOOTHING = 0.3
+
+    def __init__(self, initial, minimum, maximum):
+        self._minimum = minimum
+        self._maximum = max(maximum, minimum)
+        self._size = self._clamp(initial)
+        self._rate = None
+        self._lock = threading.Lock()
+
+        self.chunks = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def _clamp(self, size):
+        return int(min(max(size, self._minimum), self._maximum))
+
+    @property
+    def size(self):
+        # Size of the next chunk to be uploaded.
+        return self._size
+
+    @property
+    def rate(self):
+        # Estimated throughput of a single PUT, in bytes per second
+        # (None if nothing has been observed yet).
+        return self._rate
+
+    def observe(self, size, seconds):
+        # Record that a chunk of the given size was uploaded in the given time,
+        # adjusting the size of subsequent chunks.
+        with self._lock:
+            self.chunks += 1
+            self.bytes += size
+            self.seconds += seconds
+
+            rate = size / max(seconds, 0.001)
+            if self._rate is None:
+                self._rate = rate
+            else:
+                self._rate += self.SMOOTHING * (rate - self._rate)
+
+            wanted = self._rate * self.TARGET_SECONDS
+            wanted = min(max(wanted, self._size / 2), self._size * 2)
+            self._size = self._clamp(wanted)
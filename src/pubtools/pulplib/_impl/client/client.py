@@ -1,9 +1,11 @@
 import hashlib
+import itertools
 import json
 import logging
 import os
 import threading
 from functools import partial
+from time import monotonic
 from collections import namedtuple
 
 import requests
@@ -23,11 +25,20 @@ from ..model import (
     Unit,
     Task,
 )
+from ..model.common import InternPool, interning, validation_policy, validating
 from ..log import TimedLogger
 from ..util import dict_put
-from .search import search_for_criteria
+from .search import search_for_criteria, split_criteria
 from .errors import PulpException
 from .poller import TaskPoller
+from .paging import PagedSearch, PageResponse, merge_pages
+from .stream import iter_json_array, iter_response_text
+from .unit_keys import units_by_key
+from .upload_state import UploadStateStore
+from .chunk_size import AdaptiveChunkSize
+from .bandwidth import BandwidthLimiter
+from .checksum_cache import ChecksumCache, file_key
+from ..table import UnitRow, table_from_pages
 from . import retry
 from humanize import naturalsize
 
@@ -40,6 +51,95 @@ LOG = logging.getLogger("pubtools.pulplib")
 UploadResult = namedtuple("UploadResult", ["checksum", "size"])
 
 
+def is_path(file_obj):
+    # True if file_obj, as accepted by upload methods, is the path to a file
+    # rather than a file object.
+    return file_obj is not None and "close" not in dir(file_obj)
+
+
+def checksum_file(file_obj, chunk_size, cache=None):
+    # Calculates the sha256 checksum & size of a file (given by path or file
+    # object, as accepted by upload methods) without uploading it, returning
+    # an UploadResult.
+    #
+    # File objects are rewound to their initial position afterward so that they
+    # can still be uploaded. Since that's not possible for file objects which
+    # don't support seeking, None is returned for those without reading them.
+    #
+    # If a ChecksumCache is provided, checksums of files given by path are
+    # looked up in and saved to the cache.
+    is_file_object = not is_path(file_obj)
+    if is_file_object:
+        if not getattr(file_obj, "seekable", lambda: False)():
+            return None
+        start = file_obj.tell()
+    else:
+        path = file_obj
+        if cache:
+            cached = cache.get(path)
+            if cached:
+                return UploadResult(*cached)
+            key = file_key(path)
+        file_obj = open(path, "rb")
+
+    checksum = hashlib.sha256()
+    size = 0
+    buffers = None if is_file_object else ChunkBuffers(1, chunk_size)
+    try:
+        while True:
+            if buffers:
+                data = buffers.read_next(file_obj)
+            else:
+                data = file_obj.read(chunk_size)
+            if not data:
+                break
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            checksum.update(data)
+            size += len(data)
+    finally:
+        if is_file_object:
+            file_obj.seek(start)
+        else:
+            file_obj.close()
+
+    if cache and not is_file_object:
+        cache.put(path, key, checksum.hexdigest(), size)
+
+    return UploadResult(checksum.hexdigest(), size)
+
+
+class ChunkBuffers(object):
+    # A ring of reusable buffers for reading a binary file in chunks.
+    #
+    # Each call to read_next reads the next chunk of a file into the next
+    # buffer in the ring and returns a memoryview of the data read; that data
+    # is valid until the same buffer is used again, i.e. until read_next has
+    # been called another `count' times. Buffers are allocated on first use,
+    # so small files don't allocate more than needed.
+    #
+    # Chunks are of the size given at construction, unless a different size
+    # is requested for a particular chunk; buffers grow as needed.
+
+    def __init__(self, count, size):
+        self._buffers = [None] * count
+        self._size = size
+        self._index = 0
+
+    def read_next(self, file_obj, size=None):
+        index = self._index
+        self._index = (index + 1) % len(self._buffers)
+
+        size = self._size if size is None else size
+        buf = self._buffers[index]
+        if buf is None or len(buf) < size:
+            buf = memoryview(bytearray(size))
+            self._buffers[index] = buf
+
+        buf = buf[:size]
+        return buf[: file_obj.readinto(buf)]
+
+
 class Client(object):
     """A client for the Pulp 2.x API.
 
@@ -124,6 +224,37 @@ class Client(object):
     _PAGE_SIZE = int(os.environ.get("PUBTOOLS_PULPLIB_PAGE_SIZE", "2000"))
     _TASK_THROTTLE = int(os.environ.get("PUBTOOLS_PULPLIB_TASK_THROTTLE", "200"))
     _CHUNK_SIZE = int(os.environ.get("PUBTOOLS_PULPLIB_CHUNK_SIZE", 1024 * 1024 * 10))
+    _PAGE_READAHEAD = int(os.environ.get("PUBTOOLS_PULPLIB_PAGE_READAHEAD", "1"))
+    _KEYSET_PAGINATION = bool(
+        int(os.environ.get("PUBTOOLS_PULPLIB_KEYSET_PAGINATION", "1"))
+    )
+    _VALIDATION = os.environ.get("PUBTOOLS_PULPLIB_VALIDATION", "full")
+    _VALIDATION_SAMPLE_RATE = int(
+        os.environ.get("PUBTOOLS_PULPLIB_VALIDATION_SAMPLE_RATE", "100")
+    )
+    # Maximum number of values in a single IN match sent to Pulp; criteria
+    # with larger IN matches are split across several searches or tasks.
+    _MAX_IN_VALUES = int(os.environ.get("PUBTOOLS_PULPLIB_MAX_IN_VALUES", "5000"))
+    # If enabled, the size of chunks for uploads of files given by path varies
+    # between these bounds according to observed throughput, starting from
+    # _CHUNK_SIZE.
+    _ADAPTIVE_CHUNK_SIZE = bool(
+        int(os.environ.get("PUBTOOLS_PULPLIB_ADAPTIVE_CHUNK_SIZE", "0"))
+    )
+    _MIN_CHUNK_SIZE = int(
+        os.environ.get("PUBTOOLS_PULPLIB_MIN_CHUNK_SIZE", 1024 * 1024)
+    )
+    _MAX_CHUNK_SIZE = int(
+        os.environ.get("PUBTOOLS_PULPLIB_MAX_CHUNK_SIZE", 1024 * 1024 * 64)
+    )
+    # Limits on the number of files, and their total size, being uploaded at
+    # once by batch upload methods such as FileRepository.upload_files.
+    _UPLOAD_BATCH_ITEMS = int(
+        os.environ.get("PUBTOOLS_PULPLIB_UPLOAD_BATCH_ITEMS", "16")
+    )
+    _UPLOAD_BATCH_BYTES = int(
+        os.environ.get("PUBTOOLS_PULPLIB_UPLOAD_BATCH_BYTES", 1024 * 1024 * 1024)
+    )
 
     # Policy used when deciding whether to retry operations.
     # This is mainly provided here as a hook for autotests, so the policy can be
@@ -149,6 +280,78 @@ class Client(object):
                 a precise thread count. The client in practice will use more than
                 this number of threads.
 
+            int page_readahead
+                Maximum number of pages of search results which may be requested
+                from Pulp concurrently, per searched resource type.
+
+                By default, the next page of a search is requested only once the
+                previous page has been received. Larger values allow several
+                subsequent pages to be fetched ahead of time, which can speed up
+                iteration over large searches, at the cost of more concurrent
+                load on the Pulp server.
+
+                As pages fetched ahead of time must be located by offset,
+                searches using this option are paginated via skip/limit.
+
+            str validation
+                Controls validation of data received from Pulp against the
+                expected schema, prior to loading it into model objects.
+
+                ``"full"`` (default)
+                    Every object is validated.
+
+                ``"sampled"``
+                    Only a sample of objects (1 in every 100) is validated.
+
+                ``"off"``
+                    No objects are validated. This may be used to reduce the
+                    CPU overhead of large searches when the Pulp server is trusted
+                    to return well-formed data.
+
+                Regardless of this setting, data which can't be loaded into
+                model objects will still cause an
+                :class:`~pubtools.pulplib.InvalidDataException`.
+
+            int upload_bandwidth
+                Maximum rate, in bytes per second, at which this client will
+                upload content to Pulp, across all uploads.
+
+                If provided, the chunks of each upload are sent only as
+                permitted by the limit, with the available bandwidth shared
+                between uploads in progress in proportion to their ``weight``
+                (see :meth:`~pubtools.pulplib.FileRepository.upload_file`),
+                or evenly by default. This can be used to leave
+                capacity for other traffic, such as searches. As the limit is
+                applied per chunk, it's an average over time rather than
+                a strict limit at every instant.
+
+                By default, uploads are not limited.
+
+            str checksum_cache_dir
+                Path to a directory used to cache checksums of uploaded files.
+
+                If provided, the checksums calculated when uploading files
+                given by path are saved in this directory, so that later
+                uploads of the same files (e.g. to other repositories, or
+                on retry) need not calculate them again. Files are identified
+                by device, inode, size and modification time; a file modified
+                without any of these changing will not be detected.
+
+                Uploads of file objects never use the cache.
+
+            str upload_state_dir
+                Path to a directory used to persist the state of uploads.
+
+                If provided, uploads of files given by path (e.g. via
+                :meth:`~pubtools.pulplib.FileRepository.upload_file`) record
+                their progress in this directory. If an upload is interrupted,
+                for example by the process being killed, a later upload of the
+                same unmodified file using the same directory resumes the
+                earlier upload rather than starting over, skipping any chunks
+                already received by Pulp.
+
+                Uploads of file objects are never resumed.
+
             object auth, cert, headers, max_redirects, params, proxies, verify
                 Any of these arguments, if provided, are used to initialize
                 :class:`requests.Session` objects used by the client.
@@ -158,6 +361,10 @@ class Client(object):
 
         .. versionadded:: 2.31.0
             Added the ``threads`` argument.
+
+        .. versionadded:: 2.42.0
+            Added the ``page_readahead``, ``validation``, ``upload_bandwidth``,
+            ``checksum_cache_dir`` and ``upload_state_dir`` arguments.
         """
         self._url = url
 
@@ -182,6 +389,29 @@ class Client(object):
         if threads is not None and threads < 1:
             threads = 1
 
+        self._page_readahead = max(
+            kwargs.pop("page_readahead", self._PAGE_READAHEAD), 1
+        )
+
+        self._validation_policy = validation_policy(
+            kwargs.pop("validation", self._VALIDATION), self._VALIDATION_SAMPLE_RATE
+        )
+
+        upload_bandwidth = kwargs.pop("upload_bandwidth", None)
+        self._upload_bandwidth = (
+            BandwidthLimiter(upload_bandwidth) if upload_bandwidth else None
+        )
+
+        checksum_cache_dir = kwargs.pop("checksum_cache_dir", None)
+        self._checksum_cache = (
+            ChecksumCache(checksum_cache_dir) if checksum_cache_dir else None
+        )
+
+        upload_state_dir = kwargs.pop("upload_state_dir", None)
+        self._upload_states = (
+            UploadStateStore(upload_state_dir) if upload_state_dir else None
+        )
+
         if kwargs:
             raise TypeError(
                 "Unexpected keyword argument(s) %s" % ",".join(kwargs.keys())
@@ -206,8 +436,8 @@ class Client(object):
         )
 
         # executor for uploads:
-        # - reading of file content for upload, and calculation of checksums,
-        #   happens in this executor
+        # - reading of file content for upload happens in this executor,
+        #   as does calculation of checksums (in a helper thread per upload)
         # - HTTP requests don't happen here and are still submitted via
         #   request_executor (hence no retry needed on this executor)
         self._upload_executor = Executors.thread_pool(
@@ -242,6 +472,10 @@ class Client(object):
         self._upload_executor.__exit__(*args, **kwargs)
         self._task_executor.__exit__(*args, **kwargs)
 
+        if self._upload_states:
+            # Any uploads not yet done may be resumed by another client.
+            self._upload_states.close()
+
     def get_repository(self, repository_id):
         """Get a repository by ID.
 
@@ -280,10 +514,14 @@ class Client(object):
         """
         search_options = {"distributors": True, "importers": True}
         return self._search(
-            Repository, "repositories", criteria=criteria, search_options=search_options
+            Repository,
+            "repositories",
+            criteria=criteria,
+            search_options=search_options,
+            page_key="id",
         )
 
-    def search_content(self, criteria=None):
+    def search_content(self, criteria=None, as_table=False):
         """Search for units across all repositories.
 
         Args:
@@ -291,6 +529,15 @@ class Client(object):
                 A criteria object used for this search.
                 If None, search for all units.
 
+            as_table (bool)
+                If True, the results are returned as a single
+                :class:`~pubtools.pulplib.UnitTable` rather than pages of
+                :class:`~pubtools.pulplib.Unit` objects.
+
+                This is recommended for searches returning large numbers of units,
+                particularly when combined with a field projection via
+                :meth:`~pubtools.pulplib.Criteria.with_unit_type`.
+
         Returns:
             Future[:class:`~pubtools.pulplib.Page`]
                 A future representing the first page of results.
@@ -298,7 +545,14 @@ class Client(object):
                 Each page will contain a collection of
                 :class:`~pubtools.pulplib.Unit` subclasses objects.
 
+            Future[:class:`~pubtools.pulplib.UnitTable`]
+                If ``as_table`` is True, a future for a table holding
+                all results.
+
         .. versionadded:: 2.6.0
+
+        .. versionadded:: 2.42.0
+            Added the ``as_table`` argument.
         """
         # Criteria will be serialized into a Pulp search at the time we
         # actually do the query, but validate eagerly as well so we raise
@@ -312,13 +566,52 @@ class Client(object):
             # theory might waste some time querying the types more than once.
             self._server_type_ids = self.get_content_type_ids()
 
-        return f_proxy(
-            f_flat_map(
-                self._server_type_ids,
-                lambda ids: self._search_content_with_server_type_ids(criteria, ids),
-            )
+        object_class = UnitRow if as_table else Unit
+        pages_f = f_flat_map(
+            self._server_type_ids,
+            lambda ids: self._search_content_with_server_type_ids(
+                criteria, ids, object_class
+            ),
         )
 
+        if as_table:
+            return f_proxy(table_from_pages(pages_f))
+
+        return f_proxy(pages_f)
+
+    def get_units_by_key(self, units):
+        """Find many units at once by their unit keys.
+
+        Args:
+            units (Iterable[:class:`~pubtools.pulplib.Unit`])
+                Units to be found, with (at least) the fields making up the unit
+                key for their type populated; for example, ``path``, ``size``
+                and ``sha256sum`` for :class:`~pubtools.pulplib.FileUnit`.
+
+                Units of several types may be given.
+
+        Returns:
+            Future[dict]
+                A future resolved with a dict having an entry for each distinct
+                unit key among the input units. Keys are
+                ``(type(unit), unit.unit_key)`` tuples (see
+                :attr:`~pubtools.pulplib.Unit.unit_key`); the type is included
+                as units of different types may have equal unit keys.
+
+                Each key maps to the unit with that unit key in Pulp, or to
+                ``None`` if there is no such unit.
+
+        This is much more efficient than searching for units one at a time,
+        as units are found via a few large searches, split into concurrent
+        requests as needed.
+
+        .. seealso::
+            :meth:`~pubtools.pulplib.Criteria.with_unit_keys`
+
+        .. versionadded:: 2.42.0
+        """
+        return f_proxy(units_by_key(self.search_content, units))
+
     def copy_content(
         self, from_repository, to_repository, criteria=None, options=CopyOptions()
     ):
@@ -448,7 +741,9 @@ class Client(object):
 
         return out
 
-    def _search_content_with_server_type_ids(self, criteria, server_type_ids):
+    def _search_content_with_server_type_ids(
+        self, criteria, server_type_ids, object_class=Unit
+    ):
         prepared_search = search_for_criteria(criteria, Unit, None)
         type_ids = prepared_search.type_ids
         if not type_ids:
@@ -464,6 +759,8 @@ class Client(object):
             ["content/units/%s" % x for x in type_ids],
             criteria=criteria,
             search_options={"include_repos": True},
+            page_key="_id",
+            object_class=object_class,
         )
 
     def search_distributor(self, criteria=None):
@@ -511,24 +808,31 @@ class Client(object):
         search_type="search",
         search_options=None,
         criteria=None,
+        page_key=None,
+        object_class=None,
     ):  # pylint:disable = too-many-arguments
+        # object_class is the class used to load each result, if not return_type.
 
         if not isinstance(resource_types, (list, tuple)):
             resource_types = [resource_types]
 
-        responses = []
-        searches = []
-        urls = []
-        for resource_type in resource_types:
+        # Values repeated across results are shared between all pages of
+        # a search, including across resource types.
+        intern_pool = InternPool()
+
+        # Criteria with huge IN matches are done as several searches, each
+        # paged through independently like the searches for each resource.
+        criteria_list = split_criteria(criteria, self._MAX_IN_VALUES, return_type)
+
+        pagers = []
+        for (resource_type, crit) in itertools.product(resource_types, criteria_list):
             url = os.path.join(
                 self._url, "pulp/api/v2/%s/%s/" % (resource_type, search_type)
             )
-            urls.append(url)
-            prepared_search = search_for_criteria(criteria, return_type)
+            prepared_search = search_for_criteria(crit, return_type)
 
             search = {
                 "criteria": {
-                    "skip": 0,
                     "limit": self._PAGE_SIZE,
                     "filters": prepared_search.filters,
                 }
@@ -543,36 +847,68 @@ class Client(object):
 
             search.update(search_options or {})
 
-            if search_type == "search/units":
-                # Unit searches need a little special handling:
-                # - serialization might have extracted some type_ids
-                # - filters/fields should be wrapped under 'unit'
-                #   (we do not support searching on associations right now)
-                if prepared_search.type_ids:
-                    search["criteria"]["type_ids"] = prepared_search.type_ids
+            unit_search = search_type == "search/units"
+            if unit_search and prepared_search.type_ids:
+                # serialization might have extracted some type_ids
+                search["criteria"]["type_ids"] = prepared_search.type_ids
+
+            pager_key = page_key if self._KEYSET_PAGINATION else None
+            if self._page_readahead > 1:
+                # Pages can only be requested ahead of time if their offsets
+                # are known before the previous page arrives, so keyset
+                # pagination can't be used here.
+                pager_key = None
+
+            if unit_search and len(prepared_search.type_ids or []) != 1:
+                # Pulp only honors a sort on unit fields for association
+                # searches limited to a single content type, so keyset
+                # pagination can't be used here.
+                pager_key = None
+
+            pagers.append(
+                PagedSearch(
+                    url=url,
+                    search=search,
+                    page_key=pager_key,
+                    unit_search=unit_search,
+                    intern_pool=intern_pool,
+                )
+            )
 
-                for elem in ("filters", "fields"):
-                    if elem in search["criteria"]:
-                        search["criteria"][elem] = {"unit": search["criteria"][elem]}
+        # Each resource is paged through independently of the others, and their
+        # pages are merged into a single stream as they arrive, so that a slow
+        # or large resource doesn't hold up the others.
+        return f_proxy(
+            merge_pages(
+                [self._search_pages(object_class or return_type, p) for p in pagers]
+            )
+        )
 
-            searches.append(search)
-            responses.append(self._do_search(url, search))
+    def _search_pages(self, object_class, pager):
+        # Start the search for the first page of a single resource, plus any later
+        # pages we're allowed to read ahead.
+        window = self._fill_page_window(object_class, [(pager, None)])
 
         # When this request is resolved, we'll have the first page of data.
         # We'll need to convert that into a page and also keep going with
         # the search if there's more to be done.
         return f_proxy(
             f_map(
-                f_sequence(responses),
-                lambda data: self._handle_page(urls, return_type, searches, data),
+                window[0][1],
+                lambda data: self._handle_page(object_class, window, data),
             )
         )
 
-    def _search_repo_units(self, repo_id, criteria):
+    def _search_repo_units(self, repo_id, criteria, object_class=None):
         resource_type = "repositories/%s" % repo_id
 
         return self._search(
-            Unit, resource_type, search_type="search/units", criteria=criteria
+            Unit,
+            resource_type,
+            search_type="search/units",
+            criteria=criteria,
+            page_key="_id",
+            object_class=object_class,
         )
 
     def get_maintenance_report(self):
@@ -642,12 +978,27 @@ class Client(object):
         # We only support returning the ID at this time.
         return f_proxy(f_map(out, lambda types: sorted([t["id"] for t in types])))
 
-    def _do_upload_file(self, upload_id, file_obj, name="<unknown file>"):
+    def _do_checksum(self, file_obj):
+        # Calculates checksum of a file prior to upload (see checksum_file).
         return self._upload_executor.submit(
-            self._upload_file_loop, upload_id, file_obj, name
+            checksum_file, file_obj, self._CHUNK_SIZE, self._checksum_cache
+        )
+
+    def _do_upload_file(self, upload_id, file_obj, name="<unknown file>", weight=1):
+        out = self._upload_executor.submit(
+            self._upload_file_loop, upload_id, file_obj, name, weight
         )
 
-    def _upload_file_loop(self, upload_id, file_obj, name):
+        if self._upload_states:
+            # A failed upload is no longer in progress, so it may be resumed.
+            out.add_done_callback(
+                lambda f: (f.cancelled() or f.exception())
+                and self._upload_states.release(upload_id)
+            )
+
+        return out
+
+    def _upload_file_loop(self, upload_id, file_obj, name, weight=1):
         # Read a file in chunks, upload it to pulp under the given upload_id,
         # and return the checksum & bytes read.
         #
@@ -656,26 +1007,91 @@ class Client(object):
         # the upload_executor in order to avoid blocking other operations.
 
         total_size = None
+        state = None
+        cached = None
 
-        is_file_object = "close" in dir(file_obj)
+        is_file_object = not is_path(file_obj)
         if not is_file_object:
             # This is the preferred case (we're responsible for opening the file),
             # as we can then know the total expected size. (file-like objects in
             # general do not know their own size)
-            total_size = os.path.getsize(file_obj)
+            path = file_obj
+            total_size = os.path.getsize(path)
+
+            # It also means the checksum may be known already, in which case
+            # the file doesn't need to be hashed.
+            if self._checksum_cache:
+                cached = self._checksum_cache.get(path)
+                key = None if cached else file_key(path)
+
+            # It also means the upload can be resumed, if requested via
+            # _request_upload.
+            if self._upload_states:
+                state = self._upload_states.get(upload_id)
+
             file_obj = open(file_obj, "rb")
 
+        # Chunk size may be adapted to the throughput of the link, but not
+        # when resuming an upload, as the chunks must line up with those
+        # uploaded earlier.
+        chunk_sizer = None
+        if self._ADAPTIVE_CHUNK_SIZE and not is_file_object and not state:
+            chunk_sizer = AdaptiveChunkSize(
+                self._CHUNK_SIZE, self._MIN_CHUNK_SIZE, self._MAX_CHUNK_SIZE
+            )
+
+        # If bandwidth is limited, this upload shares it with any others,
+        # in proportion to its weight.
+        bandwidth = (
+            self._upload_bandwidth.flow(weight) if self._upload_bandwidth else None
+        )
+
         upload_logger = TimedLogger()
         checksum = hashlib.sha256()
         size = 0
+        start_time = monotonic()
 
         # We allow having a few chunks in flight at once, up to as many requests
         # as we can do in parallel.
         prev_chunks = [f_return() for _ in range(0, self._REQUEST_THREADS)]
 
+        # Chunks are hashed in a thread of their own, so that hashing overlaps
+        # with reading the next chunk and with the PUTs of earlier chunks
+        # (hashlib releases the GIL while hashing large buffers). It's a single
+        # thread since chunks must be hashed in order.
+        hasher = Executors.thread_pool(name="pubtools-pulplib-checksum", max_workers=1)
+
+        # When reading from a file we opened ourselves, chunks are read into
+        # a fixed set of reusable buffers rather than allocating new bytes for
+        # every chunk, so memory used by an upload is bounded by the number of
+        # buffers. There's one more buffer than chunks in flight, so the next
+        # chunk can be read while the others are uploading. By the time a
+        # buffer comes around again, the chunk previously held in it has been
+        # hashed and uploaded (see prev_chunks).
+        buffers = None
+        if not is_file_object:
+            buffers = ChunkBuffers(
+                self._REQUEST_THREADS + 1, min(self._CHUNK_SIZE, total_size)
+            )
+
         try:
             while True:
-                data = file_obj.read(self._CHUNK_SIZE)
+                if cached and state and size < total_size and state.confirmed(size):
+                    # Pulp already received this chunk during an earlier
+                    # attempt, and it doesn't need to be hashed, so there's no
+                    # need to even read it.
+                    size += min(self._CHUNK_SIZE, total_size - size)
+                    file_obj.seek(size)
+                    continue
+
+                if chunk_sizer:
+                    data = buffers.read_next(
+                        file_obj, min(chunk_sizer.size, total_size)
+                    )
+                elif buffers:
+                    data = buffers.read_next(file_obj)
+                else:
+                    data = file_obj.read(self._CHUNK_SIZE)
 
                 if not data:
                     break
@@ -684,14 +1100,27 @@ class Client(object):
                     # if it's unicode, need to encode before calculate checksum
                     data = data.encode("utf-8")
 
-                checksum.update(data)
-
                 # Ensure the number of chunks are kept at a fixed size by waiting
-                # for one of them to complete.
+                # for one of them to complete (both hashing and upload).
                 prev_chunks.pop(0).result()
 
-                # Then start upload of this chunk to Pulp.
-                prev_chunks.append(self._do_upload(data, upload_id, size))
+                # Then start hashing of this chunk, and upload of it to Pulp.
+                hash_f = f_return() if cached else hasher.submit(checksum.update, data)
+                if state and state.confirmed(size):
+                    # Pulp already received this chunk during an earlier
+                    # attempt, so it only needs to be hashed.
+                    prev_chunks.append(hash_f)
+                else:
+                    if bandwidth:
+                        bandwidth.acquire(len(data))
+                    upload_f = self._do_upload(data, upload_id, size, chunk_sizer)
+                    if state:
+                        # Remember that Pulp has this chunk, in case the upload
+                        # needs to be resumed later.
+                        upload_f = f_map(
+                            upload_f, lambda _, offset=size: state.confirm(offset)
+                        )
+                    prev_chunks.append(f_sequence([hash_f, upload_f]))
 
                 size += len(data)
 
@@ -716,9 +1145,29 @@ class Client(object):
             for chunk in prev_chunks:
                 chunk.result()
 
+            if chunk_sizer and chunk_sizer.chunks:
+                LOG.info(
+                    "Uploaded %s: %s in %.1fs, %s/s per request over %s chunk(s), "
+                    "final chunk size %s [%s]",
+                    name,
+                    naturalsize(size),
+                    monotonic() - start_time,
+                    naturalsize(chunk_sizer.rate),
+                    chunk_sizer.chunks,
+                    naturalsize(chunk_sizer.size),
+                    upload_id,
+                )
+
+            if cached:
+                return UploadResult(cached[0], size)
+
+            if self._checksum_cache and not is_file_object:
+                self._checksum_cache.put(path, key, checksum.hexdigest(), size)
+
             return UploadResult(checksum.hexdigest(), size)
 
         finally:
+            hasher.shutdown(wait=False)
             file_obj.close()
 
     def _publish_repository(self, repo, distributors_with_config):
@@ -753,6 +1202,16 @@ class Client(object):
         )
 
     def _do_associate(self, src_repo_id, dest_repo_id, criteria=None, raw_options=None):
+        criteria_list = split_criteria(criteria, self._MAX_IN_VALUES, Unit)
+        if len(criteria_list) > 1:
+            # Huge criteria are done as several (throttled) tasks.
+            return self._join_tasks(
+                [
+                    self._do_associate(src_repo_id, dest_repo_id, crit, raw_options)
+                    for crit in criteria_list
+                ]
+            )
+
         url = os.path.join(
             self._url, "pulp/api/v2/repositories/%s/actions/associate/" % dest_repo_id
         )
@@ -776,6 +1235,17 @@ class Client(object):
         )
 
     def _do_unassociate(self, repo_id, criteria=None, limit=None):
+        # (A limit applies across all removed units, so criteria can't be
+        # split when a limit is given.)
+        criteria_list = [criteria]
+        if not limit:
+            criteria_list = split_criteria(criteria, self._MAX_IN_VALUES, Unit)
+        if len(criteria_list) > 1:
+            # Huge criteria are done as several (throttled) tasks.
+            return self._join_tasks(
+                [self._do_unassociate(repo_id, crit) for crit in criteria_list]
+            )
+
         url = os.path.join(
             self._url, "pulp/api/v2/repositories/%s/actions/unassociate/" % repo_id
         )
@@ -809,6 +1279,14 @@ class Client(object):
             self._do_request, method="POST", url=url, json=body
         )
 
+    def _join_tasks(self, tasks_fs):
+        # Given futures for several lists of tasks, returns a future for a
+        # single list of all the tasks.
+        return f_map(
+            f_sequence(tasks_fs),
+            lambda tasks_lists: list(itertools.chain.from_iterable(tasks_lists)),
+        )
+
     def _get_repo_lock_data(self, repo_id):
         repo_raw_f = self._request_executor.submit(
             self._do_request,
@@ -852,6 +1330,11 @@ class Client(object):
 
     @classmethod
     def _unpack_response(cls, pulp_response):
+        if isinstance(pulp_response, PageResponse):
+            # A page of search results, already decoded while it was being
+            # received (see _do_search_request).
+            return pulp_response
+
         try:
             parsed = pulp_response.json()
         except Exception:
@@ -890,49 +1373,72 @@ class Client(object):
             pass
         return taskdata
 
-    def _handle_page(self, urls, object_class, searches, raw_data_list):
-
-        page_data = []
-        for url, search, raw_data in zip(urls, searches, raw_data_list):
-            # Extract metadata from Pulp units
-            LOG.debug("Got pulp response for %s, %s elems", search, len(raw_data))
-            if object_class is Unit and url.endswith("units/"):
-                raw_data = [elem["metadata"] for elem in raw_data]
-
-            page_data.extend([object_class.from_data(elem) for elem in raw_data])
-
-        for obj in page_data:
-            # set_client is only applicable for repository and distributor objects
-            if hasattr(obj, "_set_client"):
-                obj._set_client(self)
+    def _fill_page_window(self, object_class, window):
+        # Given a window of (PagedSearch, response future) pairs for upcoming pages
+        # of a single resource, start the search for any page which hasn't been
+        # requested yet and then read ahead as many later pages as allowed.
+        #
+        # The first element of the window may have a future of None, meaning that
+        # it's known which page to search for, but the search has not yet started.
+        window = [
+            (pager, response_f or self._do_search(pager, object_class))
+            for (pager, response_f) in window
+        ]
+
+        while len(window) < self._page_readahead:
+            next_pager = window[-1][0].skip_ahead()
+            window.append((next_pager, self._do_search(next_pager, object_class)))
+
+        return window
+
+    def _handle_page(self, object_class, window, response):
+        # Before doing anything else, start the search for later pages if needed,
+        # so that Pulp can work on them while we handle this page.
+        pager = window[0][0]
+        ahead = window[1:]
+
+        next_window = None
+        next_pager = pager.next_page(response)
+        if next_pager:
+            next_window = self._fill_page_window(
+                object_class, ahead or [(next_pager, None)]
+            )
+        else:
+            # This was the last page. Any pages we read ahead are beyond the end
+            # of the results and can be discarded.
+            for (_, response_f) in ahead:
+                response_f.cancel()
 
         # Do we need a next page?
         next_page = None
 
-        next_responses = []
-        next_searches = []
-        next_urls = []
-        for url, search, raw_data in zip(urls, searches, raw_data_list):
-            limit = search["criteria"]["limit"]
-            if len(raw_data) == limit:
-                # Yeah, we might...
-                search = search.copy()
-                search["criteria"] = search["criteria"].copy()
-                search["criteria"]["skip"] = search["criteria"]["skip"] + limit
-                response_f = self._do_search(url, search)
-                next_searches.append(search)
-                next_responses.append(response_f)
-                next_urls.append(url)
-
-        if next_responses:
+        if next_window:
+            # Note this is set up before handling the current page, so that the
+            # next page can be handled as soon as it arrives.
             next_page = f_proxy(
                 f_map(
-                    f_sequence(next_responses),
-                    lambda data: self._handle_page(
-                        next_urls, object_class, next_searches, data
-                    ),
+                    next_window[0][1],
+                    lambda data: self._handle_page(object_class, next_window, data),
                 )
             )
+
+            def cancel_read_ahead(page_f):
+                # If the next page is cancelled, there's no point to continue
+                # with any later pages either.
+                if page_f.cancelled():
+                    for (_, response_f) in next_window:
+                        response_f.cancel()
+
+            next_page.add_done_callback(cancel_read_ahead)
+
+        LOG.debug("Got pulp response for %s, %s elems", pager.body, response.count)
+
+        page_data = response.data
+        for obj in page_data:
+            # set_client is only applicable for repository and distributor objects
+            if hasattr(obj, "_set_client"):
+                obj._set_client(self)
+
         return Page(data=page_data, next=next_page)
 
     @property
@@ -965,12 +1471,40 @@ class Client(object):
 
         return response
 
-    def _do_search(self, url, search):
-        LOG.debug("Submitting %s search: %s", url, search)
+    def _do_search(self, pager, object_class):
+        LOG.debug("Submitting %s search: %s", pager.url, pager.body)
         return self._request_executor.submit(
-            self._do_request, method="POST", url=url, json=search
+            self._do_search_request, pager, object_class
+        )
+
+    def _do_search_request(self, pager, object_class):
+        # Search responses can be very large. Rather than parsing an entire
+        # response and then converting it to model objects, the response is
+        # streamed and each result is converted as soon as it's been parsed,
+        # so we never hold more than one raw result in memory at once.
+        response = self._do_request(
+            method="POST", url=pager.url, json=pager.body, stream=True
         )
 
+        if not response.ok:
+            # Not a page of results; let _unpack_response deal with it.
+            return response
+
+        data = []
+        last_key = None
+        validation = validating(self._validation_policy)
+        with response, validation, interning(pager.intern_pool):
+            for elem in iter_json_array(iter_response_text(response)):
+                last_key = pager.key_of(elem)
+
+                # Extract metadata from Pulp units
+                if pager.unit_search:
+                    elem = elem["metadata"]
+
+                data.append(object_class.from_data(elem))
+
+        return PageResponse(data=data, count=len(data), last_key=last_key)
+
     def _delete_resource(self, resource_type, resource_id):
         url = os.path.join(
             self._url, "pulp/api/v2/%s/%s/" % (resource_type, resource_id)
@@ -979,21 +1513,94 @@ class Client(object):
         LOG.debug("Queuing request to DELETE %s", url)
         return self._task_executor.submit(self._do_request, method="DELETE", url=url)
 
-    def _request_upload(self, name):
-        url = os.path.join(self._url, "pulp/api/v2/content/uploads/")
+    def _request_upload(self, name, file_obj=None):
+        if self._upload_states and is_path(file_obj):
+            return self._request_resumable_upload(name, file_obj)
 
+        url = os.path.join(self._url, "pulp/api/v2/content/uploads/")
         LOG.debug("Requesting upload id for %s", name)
         return self._request_executor.submit(self._do_request, method="POST", url=url)
 
-    def _do_upload(self, data, upload_id, offset):
+    def _request_resumable_upload(self, name, path):
+        # Like _request_upload, but for an upload of a local file which may be
+        # resumed: if there's saved state for an earlier upload of the same
+        # file which Pulp still knows about, that upload's ID is returned.
+        url = os.path.join(self._url, "pulp/api/v2/content/uploads/")
+        state = self._upload_states.claim(path)
+
+        def save_state(upload):
+            self._upload_states.create(path, upload["upload_id"], self._CHUNK_SIZE)
+            return upload
+
+        def new_upload():
+            LOG.debug("Requesting upload id for %s", name)
+            upload_f = self._request_executor.submit(
+                self._do_request, method="POST", url=url
+            )
+            return f_map(upload_f, save_state)
+
+        if not state:
+            return new_upload()
+
+        if not state.matches(path) or state.chunk_size != self._CHUNK_SIZE:
+            # The file has changed since the earlier upload (or we'd upload it
+            # differently), so it can't be resumed; drop it rather than leaving
+            # it orphaned in Pulp.
+            LOG.info("Discarding stale upload of %s [%s]", name, state.upload_id)
+            self._delete_upload_request(state.upload_id, name)
+            return new_upload()
+
+        def resume_or_new(uploads):
+            if state.upload_id not in uploads["upload_ids"]:
+                # Pulp no longer has it (e.g. deleted by a cleanup job).
+                self._upload_states.remove(state.upload_id)
+                return new_upload()
+
+            LOG.info("Resuming upload of %s [%s]", name, state.upload_id)
+            return f_return({"upload_id": state.upload_id})
+
+        uploads_f = self._request_executor.submit(
+            self._do_request, method="GET", url=url
+        )
+        out = f_flat_map(uploads_f, resume_or_new)
+        out.add_done_callback(
+            lambda f: (f.cancelled() or f.exception())
+            and self._upload_states.release(state.upload_id)
+        )
+        return out
+
+    def _do_upload(self, data, upload_id, offset, chunk_sizer=None):
         url = os.path.join(
             self._url, "pulp/api/v2/content/uploads/%s/%s/" % (upload_id, offset)
         )
 
-        return self._request_executor.submit(
-            self._do_request, method="PUT", url=url, data=data
+        if not chunk_sizer:
+            return self._request_executor.submit(
+                self._do_request, method="PUT", url=url, data=data
+            )
+
+        # Each attempt at the request (including retries) is timed, but only
+        # the attempt which succeeded is reported to chunk_sizer: failed
+        # attempts say nothing useful about the throughput of the link.
+        durations = []
+        out = self._request_executor.submit(
+            self._do_timed_request, durations, method="PUT", url=url, data=data
         )
 
+        def observe(f):
+            if not f.cancelled() and not f.exception():
+                chunk_sizer.observe(len(data), durations[-1])
+
+        out.add_done_callback(observe)
+        return out
+
+    def _do_timed_request(self, durations, **kwargs):
+        # Like _do_request, also appending the time taken to durations.
+        start = monotonic()
+        response = self._do_request(**kwargs)
+        durations.append(monotonic() - start)
+        return response
+
     def _do_import(
         self, repo_id, upload_id, unit_type_id, unit_key, unit_metadata=None
     ):
@@ -1011,15 +1618,36 @@ class Client(object):
         }
 
         LOG.debug("Importing contents to repo %s with upload id %s", repo_id, upload_id)
-        return self._task_executor.submit(
+        out = self._task_executor.submit(
             self._do_request, method="POST", url=url, json=body
         )
 
+        if self._upload_states:
+            # The upload is complete, so there's nothing left to resume: if
+            # the import fails, a later attempt starts from scratch.
+            out.add_done_callback(
+                lambda f: (f.cancelled() or f.exception())
+                and self._upload_states.remove(upload_id)
+            )
+
+        return out
+
     def _delete_upload_request(self, upload_id, name):
         url = os.path.join(self._url, "pulp/api/v2/content/uploads/%s/" % upload_id)
 
         LOG.debug("Deleting upload request %s for %s", upload_id, name)
-        return self._request_executor.submit(self._do_request, method="DELETE", url=url)
+        out = self._request_executor.submit(self._do_request, method="DELETE", url=url)
+
+        if self._upload_states:
+            # Once deleted, the upload can no longer be resumed; if deletion
+            # fails, the upload is at least no longer in progress.
+            out = f_map(out, lambda ret: self._upload_states.remove(upload_id) or ret)
+            out.add_done_callback(
+                lambda f: (f.cancelled() or f.exception())
+                and self._upload_states.release(upload_id)
+            )
+
+        return out
 
     def _do_get_maintenance(self):
         def map_404_to_none(exception):
@@ -0,0 +1,154 @@
+from collections.abc import Hashable, Iterable
+
+from pubtools.pulplib._impl.criteria import (
+    AndCriteria,
+    OrCriteria,
+    FieldMatchCriteria,
+    TrueCriteria,
+    EqMatcher,
+    InMatcher,
+)
+
+
+def optimize_criteria(criteria):
+    # Returns criteria equivalent to the given criteria, simplified so that
+    # it can be serialized into smaller Pulp queries and evaluated faster:
+    #
+    # - nested AND within AND (and OR within OR) are flattened
+    # - TrueCriteria is folded out of AND and OR
+    # - duplicate operands of AND/OR are removed
+    # - within OR, equality matches on the same field are merged into a single
+    #   IN match, e.g. (name==a OR name==b) => name IN [a, b]
+    # - AND/OR with a single operand are replaced by that operand
+    #
+    # Criteria which can't be simplified are returned as-is.
+    if isinstance(criteria, AndCriteria):
+        return optimize_and(criteria)
+
+    if isinstance(criteria, OrCriteria):
+        return optimize_or(criteria)
+
+    return criteria
+
+
+def optimize_and(criteria):
+    if not criteria._operands:
+        # Invalid for Pulp; leave it to be rejected as usual.
+        return criteria
+
+    operands = flatten(AndCriteria, criteria._operands)
+    operands = [op for op in operands if not isinstance(op, TrueCriteria)]
+    operands = unique(operands)
+
+    if not operands:
+        return TrueCriteria()
+    if len(operands) == 1:
+        return operands[0]
+    return AndCriteria(tuple(operands))
+
+
+def optimize_or(criteria):
+    if not criteria._operands:
+        # Invalid for Pulp; leave it to be rejected as usual.
+        return criteria
+
+    operands = flatten(OrCriteria, criteria._operands)
+    if any(isinstance(op, TrueCriteria) for op in operands):
+        return TrueCriteria()
+    operands = unique(merge_eq(operands))
+
+    if len(operands) == 1:
+        return operands[0]
+    return OrCriteria(tuple(operands))
+
+
+def flatten(klass, operands):
+    # Returns optimized operands of an AND/OR (klass), with the operands of any
+    # nested criteria of the same class pulled up into the top level.
+    out = []
+    for op in operands:
+        op = optimize_criteria(op)
+        if isinstance(op, klass) and op._operands:
+            out.extend(op._operands)
+        else:
+            out.append(op)
+    return out
+
+
+def mergeable_values(criteria):
+    # If criteria is a plain match of a field against one or more scalar
+    # values, returns those values; otherwise returns None.
+    #
+    # Values which are themselves collections are not mergeable, since an
+    # equality match against a list is not equivalent to an IN match.
+    # Subclasses such as UnitTypeMatchCriteria carry additional info and
+    # are also not mergeable.
+    klass = type(criteria)
+    if klass is not FieldMatchCriteria:
+        return None
+
+    matcher = criteria._matcher
+    if isinstance(matcher, EqMatcher):
+        values = [matcher._value]
+    elif isinstance(matcher, InMatcher):
+        values = list(matcher._values)
+    else:
+        return None
+
+    for value in values:
+        if not isinstance(value, Hashable) or (
+            isinstance(value, Iterable) and not isinstance(value, str)
+        ):
+            return None
+
+    return values
+
+
+def merge_eq(operands):
+    # Merges matches on the same field within the operands of an OR into a
+    # single IN match, placed at the position of the first match on the field.
+    values_by_field = {}
+    for op in operands:
+        values = mergeable_values(op)
+        if values is not None:
+            values_by_field.setdefault(op._field, []).extend(values)
+
+    out = []
+    for op in operands:
+        values = mergeable_values(op)
+        if values is None:
+            out.append(op)
+            continue
+
+        field = op._field
+        if field not in values_by_field:
+            # Already merged into an earlier operand.
+            continue
+
+        values = unique(values_by_field.pop(field))
+        if len(values) == 1 and isinstance(op._matcher, EqMatcher):
+            out.append(op)
+        else:
+            out.append(FieldMatchCriteria(field, InMatcher(values)))
+
+    return out
+
+
+def unique(values):
+    # Returns values with duplicates removed, preserving order.
+    #
+    # Values are keyed by type as well as value, so that e.g. 1 and True
+    # (which are equal in Python, but not in Pulp queries) are both kept.
+    seen = set()
+    out = []
+    for value in values:
+        try:
+            key = (type(value), value)
+            if key in seen:
+                continue
+            seen.add(key)
+        except TypeError:
+            # unhashable, can't be deduplicated.
+            pass
+        out.append(value)
+    return out
@@ -0,0 +1,252 @@
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future, CancelledError
+
+from more_executors.futures import f_proxy
+
+from .. import compat_attr as attr
+from ..page import Page
+
+# A single page of search results received from Pulp:
+# - data: the results, already converted to model objects
+# - count: the number of results
+# - last_key: the value of the page key on the last result, if any
+PageResponse = namedtuple("PageResponse", ["data", "count", "last_key"])
+
+
+@attr.s(kw_only=True, frozen=True)
+class PagedSearch(object):
+    # Helper class representing the progress of a paginated search through
+    # a single Pulp resource (e.g. repositories, or units of one content type).
+    #
+    # Two pagination modes are supported:
+    #
+    # - keyset: if page_key is set, results are sorted on that (unique) field
+    #   and each page after the first asks for page_key > the last value seen.
+    #   Pulp can serve every page of such a search straight from an index,
+    #   so the cost of a page does not depend on how deep into the results
+    #   we are.
+    #
+    # - skip/limit: otherwise, each page asks Pulp to skip over all the results
+    #   we've already seen. This works for any search, but with Pulp's mongo
+    #   backend each page costs more than the previous one.
+
+    # URL of the search endpoint.
+    url = attr.ib()
+
+    # Search used for the first page, with criteria not yet wrapped
+    # under "unit" for association searches.
+    search = attr.ib()
+
+    # Name of the field used for keyset pagination, if any.
+    page_key = attr.ib(default=None)
+
+    # True if this is a repo association search (search/units), where unit
+    # filters/fields/sort must be wrapped under 'unit'.
+    unit_search = attr.ib(default=False)
+
+    # Number of results already returned by previous pages.
+    offset = attr.ib(default=0)
+
+    # Value of page_key on the last result of the previous page, if known.
+    last_key = attr.ib(default=None)
+
+    # InternPool used when loading results of this search, shared by all pages.
+    intern_pool = attr.ib(default=None, repr=False)
+
+    @property
+    def limit(self):
+        return self.search["criteria"]["limit"]
+
+    @property
+    def body(self):
+        """The JSON body to be submitted to Pulp in order to get this page."""
+        search = self.search.copy()
+        criteria = search["criteria"].copy()
+
+        if self.page_key:
+            criteria["sort"] = [[self.page_key, "ascending"]]
+
+        if self.page_key and self.last_key is not None:
+            after = {self.page_key: {"$gt": self.last_key}}
+            if criteria["filters"]:
+                criteria["filters"] = {"$and": [criteria["filters"], after]}
+            else:
+                criteria["filters"] = after
+        elif self.offset or not self.page_key:
+            # Either not using keyset pagination at all, or we could not
+            # determine the key of the last result (e.g. Pulp omitted it).
+            # Since results are still sorted, we can continue via skip.
+            criteria["skip"] = self.offset
+
+        if self.unit_search:
+            # Unit searches need a little special handling:
+            # filters/fields/sort should be wrapped under 'unit'
+            # (we do not support searching on associations right now)
+            for elem in ("filters", "fields", "sort"):
+                if elem in criteria:
+                    criteria[elem] = {"unit": criteria[elem]}
+
+        search["criteria"] = criteria
+        return search
+
+    def skip_ahead(self):
+        """Returns a PagedSearch for the page following this one, assuming this
+        page will be full, without knowing the results of this page.
+
+        Only valid for searches without a page_key, as keyset pagination needs
+        the results of this page to locate the next.
+        """
+        return attr.evolve(self, offset=self.offset + self.limit)
+
+    def key_of(self, raw_elem):
+        """Returns the value of the page key for a raw result of this search,
+        or None if not known."""
+        if not self.page_key:
+            return None
+        if self.unit_search:
+            raw_elem = raw_elem.get("metadata") or {}
+        return raw_elem.get(self.page_key)
+
+    def next_page(self, response):
+        """Given the PageResponse received from Pulp for this page, returns
+        a PagedSearch for the next page, or None if there are no more pages."""
+        if response.count < self.limit:
+            return None
+
+        return attr.evolve(
+            self, offset=self.offset + response.count, last_key=response.last_key
+        )
+
+
+def merge_pages(page_fs):
+    # Given futures for several independent streams of pages, returns
+    # a future for a single stream of pages holding the data from all of them.
+    #
+    # Pages are yielded in the order they become available, so a slow stream
+    # never holds up the others.
+    if len(page_fs) == 1:
+        return page_fs[0]
+
+    return PageMerger(page_fs).start()
+
+
+class PageMerger(object):
+    # Implementation of merge_pages.
+    #
+    # A single callback is registered on each input future. Data from input
+    # pages is queued as it arrives and handed out to the merged stream one
+    # page at a time, so the merger holds no reference to any page once it's
+    # been delivered.
+
+    def __init__(self, page_fs):
+        # Reentrant, since garbage collection of a delivered page (which may
+        # happen at any allocation, even with this lock held) cancels the next
+        # page of the merged stream, calling back into _on_output_done.
+        self._lock = threading.RLock()
+        self._inputs = list(page_fs)
+        self._ready = deque()
+        self._error = None
+
+        # Future for the next page of the merged stream, if it's been
+        # requested and not yet delivered.
+        self._waiter = None
+
+    def start(self):
+        out = self._new_output()
+        self._waiter = out
+        for page_f in list(self._inputs):
+            page_f.add_done_callback(self._on_input)
+        return out
+
+    def _new_output(self):
+        out = Future()
+        out.add_done_callback(self._on_output_done)
+        return out
+
+    def _on_output_done(self, out):
+        if not out.cancelled():
+            return
+
+        # Merged stream was cancelled, so the inputs aren't needed any more.
+        with self._lock:
+            inputs = self._inputs
+            self._inputs = []
+            self._ready.clear()
+        for page_f in inputs:
+            page_f.cancel()
+
+    def _on_input(self, page_f):
+        # Handle a page from an input, and any following pages from the same
+        # input which are already available (looping here rather than
+        # recursing via callbacks).
+        while page_f:
+            page_f = self._take(page_f)
+            self._deliver()
+
+    def _take(self, page_f):
+        # Queue the data from a single input page. Returns the input's next
+        # page future if it's already done, otherwise None.
+        cancel = []
+        next_f = None
+
+        with self._lock:
+            if page_f not in self._inputs:
+                # Merged stream was cancelled or failed.
+                return None
+            self._inputs.remove(page_f)
+
+            if page_f.cancelled() or page_f.exception():
+                # Any failure fails the merged stream, and the other streams
+                # aren't needed any more.
+                self._error = (
+                    CancelledError() if page_f.cancelled() else page_f.exception()
+                )
+                cancel = self._inputs
+                self._inputs = []
+            else:
+                page = page_f.result()
+                self._ready.append(page.data)
+                next_f = page.next
+                if next_f:
+                    self._inputs.append(next_f)
+
+        for other in cancel:
+            other.cancel()
+
+        if next_f:
+            if next_f.done():
+                return next_f
+            next_f.add_done_callback(self._on_input)
+        return None
+
+    def _deliver(self):
+        # Resolve pages of the merged stream while they've been requested and
+        # there's something to resolve them with.
+        while True:
+            with self._lock:
+                out = self._waiter
+                if not out:
+                    return
+
+                error = self._error
+                next_f = None
+                if error:
+                    data = None
+                elif self._ready:
+                    data = self._ready.popleft()
+                    if self._ready or self._inputs:
+                        next_f = self._new_output()
+                else:
+                    return
+
+                self._waiter = next_f
+
+            if not out.set_running_or_notify_cancel():
+                return
+
+            if error:
+                out.set_exception(error)
+                return
+
+            out.set_result(Page(data=data, next=f_proxy(next_f) if next_f else None))
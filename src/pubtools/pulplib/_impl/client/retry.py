@@ -4,6 +4,7 @@ import traceback
 
 from more_executors.retry import RetryPolicy, ExceptionRetryPolicy
 
+from ..model import InvalidDataException
 from .errors import TaskFailedException
 
 LOG = logging.getLogger("pubtools.pulplib")
@@ -33,6 +34,11 @@ class PulpRetryPolicy(RetryPolicy):
             if exception.response.status_code in (404, 409):
                 return False
 
+        if isinstance(exception, InvalidDataException):
+            # Pulp returned data we can't handle; retrying will only get the
+            # same data again.
+            return False
+
         if exception and retry:
             self._log_retry(attempt, future)
 
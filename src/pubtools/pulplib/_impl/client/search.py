@@ -1,6 +1,10 @@
 import logging
 import datetime
 import contextlib
+import functools
+
+from frozenlist2 import frozenlist
+
 from pubtools.pulplib._impl.criteria import (
     AndCriteria,
     OrCriteria,
@@ -18,6 +22,7 @@ from pubtools.pulplib._impl import compat_attr as attr
 from pubtools.pulplib._impl.model.attr import PULP2_FIELD, PY_PULP2_CONVERTER
 from pubtools.pulplib._impl.model.unit.base import Unit, class_for_type_id
 from pubtools.pulplib._impl.client.errors import AmbiguousQueryException
+from pubtools.pulplib._impl.client.optimize import optimize_criteria, unique
 
 LOG = logging.getLogger("pubtools.pulplib")
 
@@ -71,6 +76,24 @@ def raise_ambiguous_query(field_name, type_hint, grouped_class_names):
     raise AmbiguousQueryException("\n".join(message))
 
 
+@functools.lru_cache(maxsize=None)
+def field_index(klass):
+    # Returns a dict mapping the name of every field of an attrs class to
+    # (pulp_field_name, converter), or to None for fields which can't be mapped
+    # to Pulp. converter is None if values are used as-is.
+    #
+    # Computed once per class, as map_field_for_type would otherwise repeat
+    # this reflection for every field of every search.
+    out = {}
+    for field in attr.fields(klass):
+        metadata = field.metadata
+        if PULP2_FIELD in metadata:
+            out[field.name] = (metadata[PULP2_FIELD], metadata.get(PY_PULP2_CONVERTER))
+        else:
+            out[field.name] = None
+    return out
+
+
 def map_field_for_type(field_name, matcher, type_hint):
     if not type_hint:
         return None
@@ -80,15 +103,13 @@ def map_field_for_type(field_name, matcher, type_hint):
     found = {}
     for klass in attrs_classes:
         # Does the class have this field?
-        klass_fields = attr.fields(klass)
-        if not hasattr(klass_fields, field_name):
+        index = field_index(klass)
+        if field_name not in index:
             continue
-        field = getattr(klass_fields, field_name)
-        metadata = field.metadata
-        if PULP2_FIELD in metadata:
-            pulp_field_name = metadata[PULP2_FIELD]
-            converter = metadata.get(PY_PULP2_CONVERTER, lambda x: x)
-            mapped = matcher._map(converter) if matcher else None
+        mapping = index[field_name]
+        if mapping:
+            (pulp_field_name, converter) = mapping
+            mapped = matcher._map(converter or (lambda x: x)) if matcher else None
             key = (pulp_field_name, mapped)
             found.setdefault(key, []).append(klass.__name__)
             continue
@@ -194,7 +215,82 @@ def search_for_criteria(
     # type_hint optionally provides the class expected to be found by this search.
     # This can impact the application of certain criteria, e.g. it will affect
     # field mappings looked up by FieldMatchCriteria.
+    #
+    # The returned PulpSearch may be shared with other callers and must not
+    # be modified.
+
+    if unit_type_accum is None and accum_only is None:
+        # Top-level call: the result depends only on criteria and type_hint,
+        # so it can be cached if criteria has a cache key.
+        key = criteria_cache_key(criteria)
+        if key is not None:
+            return cached_search_for_criteria(CachedCriteria(key, criteria), type_hint)
 
+        criteria = optimize_criteria(criteria)
+
+    return compile_search(criteria, type_hint, unit_type_accum, accum_only)
+
+
+# Criteria with IN matches larger than this aren't cached, as hashing them on
+# every lookup is costly and keeping them alive in the cache uses a lot of memory.
+MAX_CACHED_IN_VALUES = 100
+
+
+def criteria_cache_key(criteria):
+    # Returns a hashable key for criteria which is equal only for criteria
+    # compiling to the same search, or None if criteria shouldn't be cached.
+    #
+    # Values are keyed by type as well as value, since e.g. 1 and True are
+    # equal in Python, but not in Pulp queries.
+    try:
+        return value_cache_key(criteria)
+    except (TypeError, ValueError):
+        return None
+
+
+def value_cache_key(value):
+    if isinstance(value, InMatcher) and len(value._values) > MAX_CACHED_IN_VALUES:
+        raise ValueError("too many values to cache")
+
+    if isinstance(value, TrueCriteria):
+        return (TrueCriteria,)
+
+    if attr.has(type(value)):
+        return (type(value),) + tuple(
+            value_cache_key(getattr(value, field.name))
+            for field in attr.fields(type(value))
+        )
+
+    if isinstance(value, (list, tuple)):
+        return (type(value),) + tuple(value_cache_key(elem) for elem in value)
+
+    # Raises TypeError if unhashable.
+    hash(value)
+    return (type(value), value)
+
+
+class CachedCriteria(object):
+    # Criteria wrapped for use as a key of cached_search_for_criteria,
+    # compared by cache key rather than by criteria equality.
+
+    def __init__(self, key, criteria):
+        self.key = key
+        self.criteria = criteria
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+@functools.lru_cache(maxsize=1024)
+def cached_search_for_criteria(cached, type_hint):
+    return compile_search(optimize_criteria(cached.criteria), type_hint)
+
+
+def compile_search(criteria, type_hint=None, unit_type_accum=None, accum_only=None):
+    # Implementation of search_for_criteria, without caching.
     if type_hint is Unit and accum_only is None:
         # If the caller asked for a generic Unit type hint, we'll do two passes.
         # The first pass tries to figure out exactly what kind of Unit subtype is
@@ -202,7 +298,7 @@ def search_for_criteria(
         # on different models but be stored in Pulp in different ways (e.g.
         # FileUnit.version vs ModulemdUnit.version).
         accum = UnitTypeAccumulator()
-        search_for_criteria(criteria, type_hint, accum, accum_only=True)
+        compile_search(criteria, type_hint, accum, accum_only=True)
 
         # We should now know what type_ids we want to query. Map them back to
         # a specific unit type.
@@ -227,9 +323,7 @@ def search_for_criteria(
 
     if isinstance(criteria, AndCriteria):
         clauses = [
-            search_for_criteria(
-                c, type_hint, unit_type_accum, accum_only=accum_only
-            ).filters
+            compile_search(c, type_hint, unit_type_accum, accum_only=accum_only).filters
             for c in criteria._operands
         ]
 
@@ -246,7 +340,7 @@ def search_for_criteria(
         with unit_type_accum.no_accumulate:
             filters = {
                 "$or": [
-                    search_for_criteria(
+                    compile_search(
                         c, type_hint, unit_type_accum, accum_only=accum_only
                     ).filters
                     for c in criteria._operands
@@ -297,6 +391,79 @@ def search_for_criteria(
     )
 
 
+def is_multi_valued(field_name, type_hint):
+    # Returns True if field_name (a model or Pulp field name, possibly nested)
+    # may refer to a list on any model class of type_hint, in which case a
+    # single object could match several values of an IN match on the field.
+    if not type_hint:
+        return False
+
+    parts = field_name.split(".")
+    names = set(".".join(parts[: i + 1]) for i in range(0, len(parts)))
+
+    for klass in all_subclasses(type_hint):
+        if not attr.has(klass):
+            continue
+        for field in attr.fields(klass):
+            if field.type not in (list, frozenlist):
+                continue
+            if field.name in names or field.metadata.get(PULP2_FIELD) in names:
+                return True
+
+    return False
+
+
+def split_criteria(criteria, max_values, type_hint=None):
+    # Returns a list of criteria which together match the same objects as
+    # criteria, split such that IN matches have at most max_values values
+    # where possible. This allows a search with a huge IN match (e.g. on
+    # tens of thousands of checksums) to be done as several smaller searches.
+    #
+    # Only a single IN match can be split, and only if it's a top-level
+    # conjunct of criteria; otherwise, a single object could be matched by
+    # several of the resulting criteria. For the same reason, matches on
+    # fields which may hold lists are never split.
+    #
+    # If criteria doesn't need to be (or can't be) split, returns [criteria].
+    criteria = optimize_criteria(criteria)
+
+    operands = [criteria]
+    if isinstance(criteria, AndCriteria):
+        operands = list(criteria._operands)
+
+    # Values are deduplicated first, as a value repeated in two of the
+    # resulting criteria would match the same objects twice.
+    in_values = {}
+    for (idx, op) in enumerate(operands):
+        if (
+            type(op) is FieldMatchCriteria  # pylint: disable=unidiomatic-typecheck
+            and isinstance(op._matcher, InMatcher)
+            and len(op._matcher._values) > max_values
+            and not is_multi_valued(op._field, type_hint)
+        ):
+            values = unique(op._matcher._values)
+            if len(values) > max_values:
+                in_values[idx] = values
+    if not in_values:
+        return [criteria]
+
+    # Split whichever match is largest.
+    idx = max(in_values, key=lambda i: len(in_values[i]))
+    field = operands[idx]._field
+    values = in_values[idx]
+
+    out = []
+    for start in range(0, len(values), max_values):
+        operands[idx] = FieldMatchCriteria(
+            field, InMatcher(values[start : start + max_values])
+        )
+        if isinstance(criteria, AndCriteria):
+            out.append(AndCriteria(tuple(operands)))
+        else:
+            out.append(operands[idx])
+    return out
+
+
 def filters_for_criteria(criteria, type_hint=None):
     return search_for_criteria(criteria, type_hint).filters
 
@@ -0,0 +1,106 @@
+import codecs
+import json
+
+# Amount of bytes read from a response at once while streaming.
+CHUNK_SIZE = 1024 * 256
+
+WHITESPACE = " \t\n\r"
+
+
+def iter_response_text(response, chunk_size=CHUNK_SIZE):
+    # Yields the body of a streamed requests response as text, in chunks.
+    #
+    # As with requests' own decode_unicode, undecodable bytes are replaced
+    # rather than raising, and left for the JSON parser to deal with.
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+        errors="replace"
+    )
+    for chunk in response.iter_content(chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_json_array(chunks):
+    # Given an iterable of text chunks making up a JSON array, yields each
+    # element of the array as soon as it's been parsed.
+    #
+    # Only the element currently being parsed (and the remainder of the
+    # current chunk) is held in memory at any time, which makes this
+    # suitable for very large responses.
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more(min_size=0):
+        # Read more data into buf, discarding everything before pos.
+        # Returns False if there's no more data.
+        nonlocal buf, pos, eof
+        buf = buf[pos:]
+        pos = 0
+        start_len = len(buf)
+        for chunk in chunks:
+            buf += chunk
+            if len(buf) - start_len >= min_size:
+                return True
+        eof = True
+        return len(buf) > start_len
+
+    def skip_ws():
+        # Advance pos to the next non-whitespace character, reading
+        # more data as needed. Returns that character, or None at EOF.
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                return None
+
+    if skip_ws() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    expect_elem = True
+    if skip_ws() == "]":
+        return
+
+    while True:
+        char = skip_ws()
+        if char is None:
+            raise ValueError("Unexpected end of JSON array")
+
+        if not expect_elem:
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError("Expected ',' or ']' in JSON array, got %r" % char)
+            pos += 1
+            expect_elem = True
+            continue
+
+        try:
+            (elem, end) = decoder.raw_decode(buf, pos)
+            # Unless the element is followed by a delimiter, it may be
+            # incomplete (e.g. a number split across chunks).
+            complete = eof or (end < len(buf) and buf[end] in WHITESPACE + ",]")
+        except ValueError:
+            complete = False
+            if eof:
+                raise
+
+        if not complete:
+            # Need more data. Read at least as much again as we have of this
+            # element, so the cost of retrying the parse stays linear.
+            more(min_size=max(len(buf) - pos, 1))
+            continue
+
+        yield elem
+        pos = end
+        expect_elem = False
@@ -0,0 +1,51 @@
+from more_executors.futures import f_map, f_sequence
+
+from pubtools.pulplib._impl.criteria import Criteria
+from pubtools.pulplib._impl.page import search_results
+from pubtools.pulplib._impl.model.unit.base import unit_key, unit_key_fields
+
+# Max number of unit keys looked up by a single search. Keys which can't
+# be grouped into an in_ match each add a clause to the search, so large
+# lookups are done as several searches of this size, run concurrently.
+KEYS_PER_SEARCH = 500
+
+
+def units_by_key(search_content, units):
+    # Implementation of get_units_by_key, shared by real and fake clients.
+    #
+    # Returns a future resolved with a dict mapping (unit type, unit key)
+    # for each distinct input unit onto the found unit, or None.
+    keys_by_type = {}
+    for unit in units:
+        unit_type = type(unit)
+        if not unit_key_fields(unit_type):
+            raise TypeError("%s has no unit key" % unit_type.__name__)
+        keys_by_type.setdefault(unit_type, {})[unit_key(unit)] = unit
+
+    results_fs = []
+    for (unit_type, units_by_unit_key) in keys_by_type.items():
+        # Sorting keeps keys likely to be grouped by with_unit_keys (i.e.
+        # sharing all fields but one) within the same search.
+        keys = sorted(units_by_unit_key, key=repr)
+        for start in range(0, len(keys), KEYS_PER_SEARCH):
+            crit = Criteria.with_unit_keys(
+                [
+                    units_by_unit_key[key]
+                    for key in keys[start : start + KEYS_PER_SEARCH]
+                ]
+            )
+            results_fs.append(search_results(search_content(crit)))
+
+    def map_units(results):
+        out = {}
+        for (unit_type, units_by_unit_key) in keys_by_type.items():
+            for key in units_by_unit_key:
+                out[(unit_type, key)] = None
+        for result in results:
+            for found_unit in result:
+                key = (type(found_unit), unit_key(found_unit))
+                if key in out:
+                    out[key] = found_unit
+        return out
+
+    return f_map(f_sequence(results_fs), map_units)
@@ -0,0 +1,225 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+
+LOG = logging.getLogger("pubtools.pulplib")
+
+
+def file_identity(path):
+    # Returns the values identifying a particular version of a local file:
+    # if any of these change, an upload of the file can't be resumed.
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+class UploadState(object):
+    # State of a single resumable upload of a local file, persisted to disk
+    # so that the upload can be resumed by a later process.
+    #
+    # Keeps track of the Pulp upload ID and the offsets of all chunks which
+    # Pulp has confirmed receiving. Since chunks are uploaded concurrently,
+    # these are not necessarily contiguous.
+
+    def __init__(self, filename, data):
+        self._filename = filename
+        self._data = data
+        self._lock = threading.Lock()
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def upload_id(self):
+        return self._data["upload_id"]
+
+    @property
+    def chunk_size(self):
+        return self._data["chunk_size"]
+
+    def matches(self, path):
+        # True if this state was saved for the given file as it currently is.
+        try:
+            identity = file_identity(path)
+        except OSError:
+            return False
+        return all(self._data.get(key) == value for (key, value) in identity.items())
+
+    def confirmed(self, offset):
+        with self._lock:
+            return offset in self._data["confirmed"]
+
+    def confirm(self, offset):
+        # Record that the chunk at offset has been received by Pulp.
+        with self._lock:
+            if offset not in self._data["confirmed"]:
+                self._data["confirmed"].append(offset)
+                self.save()
+
+    def save(self):
+        # Write to a temporary file first, so that the state is never left
+        # half-written if the process dies.
+        tmp = self._filename + ".tmp"
+        with open(tmp, "wt") as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self._filename)
+
+
+class UploadStateStore(object):
+    # A directory holding the state of resumable uploads, one file per
+    # upload. Files are named after both the uploaded local file and the
+    # upload ID, so that the state of an upload can be found from either
+    # without reading any other state.
+    #
+    # Uploads in progress are tracked as active; an active upload is never
+    # offered for resuming, so that concurrent uploads of the same file (e.g.
+    # to different repos) each use their own upload. Since the directory may
+    # be shared by several processes, an active upload also holds an
+    # exclusive lock on a lock file next to its state.
+
+    def __init__(self, directory):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._active = {}
+        self._lock_fds = {}
+
+    def _prefix(self, path):
+        key = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return key + "-"
+
+    def _filename(self, path, upload_id):
+        return os.path.join(
+            self._directory, "%s%s.json" % (self._prefix(path), upload_id)
+        )
+
+    def _activate(self, state, lock_fd):
+        # Must be called with lock held.
+        self._active[state.upload_id] = state
+        self._lock_fds[state.upload_id] = lock_fd
+
+    def _deactivate(self, upload_id):
+        # Marks an upload as no longer active, returning its (state, lock_fd),
+        # or Nones if not active. The caller must unlock_file(lock_fd) once
+        # done with the state.
+        with self._lock:
+            return (
+                self._active.pop(upload_id, None),
+                self._lock_fds.pop(upload_id, None),
+            )
+
+    def claim(self, path):
+        # Returns previously saved state for the given file which is not in
+        # use by an active upload in this or any other process, marking it as
+        # active; or None.
+        # The returned state may be for an older version of the file; use
+        # matches() to check.
+        prefix = self._prefix(path)
+        with self._lock:
+            for name in sorted(os.listdir(self._directory)):
+                if not name.startswith(prefix) or not name.endswith(".json"):
+                    continue
+                filename = os.path.join(self._directory, name)
+                lock_fd = lock_file(filename)
+                if lock_fd is None:
+                    # Active upload, in this process or another.
+                    continue
+                # Only read the state once locked, as it may have been removed
+                # by whoever held the lock.
+                state = self._load_file(filename)
+                if not state:
+                    unlock_file(lock_fd)
+                    continue
+                self._activate(state, lock_fd)
+                return state
+        return None
+
+    def create(self, path, upload_id, chunk_size):
+        # Saves and returns state for a new upload of the given file, marking
+        # it as active.
+        data = file_identity(path)
+        data.update(upload_id=upload_id, chunk_size=chunk_size, confirmed=[])
+        out = UploadState(self._filename(path, upload_id), data)
+        lock_fd = lock_file(out.filename)
+        out.save()
+        with self._lock:
+            self._activate(out, lock_fd)
+        return out
+
+    def get(self, upload_id):
+        # Returns state of an active upload, or None.
+        with self._lock:
+            return self._active.get(upload_id)
+
+    def release(self, upload_id):
+        # Marks an upload as no longer active (e.g. because it failed),
+        # keeping its state so that it may be resumed later.
+        (_, lock_fd) = self._deactivate(upload_id)
+        unlock_file(lock_fd)
+
+    def remove(self, upload_id):
+        # Removes any state for the given upload ID, e.g. once the upload
+        # has been imported into a repository.
+        (state, lock_fd) = self._deactivate(upload_id)
+
+        if state:
+            filenames = [state.filename]
+        else:
+            suffix = "-%s.json" % upload_id
+            filenames = [
+                os.path.join(self._directory, name)
+                for name in os.listdir(self._directory)
+                if name.endswith(suffix)
+            ]
+
+        for filename in filenames:
+            LOG.debug("Removing upload state %s for %s", filename, upload_id)
+            for to_remove in (filename, filename + ".lock"):
+                try:
+                    os.remove(to_remove)
+                except FileNotFoundError:
+                    pass
+
+        # Only unlock once removed, so no other process can claim the state
+        # in the meantime.
+        unlock_file(lock_fd)
+
+    def close(self):
+        # Releases all active uploads.
+        with self._lock:
+            upload_ids = list(self._active)
+        for upload_id in upload_ids:
+            self.release(upload_id)
+
+    @staticmethod
+    def _load_file(filename):
+        try:
+            with open(filename, "rt") as f:
+                return UploadState(filename, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+
+def lock_file(filename):
+    # Takes an exclusive lock on the upload state at filename, returning the
+    # file descriptor holding the lock, or None if the lock is held elsewhere.
+    #
+    # The lock is taken on a separate lock file, as state files are replaced
+    # whenever saved.
+    fd = os.open(filename + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def unlock_file(fd):
+    # Releases a lock taken by lock_file, if any.
+    if fd is not None:
+        os.close(fd)
@@ -2,8 +2,6 @@
 
 from xml.parsers import expat
 
-from io import StringIO
-
 
 # All optional fields in the pulp-rpm comps.xml units
 COMMON_FIELDS = [
@@ -33,48 +31,17 @@ UNIT_FIELD_DEFAULTS = {
 }
 
 
-class BooleanStringIO(StringIO):
-    """A StringIO which coerces the output value into a boolean."""
-
-    def getvalue(self):
-        # Note: StringIO in python2 is an old-style class, so no super().
-        value = StringIO.getvalue(self).strip()
-        if value.lower() in ("false", ""):
-            return False
-        return True
-
-
-class IntegerStringIO(StringIO):
-    """A StringIO which coerces the output value into an integer."""
-
-    def getvalue(self):
-        value = StringIO.getvalue(self).strip()
-        if not value:
-            return None
-        return int(value)
-
-
-def close_buffers(value):
-    """Returns a copy of 'value' with all StringIO buffers replaced with the
-    content of each buffer.
-
-    This is used at the end of parsing, once we know that no more text data can
-    arrive, to seal the output and convert into a serializable form.
-    """
-
-    if isinstance(value, list):
-        return [close_buffers(elem) for elem in value]
-
-    if isinstance(value, dict):
-        out = {}
-        for (key, elem) in value.items():
-            out[key] = close_buffers(elem)
-        return out
+def boolean_value(value):
+    """Coerces the text of an element into a boolean."""
+    return value.strip().lower() not in ("false", "")
 
-    if isinstance(value, StringIO):
-        return value.getvalue()
 
-    return value
+def integer_value(value):
+    """Coerces the text of an element into an integer."""
+    value = value.strip()
+    if not value:
+        return None
+    return int(value)
 
 
 class CompsParser(object):
@@ -82,34 +49,79 @@ class CompsParser(object):
 
     This parser wraps xml.parsers.expat and installs handlers which are able to
     load XML elements into the form used by Pulp for the relevant unit types.
+
+    Input may be provided incrementally via feed(). Each unit is complete as
+    soon as its top-level element (e.g. <group>) has been closed.
     """
 
+    # Size of blocks read by parse().
+    READ_SIZE = 1024 * 256
+
     def __init__(self):
         self.raw_parser = expat.ParserCreate()
 
-        # Current parse state. The output is ultimately returned from 'units'.
-        self.units = []
-        self.current_buf = StringIO()
-        self.current_unit = {}
+        # Deliver the text of an element in as few calls as possible.
+        self.raw_parser.buffer_text = True
+
+        # Current parse state. Units are moved to 'ready' once complete.
+        self.ready = []
+        self.current_unit = None
         self.current_path = []
 
+        # When the text of an element is wanted, the handler for that element
+        # calls collect_text, which makes expat deliver character data into
+        # current_text. When the element ends, the joined text is stored at
+        # text_target[text_key]. Otherwise, expat discards character data.
+        self.current_text = None
+        self.text_target = None
+        self.text_key = None
+        self.text_convert = None
+
         # Bind ourselves to expat.
         for name in dir(self):
             if name.endswith("Handler"):
                 setattr(self.raw_parser, name, getattr(self, name))
 
+    def feed(self, data, final=False):
+        """Parse some more comps XML, provided as bytes.
+
+        final must be True on the last call, which may have empty data.
+
+        Returns a list of any units completed by this data, in Pulp form (i.e.
+        dicts with each dict having the Pulp-specific attributes such as
+        _content_type_id, ...)
+        """
+        self.raw_parser.Parse(data, final)
+        out = self.ready
+        self.ready = []
+        return out
+
     def parse(self, io):
         """Parse comps XML from io, a file-like object in binary mode.
 
-        Returns parsed units in Pulp form (i.e. a list of dicts with each dict
-        having the Pulp-specific attributes such as _content_type_id, ...)
+        Yields parsed units in Pulp form as they are completed.
         """
-        self.units = []
-        self.current_unit = {}
-        self.current_path = []
-        self.raw_parser.ParseFile(io)
-        self.units = close_buffers(self.units)
-        return self.units
+        while True:
+            data = io.read(self.READ_SIZE)
+            for unit in self.feed(data, final=not data):
+                yield unit
+            if not data:
+                return
+
+    def collect_text(self, target, key, convert=None):
+        # Arrange for the text of the current element to be stored at
+        # target[key] when the element ends, optionally converted.
+        target[key] = None
+        self.current_text = []
+        self.text_target = target
+        self.text_key = key
+        self.text_convert = convert
+        self.raw_parser.CharacterDataHandler = self.current_text.append
+
+    def collect_list_text(self, target, convert=None):
+        # Like collect_text, but appends the text to the list target.
+        target.append(None)
+        self.collect_text(target, len(target) - 1, convert)
 
     ########################## Shared handlers #########################
     # Handle some basic tags shared by multiple types such as:
@@ -128,21 +140,18 @@ class CompsParser(object):
             # Is parsed into: translated_name["af"] = "3D-drukwerk"
             tag = "translated_" + tag
             lang = attrs["xml:lang"]
-            self.current_buf = StringIO()
-            self.current_unit.setdefault(tag, {})[lang] = self.current_buf
+            self.collect_text(self.current_unit.setdefault(tag, {}), lang)
             return True
 
         elif tag in ("id", "name", "description"):
-            self.current_buf = StringIO()
-            self.current_unit[tag] = self.current_buf
+            self.collect_text(self.current_unit, tag)
             return True
 
         return False
 
     def handle_display_order_tag(self, tag):
         if tag == "display_order":
-            self.current_buf = IntegerStringIO()
-            self.current_unit[tag] = self.current_buf
+            self.collect_text(self.current_unit, tag, integer_value)
             return True
         return False
 
@@ -168,31 +177,30 @@ class CompsParser(object):
 
     def start_group_elem(self):
         self.current_unit = {"_content_type_id": "package_group"}
-        self.units.append(self.current_unit)
 
     def handle_group_tag(self, tag, attrs):
         if self.handle_text_elem(tag, attrs):
             return
 
         elif tag in ("default", "uservisible"):
-            self.current_buf = BooleanStringIO()
             if tag == "uservisible":
                 tag = "user_visible"
-            self.current_unit[tag] = self.current_buf
+            self.collect_text(self.current_unit, tag, boolean_value)
 
     def handle_group_packagelist(self, attrs):
         package_type = attrs.get("type") or "mandatory"
         key = package_type + "_package_names"
-        self.current_buf = StringIO()
         target = self.current_unit.setdefault(key, [])
 
         if package_type == "conditional":
             # "conditional" type is special, a requires attrib is included, and Pulp
             # stores a (pkgname, requires) tuple.
-            target.append([self.current_buf, attrs.get("requires")])
+            pair = [None, attrs.get("requires")]
+            target.append(pair)
+            self.collect_text(pair, 0)
         else:
             # Anything else just stores the package name.
-            target.append(self.current_buf)
+            self.collect_list_text(target)
 
     def handle_group_elem(self, path, attrs):
         if path == []:
@@ -228,7 +236,6 @@ class CompsParser(object):
 
     def start_environment_elem(self):
         self.current_unit = {"_content_type_id": "package_environment"}
-        self.units.append(self.current_unit)
 
     def handle_environment_tag(self, tag, attrs):
         if self.handle_text_elem(tag, attrs):
@@ -237,17 +244,15 @@ class CompsParser(object):
         self.handle_display_order_tag(tag)
 
     def handle_environment_grouplist(self):
-        self.current_buf = StringIO()
-        self.current_unit.setdefault("group_ids", []).append(self.current_buf)
+        self.collect_list_text(self.current_unit.setdefault("group_ids", []))
 
     def handle_environment_optionlist(self, attrs):
-        self.current_buf = StringIO()
-
-        option = {"group": self.current_buf}
+        option = {"group": None}
 
         option["default"] = (attrs.get("default") or "").lower() == "true"
 
         self.current_unit.setdefault("options", []).append(option)
+        self.collect_text(option, "group")
 
     def handle_environment_elem(self, path, attrs):
         if path == []:
@@ -281,7 +286,6 @@ class CompsParser(object):
 
     def start_category_elem(self):
         self.current_unit = {"_content_type_id": "package_category"}
-        self.units.append(self.current_unit)
 
     def handle_category_tag(self, tag, attrs):
         if self.handle_text_elem(tag, attrs):
@@ -290,8 +294,7 @@ class CompsParser(object):
         self.handle_display_order_tag(tag)
 
     def handle_category_grouplist(self):
-        self.current_buf = StringIO()
-        self.current_unit.setdefault("packagegroupids", []).append(self.current_buf)
+        self.collect_list_text(self.current_unit.setdefault("packagegroupids", []))
 
     def handle_category_elem(self, path, attrs):
         if path == []:
@@ -312,7 +315,6 @@ class CompsParser(object):
 
     def start_langpacks_elem(self):
         self.current_unit = {"_content_type_id": "package_langpacks"}
-        self.units.append(self.current_unit)
 
     def handle_langpacks_match(self, attrs):
         self.current_unit.setdefault("matches", []).append(
@@ -336,29 +338,44 @@ class CompsParser(object):
     # once the type is known.
 
     def StartElementHandler(self, name, attrs):
-        self.current_path.append(name)
+        path = self.current_path
+        path.append(name)
 
-        prefix = self.current_path[:2]
-        rest = self.current_path[2:]
+        if len(path) < 2 or path[0] != "comps":
+            return
+
+        rest = path[2:]
+        kind = path[1]
 
-        if prefix == ["comps", "group"]:
+        if kind == "group":
             return self.handle_group_elem(rest, attrs)
 
-        if prefix == ["comps", "category"]:
+        if kind == "category":
             return self.handle_category_elem(rest, attrs)
 
-        if prefix == ["comps", "environment"]:
+        if kind == "environment":
             return self.handle_environment_elem(rest, attrs)
 
-        if prefix == ["comps", "langpacks"]:
+        if kind == "langpacks":
             return self.handle_langpacks_elem(rest, attrs)
 
-    def CharacterDataHandler(self, data):
-        self.current_buf.write(data)
-
     def EndElementHandler(self, _name):
-        self.current_path = self.current_path[:-1]
-        self.current_buf = StringIO()
+        if self.current_text is not None:
+            value = "".join(self.current_text)
+            if self.text_convert:
+                value = self.text_convert(value)
+            self.text_target[self.text_key] = value
+
+            self.raw_parser.CharacterDataHandler = None
+            self.current_text = None
+            self.text_target = None
+
+        self.current_path.pop()
+
+        if len(self.current_path) == 1 and self.current_unit is not None:
+            # A top-level element has ended, so this unit is complete.
+            self.ready.append(fill_unit_field_defaults([self.current_unit])[0])
+            self.current_unit = None
 
 
 def units_for_xml(io):
@@ -380,11 +397,17 @@ def units_for_xml(io):
             Returned units omit the 'repo_id' attribute, which must be filled in if
             units will be uploaded to a specific repo.
 
-    Note: this is the only function in this module intended to be used from other
-    modules.
+    Note: this function, iter_units_for_xml, unit_key and units_equal are the
+    only functions in this module intended to be used from other modules.
     """
-    parser = CompsParser()
-    return fill_unit_field_defaults(parser.parse(io))
+    return list(iter_units_for_xml(io))
+
+
+def iter_units_for_xml(io):
+    """Like units_for_xml, but yields each unit as soon as it has been parsed,
+    rather than returning all units once the whole document has been parsed.
+    """
+    return CompsParser().parse(io)
 
 
 def fill_unit_field_defaults(units):
@@ -402,3 +425,34 @@ def fill_unit_field_defaults(units):
             unit[field] = unit.get(field, defaults.get(field))
 
     return units
+
+
+def unit_key(unit):
+    """Returns a value identifying a comps unit within a repo.
+
+    Arguments:
+        unit (dict)
+            Metadata of a comps unit, as returned by units_for_xml or as stored
+            in Pulp.
+
+    Returns:
+        tuple
+            A value which is equal for two units only if Pulp would consider them
+            to be the same unit when both are in the same repo.
+    """
+    # package_langpacks have no id: there's at most one per repo.
+    return (unit["_content_type_id"], unit.get("id"))
+
+
+def units_equal(unit1, unit2):
+    """Returns True if two comps units have identical content.
+
+    Only the fields which can be set from comps.xml are compared, so e.g.
+    fields added by Pulp to stored units are ignored.
+    """
+    type_id = unit1["_content_type_id"]
+    if type_id != unit2["_content_type_id"]:
+        return False
+
+    fields = ["id", "repo_id"] + UNIT_FIELD_DEFAULTS[type_id][1]
+    return all(unit1.get(field) == unit2.get(field) for field in fields)
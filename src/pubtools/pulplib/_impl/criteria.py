@@ -9,6 +9,7 @@ from frozenlist2 import frozenlist
 from pubtools.pulplib._impl import compat_attr as attr
 
 from .model.unit import type_ids_for_class
+from .model.unit.base import unit_key, unit_key_fields
 from .model.attr import PULP2_FIELD
 
 
@@ -168,6 +169,79 @@ class Criteria(object):
             "content_type_id", Matcher.in_(type_ids), unit_fields
         )
 
+    @classmethod
+    def with_unit_keys(cls, units):
+        """Args:
+            units (Iterable[:class:`~pubtools.pulplib.Unit`])
+                Units of a single type, with (at least) the fields making up
+                the unit key for that type populated.
+
+                The unit key consists of those fields uniquely identifying a
+                unit in Pulp, such as ``path``, ``size`` and ``sha256sum``
+                for :class:`~pubtools.pulplib.FileUnit`, or ``id`` for
+                :class:`~pubtools.pulplib.ErratumUnit`.
+
+        Returns:
+            Criteria
+                criteria for finding units having the same unit key as any
+                of the input ``units``.
+
+                Rather than matching each unit individually, keys are grouped
+                into a few ``in_`` matches where possible, which are far
+                more efficient for Pulp to evaluate.
+
+        Raises:
+            ValueError
+                If ``units`` is empty or holds units of more than one type.
+
+        .. seealso::
+            :meth:`~pubtools.pulplib.Client.get_units_by_key`
+
+        .. versionadded:: 2.42.0
+        """
+        units = list(units)
+        unit_types = set(type(unit) for unit in units)
+        if len(unit_types) != 1:
+            raise ValueError(
+                "Expected units of exactly one type, got: %s"
+                % ", ".join(sorted(t.__name__ for t in unit_types))
+            )
+
+        unit_type = unit_types.pop()
+        fields = unit_key_fields(unit_type)
+        if not fields:
+            raise TypeError("%s has no unit key" % unit_type.__name__)
+
+        keys = sorted(set(unit_key(unit) for unit in units), key=repr)
+
+        # Keys are grouped by all fields but one, that one being whichever
+        # field has the most distinct values (e.g. a checksum); within each
+        # group, the remaining field is then matched via a single in_.
+        in_idx = most_distinct_index(keys)
+
+        groups = {}
+        for key in keys:
+            group_key = key[:in_idx] + key[in_idx + 1 :]
+            groups.setdefault(group_key, []).append(key[in_idx])
+
+        key_crit = []
+        for (group_key, values) in groups.items():
+            group_crit = [
+                cls.with_field(name, value)
+                for (name, value) in zip(
+                    fields[:in_idx] + fields[in_idx + 1 :], group_key
+                )
+            ]
+            group_crit.append(
+                cls.with_field(
+                    fields[in_idx],
+                    values[0] if len(values) == 1 else Matcher.in_(values),
+                )
+            )
+            key_crit.append(cls.and_(*group_crit))
+
+        return cls.and_(cls.with_unit_type(unit_type), cls.or_(*key_crit))
+
     @classmethod
     def with_field_in(cls, field_name, field_value):
         warnings.warn(
@@ -398,6 +472,13 @@ class LessThanMatcher(Matcher):
         return "<%s" % repr(self._value)
 
 
+def most_distinct_index(keys):
+    # Given some tuples of equal length (e.g. unit keys), returns the index
+    # of the element having the most distinct values across all tuples.
+    distinct = [len(set(elems)) for elems in zip(*keys)]
+    return distinct.index(max(distinct))
+
+
 def coerce_to_matcher(value):
     if isinstance(value, Matcher):
         return value
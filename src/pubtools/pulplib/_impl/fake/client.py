@@ -20,9 +20,12 @@ from pubtools.pulplib import (
     RpmUnit,
     MaintenanceReport,
     CopyOptions,
+    UnitTable,
 )
-from pubtools.pulplib._impl.client.client import UploadResult
+from pubtools.pulplib._impl.client.client import UploadResult, checksum_file
 from pubtools.pulplib._impl.client.search import search_for_criteria
+from pubtools.pulplib._impl.client.optimize import optimize_criteria
+from pubtools.pulplib._impl.client.unit_keys import units_by_key
 from .. import compat_attr as attr
 
 from .match import match_object
@@ -43,6 +46,8 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
     # written against pubtools.pulplib.Client should be able to work with
     # an instance of this class swapped in.
     _PAGE_SIZE = 3
+    _UPLOAD_BATCH_ITEMS = 4
+    _UPLOAD_BATCH_BYTES = 1024 * 1024
 
     def __init__(self, state):
         self._state = state
@@ -73,6 +78,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         # same validation and error behavior as used by the real client also
         # applies to the fake.
         search_for_criteria(criteria, Repository)
+        criteria = optimize_criteria(criteria)
 
         try:
             for repo in self._state.repositories[:]:
@@ -86,7 +92,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         random.shuffle(repos)
         return self._prepare_pages(repos)
 
-    def search_content(self, criteria=None):
+    def search_content(self, criteria=None, as_table=False):
         self._ensure_alive()
 
         criteria = criteria or Criteria.true()
@@ -98,6 +104,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         # same validation and error behavior as used by the real client also
         # applies to the fake.
         prepared_search = search_for_criteria(criteria, Unit)
+        criteria = optimize_criteria(criteria)
 
         available_type_ids = set(self._state.type_ids)
         missing_type_ids = set(prepared_search.type_ids or []) - available_type_ids
@@ -122,8 +129,15 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         # callers should not make any assumption about the order of returned
         # values. Encourage that by returning output in unpredictable order
         random.shuffle(out)
+
+        if as_table:
+            return f_proxy(f_return(UnitTable.from_units(out)))
+
         return self._prepare_pages(out)
 
+    def get_units_by_key(self, units):
+        return f_proxy(units_by_key(self.search_content, units))
+
     def copy_content(
         self, from_repository, to_repository, criteria=None, options=CopyOptions()
     ):
@@ -248,6 +262,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         distributors = []
 
         search_for_criteria(criteria, Distributor)
+        criteria = optimize_criteria(criteria)
 
         try:
             for repo in self._state.repositories[:]:
@@ -266,6 +281,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
 
         criteria = criteria or Criteria.true()
         search_for_criteria(criteria)
+        criteria = optimize_criteria(criteria)
 
         try:
             for task in self._state.tasks[:]:
@@ -277,13 +293,19 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
         random.shuffle(tasks)
         return self._prepare_pages(tasks)
 
-    def _search_repo_units(self, repo_id, criteria):
+    def _search_repo_units(
+        self, repo_id, criteria, object_class=None
+    ):  # pylint: disable=unused-argument
+        # Note: the fake stores units only as model objects, so object_class
+        # is ignored. It's only used by the real client to load raw data of
+        # comps units, which the fake doesn't store at all.
         criteria = criteria or Criteria.true()
 
         # Pass the criteria through the same handling as used by the real client
         # for serialization, to ensure we reject criteria also rejected by real client
         # and also accumulate unit_fields.
         prepared_search = search_for_criteria(criteria, Unit)
+        criteria = optimize_criteria(criteria)
 
         repo_f = self.get_repository(repo_id)
         if repo_f.exception():
@@ -372,8 +394,11 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
 
         return f_proxy(f_return(self._state.type_ids))
 
+    def _do_checksum(self, file_obj):
+        return f_return(checksum_file(file_obj, 1024 * 1024))
+
     def _do_upload_file(
-        self, upload_id, file_obj, name="<unknown file>"
+        self, upload_id, file_obj, name="<unknown file>", weight=1
     ):  # pylint: disable=unused-argument
         # We keep track of uploaded content as we may need it at import time.
         buffer = BytesIO()
@@ -494,7 +519,7 @@ class FakeClient(object):  # pylint:disable = too-many-instance-attributes
                     RepoLockRecord(repo_id, "multi-unlock")
                 )
 
-    def _request_upload(self, name):  # pylint: disable=unused-argument
+    def _request_upload(self, name, file_obj=None):  # pylint: disable=unused-argument
         # Note: old versions had a bug where this function would always
         # consume *two* request IDs. We keep that side-effect so that test
         # data produced with that bug remains stable.
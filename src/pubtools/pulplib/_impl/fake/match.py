@@ -123,6 +123,10 @@ def match_field_exists(_matcher, field, obj):
 @visit(InMatcher)
 def match_in(matcher, field, obj):
     value = get_field(field, obj)
+    # As with $eq, matching against a list field will match if any element
+    # of the list is one of the given values.
+    if isinstance(value, list) and any(elem in value for elem in matcher._values):
+        return True
     for elem in matcher._values:
         if elem == value:
             return True
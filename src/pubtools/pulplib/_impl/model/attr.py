@@ -1,5 +1,7 @@
 from pubtools.pulplib._impl import compat_attr as attr
 
+from .lazy import PULP2_LAZY, LazyConverter
+
 
 # attr metadata private key for mapping between PulpObject attr and the corresponding
 # field in Pulp (if it exists)
@@ -22,6 +24,11 @@ PULP2_PY_CONVERTER = "_pubtools.pulplib.pulp2_to_py_converter"
 # Inverse of the above: converter for Python value into Pulp2 value.
 PY_PULP2_CONVERTER = "_pubtools.pulplib.py_to_pulp2_converter"
 
+# attr metadata private key indicating that a field typically has the same values
+# across many objects (e.g. arch), so its values should be shared between objects
+# loaded from the same Pulp search.
+PULP2_INTERN = "_pubtools.pulplib.pulp2_intern"
+
 
 def pulp_attrib(
     pulp_field=None,
@@ -29,12 +36,15 @@ def pulp_attrib(
     py_pulp_converter=None,
     mutable=False,
     unit_key=None,
+    lazy=False,
+    intern=False,
     **kwargs
 ):
     """Drop-in replacement for attr.ib with added features:
 
     - applies a validator based on type automatically
     - supports pulplib-specific metadata via extra keyword arguments
+    - supports lazy loading of the field from Pulp data (see lazy.py)
     """
     metadata = kwargs.get("metadata") or {}
 
@@ -53,6 +63,9 @@ def pulp_attrib(
     if mutable:
         metadata[PULP2_MUTABLE] = True
 
+    if intern:
+        metadata[PULP2_INTERN] = True
+
     if "type" in kwargs:
         if kwargs["type"] is str:
             kwargs["type"] = str
@@ -64,5 +77,11 @@ def pulp_attrib(
                 attr.validators.instance_of(kwargs["type"])
             )
 
+    if lazy:
+        metadata[PULP2_LAZY] = True
+        kwargs["converter"] = LazyConverter(
+            kwargs.get("converter"), kwargs.pop("validator", None)
+        )
+
     kwargs["metadata"] = metadata
     return attr.ib(**kwargs)
@@ -1,15 +1,22 @@
 import logging
 import datetime
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
 
 import jsonschema
 
+from frozenlist2 import frozenlist
+
 from more_executors.futures import f_map, f_proxy
 
 from pubtools.pulplib._impl import compat_attr as attr
-from pubtools.pulplib._impl.util import lookup, dict_put
+from pubtools.pulplib._impl.util import dict_put, ABSENT
 
-from .attr import PULP2_FIELD, PY_PULP2_CONVERTER
-from .convert import get_converter
+from .attr import PULP2_FIELD, PULP2_INTERN, PY_PULP2_CONVERTER
+from .lazy import PULP2_LAZY, LazyValue
+from .convert import get_converter, null_convert
 
 LOG = logging.getLogger("pubtools.pulplib")
 
@@ -24,6 +31,150 @@ class InvalidDataException(Exception):
     """Raised if raw Pulp data appears to be invalid (i.e. not matching expected schema)."""
 
 
+# Compiled jsonschema validators, per model class.
+_VALIDATORS = {}
+
+# Decode plans, per model class; see decode_plan.
+_DECODE_PLANS = {}
+
+# Per-thread state used by from_data: schema validation policy (see validating)
+# and intern pool (see interning).
+_LOADING = threading.local()
+
+VALIDATION_MODES = ("full", "sampled", "off")
+
+
+def validation_policy(mode, sample_rate):
+    # Returns a callable which decides, for each object loaded via from_data,
+    # whether its data should be validated against the schema.
+    #
+    # - full: validate everything
+    # - sampled: validate 1 in every sample_rate objects
+    # - off: validate nothing
+    if mode == "full":
+        return lambda: True
+    if mode == "off":
+        return lambda: False
+    if mode == "sampled":
+        counter = itertools.count()
+        sample_rate = max(sample_rate, 1)
+        return lambda: next(counter) % sample_rate == 0
+    raise ValueError(
+        "Invalid validation mode %r (expected one of: %s)"
+        % (mode, ", ".join(VALIDATION_MODES))
+    )
+
+
+@contextmanager
+def validating(policy):
+    # Context manager applying a policy (as returned by validation_policy)
+    # to all from_data calls made from the current thread.
+    old_policy = getattr(_LOADING, "policy", None)
+    _LOADING.policy = policy
+    try:
+        yield
+    finally:
+        _LOADING.policy = old_policy
+
+
+class InternPool(object):
+    # A pool of values to be shared between objects, for fields with PULP2_INTERN.
+    #
+    # When loading many objects from Pulp, fields such as arch or
+    # repository_memberships have the same few values over and over, yet each
+    # value is a separate object as decoded from JSON. Interning those values
+    # in a pool scoped to a single search can save a lot of memory, without
+    # keeping values alive forever as with sys.intern.
+
+    def __init__(self):
+        self._values = {}
+
+    def intern(self, value, converter=None):
+        # Returns a value equal to value (after applying converter, if any),
+        # shared with any other equal value interned in this pool.
+        if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+            return self._values.setdefault(value, value)
+
+        if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+            out = frozenlist([self.intern(elem) for elem in value])
+            if converter:
+                out = converter(out)
+            return self._values.setdefault(out, out)
+
+        return value
+
+
+@contextmanager
+def interning(pool):
+    # Context manager applying an InternPool to all from_data calls made from
+    # the current thread.
+    old_pool = getattr(_LOADING, "pool", None)
+    _LOADING.pool = pool
+    try:
+        yield
+    finally:
+        _LOADING.pool = old_pool
+
+
+def schema_validator(cls):
+    # Returns a compiled jsonschema validator for cls._SCHEMA.
+    #
+    # jsonschema.validate would re-check the schema itself and construct a new
+    # validator on every call, which is far more expensive than the validation
+    # of a typical object.
+    validator = _VALIDATORS.get(cls)
+    if validator is None:
+        validator_class = jsonschema.validators.validator_for(cls._SCHEMA)
+        validator_class.check_schema(cls._SCHEMA)
+        validator = validator_class(cls._SCHEMA)
+        _VALIDATORS[cls] = validator
+    return validator
+
+
+def decode_plan(cls):
+    # Returns the plan used by _data_to_init_args to load Pulp data into
+    # instances of cls: a list of (field name, key, subkeys, converter, intern)
+    # for every field mapped to Pulp, where:
+    #
+    # - key and subkeys are the first and remaining elements of the
+    #   (dot-separated) PULP2_FIELD
+    # - converter is None if values are used as-is
+    # - intern is None unless values should be interned (see PULP2_INTERN)
+    #
+    # Plans are computed once per class, as the reflection involved would
+    # otherwise be repeated for every loaded object.
+    plan = _DECODE_PLANS.get(cls)
+    if plan is None:
+        plan = []
+        for field in attr.fields(cls):
+            pulp_field = field.metadata.get(PULP2_FIELD)
+            if pulp_field:
+                converter = get_converter(field)
+                if field.metadata.get(PULP2_LAZY):
+                    converter = functools.partial(lazy_convert, field, converter)
+                elif converter is null_convert:
+                    converter = None
+                intern = None
+                if field.metadata.get(PULP2_INTERN):
+                    intern = functools.partial(intern_value, field.converter)
+                keys = pulp_field.split(".")
+                plan.append((field.name, keys[0], tuple(keys[1:]), converter, intern))
+        _DECODE_PLANS[cls] = plan
+    return plan
+
+
+def intern_value(converter, pool, value):
+    return pool.intern(value, converter)
+
+
+def lazy_convert(field, converter, value):
+    # Converter for lazy fields: defers conversion of non-empty lists,
+    # which are the only values worth deferring.
+    if isinstance(value, list) and value:
+        return LazyValue(field, value, converter)
+    return converter(value)
+
+
 class PulpObject(object):
     """Base class for all modeled Pulp objects.
 
@@ -84,12 +235,16 @@ class PulpObject(object):
                 repo = Repository.from_data(data)
         """
 
-        try:
-            jsonschema.validate(instance=data, schema=cls._SCHEMA)
-
-            kwargs = cls._data_to_init_args(data)
-            return cls(**kwargs)
+        with cls._loading(data):
+            return cls(**cls._load_init_args(data))
 
+    @classmethod
+    @contextmanager
+    def _loading(cls, data):
+        # Context for loading data into an instance of this class; wraps any
+        # errors in InvalidDataException.
+        try:
+            yield
         except Exception as error:  # pylint:disable=broad-except
             LOG.exception(
                 (
@@ -104,6 +259,24 @@ class PulpObject(object):
             msg = "%s.from_data invoked with invalid Pulp data", cls.__name__
             raise InvalidDataException(msg) from error
 
+    @classmethod
+    def _load_init_args(cls, data):
+        # Validates data according to the current policy and maps it to
+        # kwargs for a new object of this class.
+        policy = getattr(_LOADING, "policy", None)
+        if policy is None or policy():
+            cls._validate_data(data)
+
+        return cls._data_to_init_args(data)
+
+    @classmethod
+    def _validate_data(cls, data):
+        # Raises if data does not match the schema for this class.
+        validator = schema_validator(cls)
+        if not validator.is_valid(data):
+            # Same error as would be raised by jsonschema.validate.
+            raise jsonschema.exceptions.best_match(validator.iter_errors(data))
+
     def _to_data(self):
         """Inverse of from_data: serialize a model object back to native Pulp form.
 
@@ -169,17 +342,22 @@ class PulpObject(object):
         # (PULP2_FIELD).  If this is not sufficient, subclasses can override
         # this, and can also call super() to reuse this as needed.
         out = {}
-        fields = attr.fields(cls)
-        absent = object()
-
-        for field in fields:
-            pulp_field = field.metadata.get(PULP2_FIELD)
-            if pulp_field:
-                value = lookup(data, pulp_field, absent)
-                if value is not absent:
-                    converter = get_converter(field, value)
+        pool = getattr(_LOADING, "pool", None)
+
+        for (name, key, subkeys, converter, intern) in decode_plan(cls):
+            value = data.get(key, ABSENT)
+            for subkey in subkeys:
+                if not value or not isinstance(value, dict):
+                    value = ABSENT
+                    break
+                value = value.get(subkey, ABSENT)
+
+            if value is not ABSENT:
+                if converter:
                     value = converter(value)
-                    out[field.name] = value
+                if intern and pool:
+                    value = intern(pool, value)
+                out[name] = value
 
         return out
 
@@ -236,12 +414,17 @@ class Deletable(WithClient):
         return f_proxy(delete_f)
 
 
+@functools.lru_cache(maxsize=None)
+def field_names(cls):
+    return tuple(fld.name for fld in attr.fields(cls))
+
+
 def schemaless_init(cls, data):
     # Construct and return an instance of (attrs-using) cls from
     # pulp data, where data in pulp has no schema at all (and hence
     # every field could possibly be missing).
     kwargs = {}
-    for key in [fld.name for fld in attr.fields(cls)]:
+    for key in field_names(cls):
         if key in data:
             kwargs[key] = data[key]
 
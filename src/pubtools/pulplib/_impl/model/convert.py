@@ -1,5 +1,4 @@
 import datetime
-import functools
 
 from frozenlist2 import frozenlist
 from frozendict.core import frozendict  # pylint: disable=no-name-in-module
@@ -7,10 +6,9 @@ from frozendict.core import frozendict  # pylint: disable=no-name-in-module
 from .attr import PULP2_PY_CONVERTER
 
 
-def get_converter(field, value):
-    """Given an attrs target field and an input value from Pulp,
-    return a converter function which should be used to convert the Pulp value
-    into a Python representation."""
+def get_converter(field):
+    """Given an attrs target field, return a converter function which should be
+    used to convert Pulp values for that field into a Python representation."""
 
     metadata_converter = field.metadata.get(PULP2_PY_CONVERTER)
     if metadata_converter:
@@ -19,8 +17,8 @@ def get_converter(field, value):
 
     # Nothing explicitly defined, but check the types, there may still be
     # some applicable default
-    if field.type is datetime.datetime and isinstance(value, str):
-        return read_timestamp
+    if field.type is datetime.datetime:
+        return read_timestamp_if_str
 
     return null_convert
 
@@ -39,6 +37,12 @@ def read_timestamp(value):
         return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
 
 
+def read_timestamp_if_str(value):
+    if isinstance(value, str):
+        return read_timestamp(value)
+    return value
+
+
 def tolerant_timestamp(value):
     # Converter for fields which can accept a timestamp string, but which
     # falls back to returning the input verbatim if conversion fails.
@@ -79,9 +83,12 @@ def frozenlist_or_none_converter(obj, map_fn=(lambda x: x)):
     return None
 
 
-frozenlist_or_none_sorted_converter = functools.partial(
-    frozenlist_or_none_converter, map_fn=lambda x: sorted(set(x))
-)
+def frozenlist_or_none_sorted_converter(obj):
+    if isinstance(obj, frozenlist) and all(a < b for (a, b) in zip(obj, obj[1:])):
+        # Already sorted and unique, no need to copy. This allows a single
+        # list to be shared between objects (see PULP2_INTERN).
+        return obj
+    return frozenlist_or_none_converter(obj, map_fn=lambda x: sorted(set(x)))
 
 
 def frozendict_or_none_converter(obj):
@@ -0,0 +1,81 @@
+# attr metadata private key indicating whether a field is loaded lazily from Pulp
+# data, i.e. converted to its Python representation only on first access.
+#
+# This is useful for fields which are expensive to load and rarely used, such as
+# the file lists of RPMs. Classes with lazy fields must be decorated with
+# with_lazy_fields.
+PULP2_LAZY = "_pubtools.pulplib.pulp2_lazy"
+
+
+class LazyValue(object):
+    # Placeholder stored in a lazy field for a value which has not yet been
+    # converted from Pulp data.
+    __slots__ = ["field", "raw", "pulp_py_converter"]
+
+    def __init__(self, field, raw, pulp_py_converter):
+        self.field = field
+        self.raw = raw
+        self.pulp_py_converter = pulp_py_converter
+
+    def resolve(self):
+        # Returns the value which would have been stored in the field
+        # had it been loaded eagerly.
+        return self.field.converter(self.pulp_py_converter(self.raw))
+
+
+class LazyConverter(object):
+    # attrs converter for lazy fields.
+    #
+    # Validators for lazy fields can't be run by attrs, since attrs passes them
+    # the current value of the attribute, which would force a LazyValue to be
+    # resolved. Instead, values are validated here, after conversion, and
+    # LazyValue is passed through to be converted and validated once resolved.
+    def __init__(self, converter, validator):
+        self.converter = converter
+        self.validator = validator
+
+        # Set by with_lazy_fields.
+        self.field = None
+
+    def __call__(self, value):
+        if isinstance(value, LazyValue):
+            return value
+        if self.converter:
+            value = self.converter(value)
+        if self.validator:
+            self.validator(None, self.field, value)
+        return value
+
+
+class LazyAttribute(object):
+    # Descriptor wrapping the slot of a lazy field, resolving any LazyValue
+    # held in the slot on first access.
+    #
+    # There's no __delete__, as classes with lazy fields are frozen.
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, inst, owner):
+        if inst is None:
+            return self
+        value = self.slot.__get__(inst, owner)
+        if isinstance(value, LazyValue):
+            value = value.resolve()
+            self.slot.__set__(inst, value)
+        return value
+
+    def __set__(self, inst, value):
+        self.slot.__set__(inst, value)
+
+
+def with_lazy_fields(klass):
+    # Class decorator for attrs classes having lazy fields, installing
+    # the descriptors needed to resolve those fields on access.
+    # Must be applied to the class produced by attr.s.
+    for field in klass.__attrs_attrs__:
+        if field.metadata.get(PULP2_LAZY):
+            field.converter.field = field
+            slot = klass.__dict__[field.name]
+            setattr(klass, field.name, LazyAttribute(slot))
+
+    return klass
@@ -7,14 +7,16 @@ from functools import partial
 from attr import validators, asdict, converters
 
 from frozenlist2 import frozenlist
-from more_executors.futures import f_proxy, f_map, f_flat_map
+from more_executors.futures import f_proxy, f_map, f_flat_map, f_return
 
 from frozendict.core import frozendict  # pylint: disable=no-name-in-module
 from .repo_lock import RepoLock
+from .upload_batch import UploadBatch
 from ..attr import pulp_attrib, PULP2_FIELD, PULP2_MUTABLE
 from ..common import PulpObject, Deletable, DetachedException
 from ..convert import frozenlist_or_none_converter, frozendict_or_none_converter
 from ..distributor import Distributor
+from ...client.copy import CopyOptions
 from ...criteria import Criteria, Matcher
 from ...schema import load_schema
 from ... import compat_attr as attr
@@ -812,8 +814,123 @@ class Repository(PulpObject, Deletable):
         for distributor in self.distributors or []:
             distributor._set_client(client)
 
+    def _upload_batch(self, items, upload_fn):
+        """Private helper to upload many pieces of content into this repo,
+        as a single batch.
+
+        Args:
+            items (list):
+                a list of (file_obj, item) tuples, where file_obj is a file
+                object or path (as documented in public methods) and item is
+                anything to be passed to upload_fn.
+
+            upload_fn (callable):
+                a callable which will be invoked with each item to upload it.
+                It should return a future, as returned by public upload methods.
+
+        Returns:
+            Future[list]
+                A future resolved once all items are done, with a list holding
+                the outcome of each item, in the same order as items: either
+                the result of the item's future, or the exception it raised.
+        """
+        if not self._client:
+            raise DetachedException()
+
+        batch = UploadBatch(
+            self.id,
+            items,
+            upload_fn,
+            self._client._UPLOAD_BATCH_ITEMS,
+            self._client._UPLOAD_BATCH_BYTES,
+        )
+        return f_proxy(batch.start())
+
+    def _upload_or_reuse(
+        self, file_obj, name, find_existing_fn, upload_fn, mutable_fields
+    ):
+        """Private helper to add a piece of content into this repo, reusing
+        an existing unit with the same content rather than uploading the
+        content again, if possible.
+
+        Args:
+            file_obj (str, file-like object):
+                file object or path (as documented in public methods)
+
+            name (str):
+                a brief user-meaningful name for the content being uploaded
+                (appears in logs)
+
+            find_existing_fn (callable):
+                a callable which will be invoked with the checksum and size of
+                the content (as an UploadResult). It should return a future
+                resolved with an existing unit having the same content, or None.
+
+            upload_fn (callable):
+                a callable which will be invoked (with no arguments) to upload
+                the content if no existing unit can be reused. It should return
+                a future for the upload, as returned by _upload_then_import.
+
+            mutable_fields (dict):
+                values of mutable fields to be set on a reused unit, by field name.
+        """
+        if not self._client:
+            raise DetachedException()
+
+        client = self._client
+
+        def reuse(unit):
+            if unit is None or not unit.repository_memberships:
+                # Nothing to reuse, or the unit exists only as an orphan
+                # (which can't be copied since it has no source repo).
+                return upload_fn()
+
+            LOG.info(
+                "Content of %s already exists in Pulp as %s, reusing it",
+                name,
+                unit.unit_id,
+            )
+
+            if self.id in unit.repository_memberships:
+                tasks_f = f_return([])
+            else:
+                criteria = Criteria.and_(
+                    Criteria.with_unit_type(type(unit)),
+                    Criteria.with_field("unit_id", unit.unit_id),
+                )
+                tasks_f = f_flat_map(
+                    client.get_repository(unit.repository_memberships[0]),
+                    lambda src: client.copy_content(
+                        src, self, criteria, CopyOptions(require_signed_rpms=False)
+                    ),
+                )
+
+            if mutable_fields:
+                updated = attr.evolve(unit, **mutable_fields)
+                tasks_f = f_flat_map(
+                    tasks_f,
+                    lambda tasks: f_map(
+                        client.update_content(updated), lambda _: tasks
+                    ),
+                )
+
+            return tasks_f
+
+        checksum_f = client._do_checksum(file_obj)
+        existing_f = f_flat_map(
+            checksum_f,
+            lambda result: find_existing_fn(result) if result else f_return(None),
+        )
+        return f_proxy(f_flat_map(existing_f, reuse))
+
     def _upload_then_import(
-        self, file_obj, name, type_id, unit_key_fn=None, unit_metadata_fn=None
+        self,
+        file_obj,
+        name,
+        type_id,
+        unit_key_fn=None,
+        unit_metadata_fn=None,
+        weight=1,
     ):
         """Private helper to upload and import a piece of content into this repo.
 
@@ -845,6 +962,10 @@ class Repository(PulpObject, Deletable):
                 the unit metadata for this piece of
                 content. If omitted, metadata is not included in the import call to
                 Pulp.
+
+            weight (int, float):
+                share of the client's upload bandwidth given to this upload,
+                relative to other uploads.
         """
 
         if not self._client:
@@ -854,7 +975,8 @@ class Repository(PulpObject, Deletable):
         unit_metadata_fn = unit_metadata_fn or (lambda _: None)
 
         upload_id_f = f_map(
-            self._client._request_upload(name), lambda upload: upload["upload_id"]
+            self._client._request_upload(name, file_obj),
+            lambda upload: upload["upload_id"],
         )
 
         f_map(
@@ -875,7 +997,7 @@ class Repository(PulpObject, Deletable):
             upload_complete_f = f_flat_map(
                 upload_id_f,
                 lambda upload_id: self._client._do_upload_file(
-                    upload_id, file_obj, name
+                    upload_id, file_obj, name, weight
                 ),
             )
 
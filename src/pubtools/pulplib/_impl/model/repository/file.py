@@ -1,10 +1,23 @@
+import errno
 import os
+import re
 import logging
 
 from attr import validators
 from frozenlist2 import frozenlist
+from more_executors.futures import (
+    f_map,
+    f_flat_map,
+    f_proxy,
+    f_return,
+    f_return_error,
+    f_sequence,
+)
 
 from .base import Repository, SyncOptions, repo_type, Importer
+from ..common import DetachedException
+from ...criteria import Criteria, Matcher
+from ...page import search_results
 from ...model.unit import FileUnit
 from ..attr import pulp_attrib
 from ... import compat_attr as attr
@@ -13,6 +26,28 @@ from ... import compat_attr as attr
 LOG = logging.getLogger("pubtools.pulplib")
 
 
+def local_files(local_path, prefix):
+    # Returns a dict of all files under a local directory, mapping from
+    # the path of each file in a repo (with the given prefix) to its local path.
+    #
+    # Since files absent from the directory will be removed from the repo,
+    # the directory must be read completely: any error is raised rather than
+    # leaving files out.
+    if not os.path.isdir(local_path):
+        raise NotADirectoryError(errno.ENOTDIR, "Not an existing directory", local_path)
+
+    def raise_error(error):
+        raise error
+
+    out = {}
+    for (dirpath, _, filenames) in os.walk(local_path, onerror=raise_error):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            relative = os.path.relpath(path, local_path).replace(os.sep, "/")
+            out[prefix + relative] = path
+    return out
+
+
 @attr.s(kw_only=True, frozen=True)
 class FileImporter(Importer):
     type_id = pulp_attrib(
@@ -72,7 +107,7 @@ class FileRepository(Repository):
     .. versionadded:: 2.39.0 
     """
 
-    def upload_file(self, file_obj, relative_url=None, **kwargs):
+    def upload_file(self, file_obj, relative_url=None, dedup=False, weight=1, **kwargs):
         """Upload a file to this repository.
 
         Args:
@@ -99,6 +134,20 @@ class FileRepository(Repository):
                 if file_obj is a file object without a `name` attribute,
                 passing `relative_url` is mandatory.
 
+            dedup (bool)
+                If True, the checksum of the file is calculated before upload,
+                and if a unit with the same path, checksum and size already
+                exists in Pulp, that unit is copied into this repository
+                rather than uploading the file again.
+
+                File objects which don't support seeking are always uploaded.
+
+            weight (int, float)
+                Share of the client's upload bandwidth given to this upload,
+                relative to other uploads in progress, if the client was created
+                with ``upload_bandwidth``; for example, an upload with weight 2
+                is sent twice as fast as one with the default weight of 1.
+
             kwargs
                 Additional field values to set on the uploaded unit.
 
@@ -119,6 +168,9 @@ class FileRepository(Repository):
 
         .. versionadded:: 2.20.0
             Added ability to set mutable fields on upload.
+
+        .. versionadded:: 2.42.0
+            Added the ``dedup`` and ``weight`` arguments.
         """
         relative_url = self._get_relative_url(file_obj, relative_url)
 
@@ -133,9 +185,216 @@ class FileRepository(Repository):
         if usermeta:
             unit_metadata_fn = lambda _: usermeta
 
-        return self._upload_then_import(
-            file_obj, relative_url, "iso", unit_key_fn, unit_metadata_fn
+        upload_fn = lambda: self._upload_then_import(
+            file_obj,
+            relative_url,
+            "iso",
+            unit_key_fn,
+            unit_metadata_fn,
+            weight=weight,
+        )
+        if not dedup:
+            return upload_fn()
+
+        find_existing_fn = lambda upload: f_map(
+            self._client.get_units_by_key(
+                [
+                    FileUnit(
+                        path=relative_url, sha256sum=upload.checksum, size=upload.size
+                    )
+                ]
+            ),
+            lambda found: list(found.values())[0],
+        )
+        return self._upload_or_reuse(
+            file_obj, relative_url, find_existing_fn, upload_fn, kwargs
+        )
+
+    def upload_files(self, items, weight=1):
+        """Upload many files to this repository.
+
+        This is equivalent to calling :meth:`upload_file` for each item, but
+        the uploads are scheduled as a single batch: smaller files are uploaded
+        first, the number and total size of files being uploaded at once is
+        limited, and progress is logged for the batch as a whole.
+
+        This is recommended over many calls to :meth:`upload_file` when
+        uploading a large number of files.
+
+        Args:
+            items (list)
+                Files to upload. Each item may be either:
+
+                - a path or file object, as accepted by :meth:`upload_file`
+                - a dict of arguments to :meth:`upload_file`, e.g.
+                  ``{"file_obj": "/path/to/file.iso", "relative_url": "isos/"}``
+
+            weight (int, float)
+                Default ``weight`` of each item, as accepted by
+                :meth:`upload_file`; may be overridden per item.
+
+        Returns:
+            Future[list]
+                A future which is resolved once all files have been handled,
+                with a list holding the outcome of each item, in the same
+                order as ``items``.
+
+                For each successfully uploaded item, the outcome is a list
+                of :class:`~pubtools.pulplib.Task`, as would be returned by
+                :meth:`upload_file`. For each failed item, the outcome is the
+                exception raised while uploading it. The failure of an item
+                does not prevent the upload of other items.
+
+        Raises:
+            DetachedException
+                If this instance is not attached to a Pulp client.
+
+        .. versionadded:: 2.42.0
+        """
+        items = [
+            dict({"weight": weight}, **item)
+            if isinstance(item, dict)
+            else {"file_obj": item, "weight": weight}
+            for item in items
+        ]
+
+        return self._upload_batch(
+            [(item["file_obj"], item) for item in items],
+            lambda item: self.upload_file(**item),
+        )
+
+    def mirror_directory(self, local_path, prefix=None):
+        """Make the files in this repository match those in a local directory.
+
+        All files under the given directory are compared with the files in this
+        repository; files which are new or have changed are uploaded (as if by
+        :meth:`upload_files`), and files in this repository which don't exist
+        in the directory (or have changed) are removed.
+
+        Unchanged files are neither uploaded nor removed. Files are compared
+        by path and size, and by checksum if the size is the same, so only
+        local files whose size matches a file in this repository need to be
+        read prior to upload.
+
+        Args:
+            local_path (str)
+                Path to a local directory.
+
+            prefix (str)
+                If provided, the directory is mirrored under this path within
+                the repository; e.g. with a prefix of ``isos/``, local file
+                ``<local_path>/a/b.iso`` is mirrored to ``isos/a/b.iso``.
+
+                Only files under the prefix are compared against the directory,
+                and only those may be removed. If omitted, the directory is
+                mirrored to the root of the repository, and any files in the
+                repository which are not in the directory are removed.
+
+        Returns:
+            Future[list of :class:`~pubtools.pulplib.Task`]
+                A future which is resolved once this repository matches the
+                directory, containing all tasks for uploads and removal.
+
+                If any file fails to upload, the future fails with the first
+                such error, and no files are removed.
+
+        Raises:
+            DetachedException
+                If this instance is not attached to a Pulp client.
+            OSError
+                If ``local_path`` is not a directory or can't be read.
+
+        .. versionadded:: 2.42.0
+        """
+        if not self._client:
+            raise DetachedException()
+
+        client = self._client
+        prefix = prefix or ""
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+
+        local = local_files(local_path, prefix)
+
+        criteria = Criteria.with_unit_type(
+            FileUnit, unit_fields=["path", "sha256sum", "size"]
         )
+        if prefix:
+            criteria = Criteria.and_(
+                criteria,
+                Criteria.with_field("path", Matcher.regex("^" + re.escape(prefix))),
+            )
+        units_f = search_results(self.search_content(criteria))
+
+        def check_sizes(units):
+            # A local file whose size matches a unit at the same path must be
+            # checksummed to find out whether it has changed; any other local
+            # file definitely needs to be uploaded.
+            by_path = {}
+            for unit in units:
+                by_path.setdefault(unit.path, []).append(unit)
+
+            candidates = {}
+            for (relative_url, path) in local.items():
+                size = os.path.getsize(path)
+                same_size = [u for u in by_path.get(relative_url, []) if u.size == size]
+                if same_size:
+                    candidates[relative_url] = same_size
+
+            checksums_f = f_sequence(
+                [client._do_checksum(local[url]) for url in candidates]
+            )
+            return f_flat_map(
+                checksums_f,
+                lambda checksums: update(units, candidates, checksums),
+            )
+
+        def update(units, candidates, checksums):
+            kept = set()
+            unchanged = set()
+            for (relative_url, checksum) in zip(candidates, checksums):
+                for unit in candidates[relative_url]:
+                    if unit.sha256sum == checksum.checksum:
+                        kept.add(unit.unit_id)
+                        unchanged.add(relative_url)
+                        break
+
+            to_upload = sorted(set(local) - unchanged)
+            to_remove = [unit.unit_id for unit in units if unit.unit_id not in kept]
+
+            LOG.info(
+                "Mirroring %s to %s: %s file(s) to upload, %s to remove, %s unchanged",
+                local_path,
+                self.id,
+                len(to_upload),
+                len(to_remove),
+                len(unchanged),
+            )
+
+            uploads_f = self.upload_files(
+                [{"file_obj": local[url], "relative_url": url} for url in to_upload]
+            )
+            return f_flat_map(uploads_f, lambda outcomes: remove(outcomes, to_remove))
+
+        def remove(outcomes, to_remove):
+            # Stale files are removed only once everything has been uploaded,
+            # so that the repo never lacks a file present in the directory.
+            tasks = []
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    return f_return_error(outcome)
+                tasks.extend(outcome)
+
+            if not to_remove:
+                return f_return(tasks)
+
+            criteria = Criteria.and_(
+                Criteria.with_unit_type(FileUnit),
+                Criteria.with_field("unit_id", Matcher.in_(to_remove)),
+            )
+            return f_map(self.remove_content(criteria), lambda removed: tasks + removed)
+
+        return f_proxy(f_flat_map(units_f, check_sizes))
 
     def _get_relative_url(self, file_obj, relative_url):
         is_file_object = "close" in dir(file_obj)
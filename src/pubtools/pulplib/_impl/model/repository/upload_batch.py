@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+from concurrent.futures import CancelledError, Future
+from functools import partial
+
+from more_executors.futures import f_return, f_return_error
+from humanize import naturalsize
+
+from ...log import TimedLogger
+
+LOG = logging.getLogger("pubtools.pulplib")
+
+
+def file_size(file_obj):
+    # Returns size of a file to be uploaded, or None if not known
+    # (file objects in general do not know their own size) or if there's
+    # no file at all (e.g. errata).
+    if file_obj is None or "close" in dir(file_obj):
+        return None
+    try:
+        return os.path.getsize(file_obj)
+    except OSError:
+        # Let the upload itself fail as usual.
+        return None
+
+
+class UploadBatch(object):
+    # Schedules the upload of many files into a repository, as a whole.
+    #
+    # Rather than starting every upload at once, uploads are started in order
+    # of increasing size, while keeping the number of uploads in progress and
+    # the total size of the files being uploaded within limits. This means
+    # that:
+    #
+    # - small files are not stuck waiting behind large files
+    # - uploads and imports of different files are pipelined: as soon as
+    #   one file is done, another is started
+    # - memory and bandwidth used by a batch are bounded
+    #
+    # The progress of the batch as a whole is logged.
+
+    def __init__(self, repo_id, items, upload_fn, max_items, max_bytes):
+        # items should be a list of (file_obj, item) tuples; upload_fn will be
+        # invoked with each item and must return a future.
+        self._repo_id = repo_id
+        self._upload_fn = upload_fn
+        self._max_items = max(max_items, 1)
+        self._max_bytes = max_bytes
+
+        entries = [
+            (file_size(file_obj), idx, item)
+            for (idx, (file_obj, item)) in enumerate(items)
+        ]
+        # Files of unknown size go last.
+        entries.sort(key=lambda e: (e[0] is None, e[0] or 0, e[1]))
+
+        self._pending = entries
+        self._results = [None] * len(entries)
+        self._total_bytes = sum(e[0] or 0 for e in entries)
+
+        self._lock = threading.Lock()
+        self._scheduling = False
+        self._in_progress = 0
+        self._in_progress_bytes = 0
+        self._done = 0
+        self._done_bytes = 0
+        self._progress_logger = TimedLogger()
+        self._out = Future()
+
+    def start(self):
+        # Starts the batch, returning a future resolved with the outcome of
+        # every item once all are done.
+        if not self._pending:
+            return f_return([])
+
+        LOG.info(
+            "Uploading %s file(s) (%s) to %s",
+            len(self._pending),
+            naturalsize(self._total_bytes),
+            self._repo_id,
+        )
+        self._schedule()
+        return self._out
+
+    def _next_entries(self):
+        # Returns entries which can be started now, accounting for them as
+        # in progress. Must be called with lock held.
+        out = []
+        while self._pending:
+            size = self._pending[0][0] or 0
+            if self._in_progress and (
+                self._in_progress >= self._max_items
+                or self._in_progress_bytes + size > self._max_bytes
+            ):
+                break
+            out.append(self._pending.pop(0))
+            self._in_progress += 1
+            self._in_progress_bytes += size
+        return out
+
+    def _schedule(self):
+        # Start as many uploads as the limits allow.
+        #
+        # Uploads may complete immediately (e.g. on error), which calls back
+        # into here; rather than recursing, any such call made while already
+        # scheduling just returns and the loop below picks up the capacity.
+        with self._lock:
+            if self._scheduling:
+                return
+            self._scheduling = True
+
+        while True:
+            with self._lock:
+                entries = self._next_entries()
+                if not entries:
+                    self._scheduling = False
+                    return
+
+            for entry in entries:
+                try:
+                    upload_f = self._upload_fn(entry[2])
+                except Exception as ex:  # pylint: disable=broad-except
+                    upload_f = f_return_error(ex)
+                upload_f.add_done_callback(partial(self._on_done, entry))
+
+    def _on_done(self, entry, upload_f):
+        (size, idx, _) = entry
+        size = size or 0
+
+        with self._lock:
+            if upload_f.cancelled():
+                self._results[idx] = CancelledError()
+            else:
+                ex = upload_f.exception()
+                self._results[idx] = ex if ex is not None else upload_f.result()
+            self._in_progress -= 1
+            self._in_progress_bytes -= size
+            self._done += 1
+            self._done_bytes += size
+            done = self._done
+
+        total = len(self._results)
+        self._progress_logger.info(
+            "Uploaded %s of %s file(s) to %s: %s / %s",
+            done,
+            total,
+            self._repo_id,
+            naturalsize(self._done_bytes),
+            naturalsize(self._total_bytes),
+        )
+
+        if done == total:
+            LOG.info("Finished uploading %s file(s) to %s", total, self._repo_id)
+            self._out.set_result(self._results)
+        else:
+            self._schedule()
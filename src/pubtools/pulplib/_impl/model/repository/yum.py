@@ -1,3 +1,4 @@
+import logging
 import re
 
 from frozenlist2 import frozenlist
@@ -6,9 +7,50 @@ from more_executors.futures import f_map, f_proxy, f_return, f_zip, f_flat_map
 from .base import Repository, SyncOptions, repo_type, Importer
 from ..attr import pulp_attrib
 from ..common import DetachedException
-from ...model.unit import RpmUnit
+from ...model.unit import ErratumUnit, RpmUnit
 from ... import compat_attr as attr, comps
 from ...criteria import Criteria, Matcher
+from ...page import search_results
+
+LOG = logging.getLogger("pubtools.pulplib")
+
+# All unit types stored from comps.xml.
+COMPS_TYPE_IDS = [
+    "package_group",
+    "package_category",
+    "package_environment",
+    "package_langpacks",
+]
+
+
+def erratum_upload_data(erratum):
+    # Returns (type_id, metadata) for the upload of an erratum.
+
+    # Convert from ErratumUnit to a raw Pulp-style dict, recursively.
+    erratum_dict = erratum._to_data()
+
+    # Drop this one field because the _content_type_id, though embedded
+    # in unit dicts on read, is passed as a separate parameter on write.
+    type_id = erratum_dict.pop("_content_type_id")
+
+    # Drop this because the caller cannot influence the _id (unit id)
+    # for uploaded units.
+    del erratum_dict["_id"]
+
+    # And drop this one because repository_memberships is synthesized when
+    # Pulp renders units, and can't be set during import.
+    del erratum_dict["repository_memberships"]
+
+    return (type_id, erratum_dict)
+
+
+class CompsUnitData(object):
+    # Used in place of a model class when searching for comps units, which
+    # have no model: loads the raw unit metadata as a dict.
+
+    @classmethod
+    def from_data(cls, data):
+        return dict(data)
 
 
 @attr.s(kw_only=True, frozen=True)
@@ -212,7 +254,7 @@ class YumRepository(Repository):
             out = self._client.get_repository(distributor_f.repo_id)
         return out
 
-    def upload_rpm(self, file_obj, **kwargs):
+    def upload_rpm(self, file_obj, dedup=False, weight=1, **kwargs):
         """Upload an RPM to this repository.
 
         .. warning::
@@ -236,6 +278,20 @@ class YumRepository(Repository):
                 not be modified elsewhere, and will be closed when upload
                 completes.
 
+            dedup (bool)
+                If True, the checksum of the RPM is calculated before upload,
+                and if an RPM with the same checksum already exists in Pulp,
+                that RPM is copied into this repository rather than uploading
+                the file again.
+
+                File objects which don't support seeking are always uploaded.
+
+            weight (int, float)
+                Share of the client's upload bandwidth given to this upload,
+                relative to other uploads in progress, if the client was created
+                with ``upload_bandwidth``; for example, an upload with weight 2
+                is sent twice as fast as one with the default weight of 1.
+
             kwargs
                 Additional field values to set on the uploaded unit.
 
@@ -256,6 +312,9 @@ class YumRepository(Repository):
 
         .. versionadded:: 2.20.0
             Added ability to set mutable fields on upload.
+
+        .. versionadded:: 2.42.0
+            Added the ``dedup`` and ``weight`` arguments.
         """
         # We want some name of what we're uploading for logging purposes, but the
         # input could be a plain string, or a file object with 'name' attribute, or
@@ -273,8 +332,77 @@ class YumRepository(Repository):
         if usermeta:
             unit_metadata_fn = lambda _: usermeta
 
-        return self._upload_then_import(
-            file_obj, name, "rpm", unit_metadata_fn=unit_metadata_fn
+        upload_fn = lambda: self._upload_then_import(
+            file_obj, name, "rpm", unit_metadata_fn=unit_metadata_fn, weight=weight
+        )
+        if not dedup:
+            return upload_fn()
+
+        # The unit key of an RPM can't be known without parsing its headers,
+        # but an RPM with the same checksum is necessarily the same RPM.
+        find_existing_fn = lambda upload: f_map(
+            search_results(
+                self._client.search_content(
+                    Criteria.and_(
+                        Criteria.with_unit_type(RpmUnit),
+                        Criteria.with_field("sha256sum", upload.checksum),
+                    )
+                )
+            ),
+            lambda units: units[0] if units else None,
+        )
+        return self._upload_or_reuse(
+            file_obj, name, find_existing_fn, upload_fn, kwargs
+        )
+
+    def upload_rpms(self, items, weight=1):
+        """Upload many RPMs to this repository.
+
+        This is equivalent to calling :meth:`upload_rpm` for each item, but
+        the uploads are scheduled as a single batch: smaller RPMs are uploaded
+        first, the number and total size of RPMs being uploaded at once is
+        limited, and progress is logged for the batch as a whole.
+
+        Args:
+            items (list)
+                RPMs to upload. Each item may be either:
+
+                - a path or file object, as accepted by :meth:`upload_rpm`
+                - a dict of arguments to :meth:`upload_rpm`, e.g.
+                  ``{"file_obj": "/path/to/bash.rpm", "cdn_path": "/some/path"}``
+
+            weight (int, float)
+                Default ``weight`` of each item, as accepted by
+                :meth:`upload_rpm`; may be overridden per item.
+
+        Returns:
+            Future[list]
+                A future which is resolved once all RPMs have been handled,
+                with a list holding the outcome of each item, in the same
+                order as ``items``.
+
+                For each successfully uploaded item, the outcome is a list
+                of :class:`~pubtools.pulplib.Task`, as would be returned by
+                :meth:`upload_rpm`. For each failed item, the outcome is the
+                exception raised while uploading it. The failure of an item
+                does not prevent the upload of other items.
+
+        Raises:
+            DetachedException
+                If this instance is not attached to a Pulp client.
+
+        .. versionadded:: 2.42.0
+        """
+        items = [
+            dict({"weight": weight}, **item)
+            if isinstance(item, dict)
+            else {"file_obj": item, "weight": weight}
+            for item in items
+        ]
+
+        return self._upload_batch(
+            [(item["file_obj"], item) for item in items],
+            lambda item: self.upload_rpm(**item),
         )
 
     def upload_metadata(self, file_obj, metadata_type):
@@ -391,7 +519,9 @@ class YumRepository(Repository):
               guaranteed to be bytewise-identical to the uploaded content.
 
             * The uploaded XML must contain all comps data for the repo, as
-              any existing comps data will be removed from the repo.
+              any existing comps data not present in the XML will be removed
+              from the repo. Units identical to those already in the repo are
+              not uploaded again.
 
             * The XML parser is not secure against maliciously constructed data.
 
@@ -440,21 +570,76 @@ class YumRepository(Repository):
         for unit in unit_dicts:
             unit["repo_id"] = self.id
 
-        comps_type_ids = [
-            "package_group",
-            "package_category",
-            "package_environment",
-            "package_langpacks",
-        ]
+        if not self._client:
+            raise DetachedException()
 
-        # Remove former units of comps-related types so that the end result is only
+        # Find the comps units already in the repo, so that only the units
+        # which differ from the current XML need to be removed or uploaded.
+        crit = Criteria.with_field("content_type_id", Matcher.in_(COMPS_TYPE_IDS))
+        existing_f = search_results(
+            self._client._search_repo_units(self.id, crit, object_class=CompsUnitData)
+        )
+
+        return f_proxy(
+            f_flat_map(
+                existing_f,
+                lambda existing: self._update_comps(file_name, existing, unit_dicts),
+            )
+        )
+
+    def _update_comps(self, file_name, existing, unit_dicts):
+        # A helper used from upload_comps_xml: given the comps units currently
+        # in this repo, update them to be equal to unit_dicts.
+        existing_by_key = {}
+        to_remove = []
+        for unit in existing:
+            key = comps.unit_key(unit)
+            if key in existing_by_key:
+                # Should not happen, but if it does, only one can be kept.
+                to_remove.append(unit["_id"])
+            else:
+                existing_by_key[key] = unit
+
+        to_add = []
+        to_replace = []
+        for unit in unit_dicts:
+            old = existing_by_key.pop(comps.unit_key(unit), None)
+            if old is None:
+                to_add.append(unit)
+            elif not comps.units_equal(old, unit):
+                to_replace.append(unit)
+                to_remove.append(old["_id"])
+
+        # Anything not in the XML is removed, so that the end result is only
         # those units included in the current XML.
-        crit = Criteria.with_field("content_type_id", Matcher.in_(comps_type_ids))
-        out = self.remove_content(crit)
+        to_remove.extend(unit["_id"] for unit in existing_by_key.values())
+
+        LOG.info(
+            "Updating comps in %s from %s: %s unit(s) to add, %s to replace, "
+            "%s to remove, %s unchanged",
+            self.id,
+            file_name,
+            len(to_add),
+            len(to_replace),
+            len(to_remove) - len(to_replace),
+            len(unit_dicts) - len(to_add) - len(to_replace),
+        )
 
-        # Once removal is done we can upload each unit.
-        upload_f = []
-        for unit_dict in unit_dicts:
+        removed_f = f_return([])
+        if to_remove:
+            crit = Criteria.and_(
+                Criteria.with_field("content_type_id", Matcher.in_(COMPS_TYPE_IDS)),
+                Criteria.with_field("unit_id", Matcher.in_(to_remove)),
+            )
+            removed_f = self.remove_content(crit)
+
+        # New units are uploaded straight away, leaving the task throttle to
+        # pace the imports; a changed unit is only uploaded once the old unit
+        # has been removed, as both have the same unit key.
+        upload_f = [removed_f]
+        uploads = [(unit, f_return()) for unit in to_add]
+        uploads.extend((unit, removed_f) for unit in to_replace)
+        for (unit_dict, after_f) in uploads:
             type_id = unit_dict["_content_type_id"]
 
             # For one comps.xml we are doing multiple upload operations, each of
@@ -472,18 +657,13 @@ class YumRepository(Repository):
 
             upload_f.append(
                 f_flat_map(
-                    out, self._comps_unit_uploader(unit_name, type_id, unit_dict)
+                    after_f, self._comps_unit_uploader(unit_name, type_id, unit_dict)
                 )
             )
 
-        # If there were no units to upload then just return the removal.
-        if not upload_f:
-            return out
-
-        # There were uploads, then we'll wait for all of them to complete and
-        # return the tasks for all.
+        # Wait for everything to complete and return the tasks for all.
         out = f_zip(*upload_f)
-        out = f_map(out, lambda uploads: sum(uploads, []))
+        out = f_map(out, lambda tasks: sum(tasks, []))
 
         return out
 
@@ -555,20 +735,7 @@ class YumRepository(Repository):
 
         .. versionadded:: 2.17.0
         """
-        # Convert from ErratumUnit to a raw Pulp-style dict, recursively.
-        erratum_dict = erratum._to_data()
-
-        # Drop this one field because the _content_type_id, though embedded
-        # in unit dicts on read, is passed as a separate parameter on write.
-        type_id = erratum_dict.pop("_content_type_id")
-
-        # Drop this because the caller cannot influence the _id (unit id)
-        # for uploaded units.
-        del erratum_dict["_id"]
-
-        # And drop this one because repository_memberships is synthesized when
-        # Pulp renders units, and can't be set during import.
-        del erratum_dict["repository_memberships"]
+        (type_id, erratum_dict) = erratum_upload_data(erratum)
 
         return self._upload_then_import(
             file_obj=None,
@@ -577,3 +744,93 @@ class YumRepository(Repository):
             unit_key_fn=lambda _: {"id": erratum_dict["id"]},
             unit_metadata_fn=lambda _: erratum_dict,
         )
+
+    def upload_errata(self, errata):
+        """Upload many errata/advisories to this repository.
+
+        This is equivalent to calling :meth:`upload_erratum` for each erratum,
+        except that:
+
+        - Any erratum identical to an erratum with the same ``id`` already in
+          this repository is not uploaded at all. This avoids using Pulp tasks
+          for uploads which would have no effect.
+        - The uploads are scheduled as a single batch, limiting the number of
+          errata being uploaded at once, and progress is logged for the batch
+          as a whole.
+
+        All quirks documented on :meth:`upload_erratum` apply.
+
+        Args:
+            errata (list of :class:`~pubtools.pulplib.ErratumUnit`)
+                Erratum objects to upload.
+
+        Returns:
+            Future[list]
+                A future which is resolved once all errata have been handled,
+                with a list holding the outcome of each erratum, in the same
+                order as ``errata``.
+
+                For each uploaded erratum, the outcome is a list of
+                :class:`~pubtools.pulplib.Task`, as would be returned by
+                :meth:`upload_erratum`; for each skipped erratum, it's an empty
+                list. For each failed erratum, the outcome is the exception
+                raised while uploading it. The failure of an erratum does not
+                prevent the upload of other errata.
+
+        Raises:
+            DetachedException
+                If this instance is not attached to a Pulp client.
+
+        .. versionadded:: 2.42.0
+        """
+        if not self._client:
+            raise DetachedException()
+
+        errata = list(errata)
+        ids = sorted(set(erratum.id for erratum in errata))
+
+        existing_f = f_return([])
+        if ids:
+            crit = Criteria.and_(
+                Criteria.with_unit_type(ErratumUnit),
+                Criteria.with_field("id", Matcher.in_(ids)),
+            )
+            existing_f = search_results(self.search_content(crit))
+
+        return f_proxy(
+            f_flat_map(
+                existing_f,
+                lambda existing: self._upload_changed_errata(errata, existing),
+            )
+        )
+
+    def _upload_changed_errata(self, errata, existing):
+        # A helper used from upload_errata: given the errata with matching ids
+        # currently in this repo, uploads only those errata which differ.
+        existing_data = {}
+        for unit in existing:
+            existing_data[unit.id] = erratum_upload_data(unit)
+
+        changed = []
+        for (idx, erratum) in enumerate(errata):
+            if existing_data.get(erratum.id) != erratum_upload_data(erratum):
+                changed.append((idx, erratum))
+
+        LOG.info(
+            "Uploading errata to %s: %s changed, %s unchanged",
+            self.id,
+            len(changed),
+            len(errata) - len(changed),
+        )
+
+        uploads_f = self._upload_batch(
+            [(None, erratum) for (_, erratum) in changed], self.upload_erratum
+        )
+
+        def outcomes(uploaded):
+            out = [[] for _ in errata]
+            for ((idx, _), outcome) in zip(changed, uploaded):
+                out[idx] = outcome
+            return out
+
+        return f_map(uploads_f, outcomes)
@@ -1,7 +1,8 @@
+import functools
 import re
 
 from ..common import PulpObject
-from ..attr import pulp_attrib, PULP2_FIELD
+from ..attr import pulp_attrib, PULP2_FIELD, PULP2_UNIT_KEY
 from ...util import dict_put
 from ... import compat_attr as attr
 from ...schema import load_schema
@@ -39,6 +40,23 @@ def class_for_type_id(type_id):
     return UNIT_CLASSES.get(type_id)
 
 
+@functools.lru_cache(maxsize=None)
+def unit_key_fields(unit_class):
+    # Given a Unit subclass, returns the names of the fields forming
+    # the unit key of that class in Pulp, in order of definition.
+    return tuple(
+        field.name
+        for field in attr.fields(unit_class)
+        if field.metadata.get(PULP2_UNIT_KEY)
+    )
+
+
+def unit_key(unit):
+    # Returns the unit key of a unit, as a tuple of the values
+    # of the fields returned by unit_key_fields.
+    return tuple(getattr(unit, name) for name in unit_key_fields(type(unit)))
+
+
 @attr.s(kw_only=True, frozen=True)
 class Unit(PulpObject):
     """Represents a Pulp unit (a single piece of content).
@@ -48,13 +66,39 @@ class Unit(PulpObject):
 
     _SCHEMA = load_schema("unit")
 
-    content_type_id = pulp_attrib(type=str, pulp_field="_content_type_id")
+    content_type_id = pulp_attrib(type=str, pulp_field="_content_type_id", intern=True)
     """The type of this unit.
 
     This value will match one of the content types returned by
     :meth:`~pubtools.pulplib.Client.get_content_type_ids`.
     """
 
+    @property
+    def unit_key(self):
+        """The unit key of this unit: a tuple of the values of those fields
+        uniquely identifying a unit of this type in Pulp, in the order given
+        by :meth:`unit_key_fields`.
+
+        For example, the unit key of a :class:`~pubtools.pulplib.FileUnit`
+        is ``(path, size, sha256sum)``.
+
+        .. versionadded:: 2.42.0
+        """
+        return unit_key(self)
+
+    @classmethod
+    def unit_key_fields(cls):
+        """Names of the fields making up the unit key of this unit type.
+
+        Returns:
+            tuple[str]
+                Field names, in the same order as the values of
+                :attr:`unit_key`. Empty for unit types without a unit key.
+
+        .. versionadded:: 2.42.0
+        """
+        return unit_key_fields(cls)
+
     @classmethod
     def from_data(cls, data):
         # delegate to concrete subclass as needed
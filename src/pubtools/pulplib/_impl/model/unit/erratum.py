@@ -4,6 +4,7 @@ from .base import Unit, PulpObject, unit_type
 
 from ..attr import pulp_attrib
 from ..common import schemaless_init
+from ..lazy import with_lazy_fields
 from ... import compat_attr as attr
 from ..validate import (
     optional_bool,
@@ -254,6 +255,7 @@ class ErratumPackageCollection(PulpObject):
 
 
 @unit_type("erratum")
+@with_lazy_fields
 @attr.s(kw_only=True, frozen=True)
 class ErratumUnit(Unit):
     """A :class:`~pubtools.pulplib.Unit` representing an erratum/advisory.
@@ -276,7 +278,11 @@ class ErratumUnit(Unit):
     """
 
     status = pulp_attrib(
-        type=str, pulp_field="status", default=None, validator=optional_str
+        type=str,
+        pulp_field="status",
+        default=None,
+        validator=optional_str,
+        intern=True,
     )
     """Status, typically 'final'."""
 
@@ -310,7 +316,11 @@ class ErratumUnit(Unit):
     """True if rebooting host machine is recommended after installing this advisory."""
 
     from_ = pulp_attrib(
-        type=str, pulp_field="from", default=None, validator=optional_str
+        type=str,
+        pulp_field="from",
+        default=None,
+        validator=optional_str,
+        intern=True,
     )
     """Contact email address for the owner of the advisory.
 
@@ -330,17 +340,29 @@ class ErratumUnit(Unit):
     """Title of the advisory (e.g. 'bash bugfix and enhancement')."""
 
     severity = pulp_attrib(
-        type=str, pulp_field="severity", default=None, validator=optional_str
+        type=str,
+        pulp_field="severity",
+        default=None,
+        validator=optional_str,
+        intern=True,
     )
     """Severity of the advisory, e.g. "low", "moderate", "important" or "critical"."""
 
     release = pulp_attrib(
-        type=str, pulp_field="release", default=None, validator=optional_str
+        type=str,
+        pulp_field="release",
+        default=None,
+        validator=optional_str,
+        intern=True,
     )
     """Release number. Typically an integer-string, initially "0"."""
 
     type = pulp_attrib(
-        type=str, pulp_field="type", default=None, validator=optional_str
+        type=str,
+        pulp_field="type",
+        default=None,
+        validator=optional_str,
+        intern=True,
     )
     """"bugfix", "security" or "enhancement"."""
 
@@ -380,6 +402,7 @@ class ErratumUnit(Unit):
     pkglist = pulp_attrib(
         type=list,
         pulp_field="pkglist",
+        lazy=True,
         pulp_py_converter=ErratumPackageCollection._from_data,
         converter=frozenlist_or_none_converter,
         default=None,
@@ -398,7 +421,7 @@ class ErratumUnit(Unit):
     """A list of container images associated with the advisory."""
 
     content_type_id = pulp_attrib(
-        default="erratum", type=str, pulp_field="_content_type_id"
+        default="erratum", type=str, pulp_field="_content_type_id", intern=True
     )
 
     repository_memberships = pulp_attrib(
@@ -406,6 +429,7 @@ class ErratumUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
     """
@@ -144,7 +144,7 @@ class FileUnit(Unit):
     """
 
     content_type_id = pulp_attrib(
-        default="iso", type=str, pulp_field="_content_type_id"
+        default="iso", type=str, pulp_field="_content_type_id", intern=True
     )
 
     repository_memberships = pulp_attrib(
@@ -152,6 +152,7 @@ class FileUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
 
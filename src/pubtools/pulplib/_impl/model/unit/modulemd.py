@@ -85,7 +85,7 @@ class ModulemdUnit(Unit):
     is "dca7b4a4".
     """
 
-    arch = pulp_attrib(type=str, pulp_field="arch", unit_key=True)
+    arch = pulp_attrib(type=str, pulp_field="arch", unit_key=True, intern=True)
     """The architecture of this module.
 
     Example: the arch of javapackages-tools:201801:20180813043155:dca7b4a4:aarch64
@@ -93,7 +93,7 @@ class ModulemdUnit(Unit):
     """
 
     content_type_id = pulp_attrib(
-        default="modulemd", type=str, pulp_field="_content_type_id"
+        default="modulemd", type=str, pulp_field="_content_type_id", intern=True
     )
 
     repository_memberships = pulp_attrib(
@@ -101,6 +101,7 @@ class ModulemdUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
 
@@ -34,7 +34,10 @@ class ModulemdDefaultsUnit(Unit):
     """The profiles of this modulemd defaults unit."""
 
     content_type_id = pulp_attrib(
-        default="modulemd_defaults", type=str, pulp_field="_content_type_id"
+        default="modulemd_defaults",
+        type=str,
+        pulp_field="_content_type_id",
+        intern=True,
     )
 
     repository_memberships = pulp_attrib(
@@ -42,6 +45,7 @@ class ModulemdDefaultsUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
 
@@ -25,7 +25,10 @@ class YumRepoMetadataFileUnit(Unit):
     """SHA256 checksum of this metadata file, if known, as a hex string."""
 
     content_type_id = pulp_attrib(
-        default="yum_repo_metadata_file", type=str, pulp_field="_content_type_id"
+        default="yum_repo_metadata_file",
+        type=str,
+        pulp_field="_content_type_id",
+        intern=True,
     )
 
     repository_memberships = pulp_attrib(
@@ -33,6 +36,7 @@ class YumRepoMetadataFileUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
     """
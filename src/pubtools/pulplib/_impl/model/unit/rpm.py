@@ -5,6 +5,7 @@ from pubtools.pulplib._impl.model.validate import optional_list_of
 from ... import compat_attr as attr
 from ..attr import pulp_attrib
 from ..common import PulpObject, schemaless_init
+from ..lazy import with_lazy_fields
 from ..convert import (
     frozenlist_or_none_converter,
     frozenlist_or_none_sorted_converter,
@@ -65,6 +66,7 @@ class RpmDependency(PulpObject):
 # This separation doesn't seem useful, so we let one class handle both.
 @unit_type("rpm")
 @unit_type("srpm")
+@with_lazy_fields
 @attr.s(kw_only=True, frozen=True)
 class RpmUnit(Unit):
     """A :class:`~pubtools.pulplib.Unit` representing an RPM.
@@ -90,19 +92,23 @@ class RpmUnit(Unit):
     Example: the release of bash-5.0.7-1.fc30.x86_64.rpm is "1.fc30".
     """
 
-    arch = pulp_attrib(type=str, pulp_field="arch", unit_key=True)
+    arch = pulp_attrib(type=str, pulp_field="arch", unit_key=True, intern=True)
     """The architecture of this RPM.
 
     Example: the arch of bash-5.0.7-1.fc30.x86_64.rpm is "x86_64".
     """
 
-    epoch = pulp_attrib(default="0", type=str, pulp_field="epoch", unit_key=True)
+    epoch = pulp_attrib(
+        default="0", type=str, pulp_field="epoch", unit_key=True, intern=True
+    )
     """The epoch of this RPM (most commonly "0").
 
     Example: the epoch of 3:bash-5.0.7-1.fc30.x86_64.rpm is "3".
     """
 
-    signing_key = pulp_attrib(default=None, type=str, pulp_field="signing_key")
+    signing_key = pulp_attrib(
+        default=None, type=str, pulp_field="signing_key", intern=True
+    )
     """The short ID of the GPG key used to sign this RPM.
 
     .. seealso::
@@ -201,6 +207,7 @@ class RpmUnit(Unit):
         type=list,
         converter=frozenlist_or_none_sorted_converter,
         pulp_field="repository_memberships",
+        intern=True,
     )
     """IDs of repositories containing the unit, or ``None`` if this information is unavailable.
 
@@ -218,6 +225,7 @@ class RpmUnit(Unit):
         type=list,
         converter=frozenlist_or_none_converter,
         pulp_field="requires",
+        lazy=True,
         validator=optional_list_of(RpmDependency),
         pulp_py_converter=RpmDependency._from_data,
     )
@@ -230,6 +238,7 @@ class RpmUnit(Unit):
         type=list,
         converter=frozenlist_or_none_converter,
         pulp_field="provides",
+        lazy=True,
         validator=optional_list_of(RpmDependency),
         pulp_py_converter=RpmDependency._from_data,
     )
@@ -242,6 +251,7 @@ class RpmUnit(Unit):
         type=list,
         converter=frozenlist_or_none_converter,
         pulp_field="files.file",
+        lazy=True,
         validator=optional_list_of(str),
     )
     """
@@ -4,6 +4,7 @@ import warnings
 from concurrent.futures import Future
 
 from frozenlist2 import frozenlist
+from more_executors.futures import f_flat_map, f_return
 
 
 from . import compat_attr as attr
@@ -132,6 +133,20 @@ class Page(object):
             page = page.next.result()
 
 
+def search_results(page_f):
+    # Given a future for the first page of a search, returns a future
+    # for a list of all results of the search.
+    out = []
+
+    def handle_page(page):
+        out.extend(page.data)
+        if page.next:
+            return f_flat_map(page.next, handle_page)
+        return f_return(out)
+
+    return f_flat_map(page_f, handle_page)
+
+
 # Wrap any access to 'next' to avoid cancellation.
 #
 # When initially created, we are in a state where we potentially have a search
@@ -0,0 +1,298 @@
+import functools
+import sys
+
+from more_executors.futures import f_flat_map, f_return
+
+from . import compat_attr as attr
+from .model.common import field_names
+from .model.lazy import LazyValue
+from .model.unit.base import Unit, class_for_type_id
+
+
+class UnitTable(object):
+    """A collection of units stored by column, rather than as one object per unit.
+
+    Instances of this class may be obtained from
+    :meth:`~pubtools.pulplib.Client.search_content` by passing ``as_table=True``.
+
+    A table holds one list of values for each field present in the units, with
+    the field names of :class:`~pubtools.pulplib.Unit` subclasses used as column
+    names. Where a unit has no value for a column (e.g. a ``FileUnit`` in the
+    ``arch`` column of a table also holding RPMs), the column holds ``None``.
+
+    Compared to a list of :class:`~pubtools.pulplib.Unit` objects, a table
+    needs far fewer allocations and less memory for large numbers of units,
+    particularly when combined with a field projection via
+    :meth:`~pubtools.pulplib.Criteria.with_unit_type`. This makes it suitable
+    for bulk processing such as finding the latest RPMs within a repository.
+
+    Individual units can be obtained from a table on demand via :meth:`units`.
+
+    Example:
+
+        .. code-block:: python
+
+            crit = Criteria.with_unit_type(
+                RpmUnit, unit_fields=["name", "version", "release", "arch"]
+            )
+            table = client.search_content(crit, as_table=True).result()
+
+            # Find all x86_64 RPMs, grouped by name
+            by_name = table.where(arch="x86_64").group_by("name")
+            for name, rpms in by_name.items():
+                print(name, sorted(rpms["version"]))
+
+    .. versionadded:: 2.42.0
+    """
+
+    def __init__(self, columns=None):
+        """Create a new table.
+
+        Args:
+            columns (dict[str, list])
+                A mapping from column (field) names to column values.
+                All columns must be of the same length.
+        """
+        self._columns = {}
+        self._len = 0
+
+        for (name, values) in (columns or {}).items():
+            values = list(values)
+            if self._columns and len(values) != self._len:
+                raise ValueError(
+                    "Column %s has %s values, expected %s"
+                    % (name, len(values), self._len)
+                )
+            self._columns[name] = values
+            self._len = len(values)
+
+    @classmethod
+    def from_units(cls, units):
+        """Create a new table from units.
+
+        Args:
+            units (Iterable[:class:`~pubtools.pulplib.Unit`])
+                Units to be stored in the table.
+
+        Returns:
+            UnitTable
+                A table with a column for every field of the given units.
+        """
+        out = cls()
+        out._append_rows(
+            {name: getattr(unit, name) for name in field_names(type(unit))}
+            for unit in units
+        )
+        return out
+
+    @property
+    def columns(self):
+        """Names of the columns in this table.
+
+        :type: list[str]
+        """
+        return list(self._columns)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, name):
+        """Returns the list of values in the named column.
+
+        The returned list should be treated as read-only.
+        """
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __repr__(self):
+        return "UnitTable(columns=%r, len=%s)" % (self.columns, self._len)
+
+    def filter(self, mask):
+        """Select rows from this table.
+
+        Args:
+            mask (Iterable[bool])
+                An iterable of the same length as this table, holding a true
+                value for each row to be selected.
+
+        Returns:
+            UnitTable
+                A new table holding only the selected rows.
+
+        Example:
+
+            .. code-block:: python
+
+                # Get all RPMs built for RHEL 9
+                table.filter(".el9" in release for release in table["release"])
+        """
+        return self._take([idx for (idx, keep) in enumerate(mask) if keep])
+
+    def where(self, **values):
+        """Select rows from this table having the given values.
+
+        Args:
+            values
+                Names of columns mapped to the value those columns must have.
+                If a value is a list, set or tuple, columns may match any of
+                its elements.
+
+        Returns:
+            UnitTable
+                A new table holding only the selected rows.
+        """
+        mask = [True] * self._len
+        for (name, wanted) in values.items():
+            column = self._columns.get(name) or [None] * self._len
+            if isinstance(wanted, (list, set, frozenset, tuple)):
+                wanted = set(wanted)
+                match = [value in wanted for value in column]
+            else:
+                match = [value == wanted for value in column]
+            mask = [a and b for (a, b) in zip(mask, match)]
+        return self.filter(mask)
+
+    def group_by(self, *names):
+        """Group the rows of this table by the values of one or more columns.
+
+        Args:
+            names (str)
+                Names of the columns to group by.
+
+        Returns:
+            dict
+                A dict mapping keys to tables holding the rows for each key.
+
+                If a single column name was given, keys are values of that
+                column. Otherwise, keys are tuples of values from the given
+                columns, in the requested order.
+        """
+        if not names:
+            raise TypeError("At least one column name is required")
+
+        columns = [self._columns.get(name) or [None] * self._len for name in names]
+        keys = columns[0] if len(columns) == 1 else zip(*columns)
+
+        indexes = {}
+        for (idx, key) in enumerate(keys):
+            indexes.setdefault(key, []).append(idx)
+
+        return {key: self._take(idx) for (key, idx) in indexes.items()}
+
+    def units(self):
+        """Convert the rows of this table to units.
+
+        Returns:
+            list[:class:`~pubtools.pulplib.Unit`]
+                A unit for each row of this table, of the appropriate subclass
+                according to the ``content_type_id`` column.
+        """
+        return [self.unit(idx) for idx in range(0, self._len)]
+
+    def unit(self, index):
+        """Convert a single row of this table to a unit.
+
+        Args:
+            index (int)
+                Index of a row in this table.
+
+        Returns:
+            :class:`~pubtools.pulplib.Unit`
+                A unit of the appropriate subclass according to the
+                ``content_type_id`` column.
+        """
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("UnitTable index out of range")
+
+        columns = self._columns
+        content_type_id = columns["content_type_id"][index]
+        klass = class_for_type_id(content_type_id) or Unit
+
+        kwargs = {}
+        for name in field_names(klass):
+            value = columns[name][index] if name in columns else None
+            if value is not None:
+                kwargs[name] = value
+
+        return klass(**kwargs)
+
+    def _take(self, indexes):
+        out = UnitTable()
+        out._columns = {
+            name: [values[idx] for idx in indexes]
+            for (name, values) in self._columns.items()
+        }
+        out._len = len(indexes)
+        return out
+
+    def _append_rows(self, rows):
+        # Add rows to this table, each row being a dict from column names
+        # to values. Only for use while a table is being built.
+        columns = self._columns
+        for row in rows:
+            for (name, value) in row.items():
+                column = columns.get(name)
+                if column is None:
+                    column = [None] * self._len
+                    columns[name] = column
+                if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                    # Many values (names, arches, repo IDs...) are repeated
+                    # across units, so interning saves a lot of memory.
+                    value = sys.intern(value)
+                column.append(value)
+
+            self._len += 1
+            for column in columns.values():
+                if len(column) < self._len:
+                    column.append(None)
+
+
+@functools.lru_cache(maxsize=None)
+def field_converters(klass):
+    return {field.name: field.converter for field in attr.fields(klass)}
+
+
+class UnitRow(object):
+    # Used in place of a model class during searches with as_table=True:
+    # loads raw unit data as a dict of column values for a UnitTable, rather
+    # than as a Unit object.
+
+    @classmethod
+    def from_data(cls, data):
+        klass = class_for_type_id(data.get("_content_type_id")) or Unit
+
+        with klass._loading(data):
+            row = klass._load_init_args(data)
+
+            # Apply the same conversions as when constructing a unit, so that
+            # values in a table are the same as those on units.
+            converters = field_converters(klass)
+            for (name, value) in row.items():
+                if isinstance(value, LazyValue):
+                    row[name] = value.resolve()
+                elif converters[name]:
+                    row[name] = converters[name](value)
+
+            return row
+
+
+def table_from_pages(page_f):
+    # Given a future for the first page of a search using UnitRow,
+    # returns a future for a UnitTable holding all of the search results.
+    table = UnitTable()
+
+    def handle_page(page):
+        while True:
+            table._append_rows(page.data)
+            if not page.next:
+                return f_return(table)
+            if not page.next.done():
+                return f_flat_map(page.next, handle_page)
+            # Already got the next page, no need to wait.
+            page = page.next.result()
+
+    return f_flat_map(page_f, handle_page)
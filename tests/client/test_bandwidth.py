@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from pubtools.pulplib._impl.client import bandwidth
+from pubtools.pulplib._impl.client.bandwidth import BandwidthLimiter
+
+
+class FakeClock(object):
+    # Stands in for both monotonic() and the limiter's condition, so that
+    # waiting simply advances time.
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def wait(self, timeout):
+        assert timeout is not None
+        self.now += timeout
+
+    def notify_all(self):
+        pass
+
+
+def test_limits_rate(monkeypatch):
+    """Uploads are held to the configured rate on average."""
+    clock = FakeClock()
+    monkeypatch.setattr(bandwidth, "monotonic", clock)
+
+    limiter = BandwidthLimiter(100, burst=100)
+    limiter._cond = clock
+    flow = limiter.flow()
+
+    # Initial burst is permitted immediately.
+    flow.acquire(100)
+    assert clock.now == 1000.0
+
+    # Then each chunk has to wait.
+    for _ in range(0, 10):
+        flow.acquire(100)
+    assert 1009.0 <= clock.now <= 1010.1
+
+
+def test_large_chunks_go_into_debt(monkeypatch):
+    """Chunks larger than the burst size are permitted, delaying later chunks."""
+    clock = FakeClock()
+    monkeypatch.setattr(bandwidth, "monotonic", clock)
+
+    limiter = BandwidthLimiter(100, burst=10)
+    limiter._cond = clock
+    flow = limiter.flow()
+
+    flow.acquire(1000)
+    assert clock.now == 1000.0
+
+    flow.acquire(1)
+    assert 1009.9 <= clock.now <= 1010.1
+
+
+def test_weighted_fair_sharing():
+    """Concurrent uploads share bandwidth according to their weights."""
+    limiter = BandwidthLimiter(20000, burst=1)
+    flows = {"a": limiter.flow(), "b": limiter.flow(weight=2)}
+
+    order = []
+    barrier = threading.Barrier(2)
+
+    def upload(name):
+        barrier.wait()
+        for _ in range(0, 30):
+            flows[name].acquire(100)
+            order.append(name)
+
+    threads = [threading.Thread(target=upload, args=(name,)) for name in flows]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # While both uploads are sending, b gets twice the bandwidth of a.
+    first = order[:30]
+    assert 17 <= first.count("b") <= 23
+
+
+def test_invalid_weight():
+    """A flow can't be created with a weight which isn't positive."""
+    limiter = BandwidthLimiter(100)
+
+    with pytest.raises(ValueError) as excinfo:
+        limiter.flow(weight=0)
+
+    assert "Upload weight must be positive, got: 0" in str(excinfo.value)
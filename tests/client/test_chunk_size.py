@@ -0,0 +1,53 @@
+from pubtools.pulplib._impl.client.chunk_size import AdaptiveChunkSize
+
+MB = 1024 * 1024
+
+
+def test_grows_on_fast_link():
+    """Chunk size grows, at most 2x at a time, while uploads are fast."""
+    sizer = AdaptiveChunkSize(10 * MB, 1 * MB, 64 * MB)
+
+    # 10MB in 0.1s => 100MB/s; would want 200MB chunks.
+    sizer.observe(10 * MB, 0.1)
+    assert sizer.size == 20 * MB
+
+    sizer.observe(20 * MB, 0.2)
+    assert sizer.size == 40 * MB
+
+    # Never beyond the maximum.
+    sizer.observe(40 * MB, 0.4)
+    assert sizer.size == 64 * MB
+
+
+def test_shrinks_on_slow_link():
+    """Chunk size shrinks, at most 2x at a time, while uploads are slow."""
+    sizer = AdaptiveChunkSize(10 * MB, 1 * MB, 64 * MB)
+
+    # 10MB in 100s => 100KB/s; would want 200KB chunks.
+    sizer.observe(10 * MB, 100)
+    assert sizer.size == 5 * MB
+
+    for _ in range(0, 10):
+        sizer.observe(sizer.size, sizer.size / (100 * 1024))
+
+    # Never below the minimum.
+    assert sizer.size == 1 * MB
+
+
+def test_settles_on_target():
+    """Chunk size settles where each chunk takes about the target time."""
+    sizer = AdaptiveChunkSize(1 * MB, 1 * MB, 64 * MB)
+    rate = 8 * MB
+
+    for _ in range(0, 30):
+        sizer.observe(sizer.size, float(sizer.size) / rate)
+
+    assert sizer.size == int(rate * AdaptiveChunkSize.TARGET_SECONDS)
+    assert sizer.rate == rate
+    assert sizer.chunks == 30
+
+
+def test_initial_size_clamped():
+    """Initial chunk size is kept within bounds."""
+    assert AdaptiveChunkSize(100 * MB, 1 * MB, 64 * MB).size == 64 * MB
+    assert AdaptiveChunkSize(10, 1 * MB, 64 * MB).size == 1 * MB
@@ -19,6 +19,7 @@ from pubtools.pulplib import (
     RpmUnit,
     FileUnit,
 )
+from pubtools.pulplib._impl.page import search_results
 
 
 def test_can_construct(requests_mocker):
@@ -225,6 +226,10 @@ def test_search_can_paginate(client, requests_mocker):
     """search_repository implicitly paginates the search as needed."""
     client._PAGE_SIZE = 10
 
+    # Force the skip/limit pagination mode, as is used for searches
+    # which don't support keyset pagination.
+    client._KEYSET_PAGINATION = False
+
     expected_repos = []
     responses = []
     current_response = []
@@ -262,6 +267,135 @@ def test_search_can_paginate(client, requests_mocker):
     assert criteria[-1] == {"filters": {}, "skip": 990, "limit": 10}
 
 
+def test_search_results_paginate(client, requests_mocker):
+    """search_results collects results from every page of a search."""
+    client._PAGE_SIZE = 2
+    client._KEYSET_PAGINATION = False
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/",
+        [
+            {"json": [{"id": "repo-0"}, {"id": "repo-1"}]},
+            {"json": [{"id": "repo-2"}, {"id": "repo-3"}]},
+            {"json": [{"id": "repo-4"}]},
+        ],
+    )
+
+    repos = search_results(client.search_repository()).result()
+
+    assert [r.id for r in repos] == ["repo-%s" % i for i in range(0, 5)]
+    assert requests_mocker.call_count == 3
+
+
+def test_search_keyset_paginate(client, requests_mocker):
+    """search_repository paginates on repo id rather than by skipping results."""
+    client._PAGE_SIZE = 10
+
+    repo_ids = sorted(["repo-%03d" % i for i in range(0, 25)])
+
+    def respond(request, _context):
+        criteria = request.json()["criteria"]
+        after = ""
+        if criteria["filters"]:
+            after = criteria["filters"]["id"]["$gt"]
+        found = [{"id": repo_id} for repo_id in repo_ids if repo_id > after]
+        return found[: criteria["limit"]]
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/", json=respond
+    )
+
+    repos = list(client.search_repository())
+
+    # It should have returned all the repos
+    assert [r.id for r in repos] == repo_ids
+
+    # It should have used keyset pagination: every request is sorted on id,
+    # no request skips over results, and later pages start after the last
+    # id of the previous page.
+    history = requests_mocker.request_history
+    criteria = [h.json()["criteria"] for h in history]
+    assert criteria == [
+        {"filters": {}, "limit": 10, "sort": [["id", "ascending"]]},
+        {
+            "filters": {"id": {"$gt": "repo-009"}},
+            "limit": 10,
+            "sort": [["id", "ascending"]],
+        },
+        {
+            "filters": {"id": {"$gt": "repo-019"}},
+            "limit": 10,
+            "sort": [["id", "ascending"]],
+        },
+    ]
+
+
+def test_search_keyset_paginate_with_filters(client, requests_mocker):
+    """Keyset pagination combines the page boundary with caller's filters."""
+    client._PAGE_SIZE = 2
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/",
+        [
+            {"json": [{"id": "repo1"}, {"id": "repo2"}]},
+            {"json": [{"id": "repo3"}]},
+        ],
+    )
+
+    repos = list(client.search_repository(Criteria.with_field("notes.x", "y")))
+
+    assert [r.id for r in repos] == ["repo1", "repo2", "repo3"]
+
+    criteria = requests_mocker.request_history[-1].json()["criteria"]
+    assert criteria == {
+        "filters": {
+            "$and": [{"notes.x": {"$eq": "y"}}, {"id": {"$gt": "repo2"}}],
+        },
+        "limit": 2,
+        "sort": [["id", "ascending"]],
+    }
+
+
+def test_search_keyset_paginate_missing_key(client, requests_mocker):
+    """Keyset pagination falls back to skip if results lack the page key."""
+    client._PAGE_SIZE = 2
+
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "iso"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/iso/search/",
+        [
+            {
+                "json": [
+                    {
+                        "_content_type_id": "iso",
+                        "name": "file%s" % i,
+                        "checksum": "a" * 64,
+                        "size": i,
+                    }
+                    for i in range(0, 2)
+                ]
+            },
+            {"json": []},
+        ],
+    )
+
+    units = list(client.search_content())
+    assert len(units) == 2
+
+    # Results were still sorted, but since Pulp didn't give us any _id,
+    # the second page had to be obtained by skip.
+    criteria = requests_mocker.request_history[-1].json()["criteria"]
+    assert criteria == {
+        "filters": {},
+        "limit": 2,
+        "skip": 2,
+        "sort": [["_id", "ascending"]],
+    }
+
+
 def test_can_get(client, requests_mocker):
     """get_repository gets a repository (via search)."""
     requests_mocker.post(
@@ -516,7 +650,7 @@ def test_can_search_content(client, requests_mocker):
     # Request body should look like this: limit is always applied,
     # repos are always requested
     assert requests_mocker.request_history[-1].json() == {
-        "criteria": {"skip": 0, "limit": 2000, "filters": {}},
+        "criteria": {"limit": 2000, "filters": {}, "sort": [["_id", "ascending"]]},
         "include_repos": True,
     }
 
@@ -731,7 +865,7 @@ def test_can_search_content_specific_fields(client, requests_mocker):
             "fields": ["checksum", "name", "notexist", "pulp_user_metadata", "size"],
             "filters": {},
             "limit": 2000,
-            "skip": 0,
+            "sort": [["_id", "ascending"]],
         },
         "include_repos": True,
     }
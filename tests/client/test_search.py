@@ -6,9 +6,10 @@ from pubtools.pulplib import Criteria, Matcher
 from pubtools.pulplib._impl.client.search import (
     filters_for_criteria,
     field_match,
+    search_for_criteria,
 )
 
-from pubtools.pulplib import RpmUnit, FileUnit
+from pubtools.pulplib import RpmUnit, FileUnit, Unit
 
 
 def test_null_criteria():
@@ -134,3 +135,58 @@ def test_cdn_published_not_datetime():
     assert filters_for_criteria(crit, FileUnit) == {
         "pulp_user_metadata.cdn_published": {"$eq": "not datetime"}
     }
+
+
+def test_search_cached():
+    """Searches for equal criteria are compiled once and reused."""
+    crit = Criteria.and_(
+        Criteria.with_unit_type(RpmUnit), Criteria.with_field("name", "bash")
+    )
+    same_crit = Criteria.and_(
+        Criteria.with_unit_type(RpmUnit), Criteria.with_field("name", "bash")
+    )
+
+    search = search_for_criteria(crit, Unit)
+    assert search.filters == {"name": {"$eq": "bash"}}
+    assert search.type_ids == ["rpm", "srpm"]
+
+    assert search_for_criteria(same_crit, Unit) is search
+
+    # Different type hint gives a different search
+    assert search_for_criteria(crit) is not search
+
+
+def test_search_unhashable_not_cached():
+    """Criteria with unhashable values can be used, without caching."""
+    crit = Criteria.with_field("some.field", {"a": ["b"]})
+
+    search = search_for_criteria(crit)
+    assert search.filters == {"some.field": {"$eq": {"a": ["b"]}}}
+    assert search_for_criteria(crit) is not search
+
+
+def test_search_cache_distinguishes_types():
+    """Criteria with equal values of different types don't share a cached
+    search."""
+    search_true = search_for_criteria(Criteria.with_field("x", True))
+    search_one = search_for_criteria(Criteria.with_field("x", 1))
+
+    assert search_true.filters == {"x": {"$eq": True}}
+    assert search_one.filters == {"x": {"$eq": 1}}
+    assert search_one.filters["x"]["$eq"] is not True
+
+    # In lists as well
+    search_in = search_for_criteria(Criteria.with_field("x", Matcher.in_([0, 1])))
+    assert search_for_criteria(
+        Criteria.with_field("x", Matcher.in_([False, True]))
+    ).filters == {"x": {"$in": [False, True]}}
+    assert search_in.filters == {"x": {"$in": [0, 1]}}
+
+
+def test_search_large_in_not_cached():
+    """Criteria with large IN matches are not cached."""
+    crit = Criteria.with_field("name", Matcher.in_(["v%s" % i for i in range(0, 500)]))
+
+    search = search_for_criteria(crit)
+    assert len(search.filters["name"]["$in"]) == 500
+    assert search_for_criteria(crit) is not search
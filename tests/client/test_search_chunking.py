@@ -0,0 +1,216 @@
+from pubtools.pulplib import Criteria, Matcher, Repository, RpmUnit, Unit
+from pubtools.pulplib._impl.client.search import split_criteria
+
+
+def test_split_simple():
+    """A large IN match is split into several smaller ones."""
+    crit = Criteria.with_field("name", Matcher.in_(["a", "b", "c", "d", "e"]))
+
+    assert split_criteria(crit, 2) == [
+        Criteria.with_field("name", Matcher.in_(["a", "b"])),
+        Criteria.with_field("name", Matcher.in_(["c", "d"])),
+        Criteria.with_field("name", Matcher.in_(["e"])),
+    ]
+
+    # Small enough => no split
+    assert split_criteria(crit, 5) == [crit]
+
+
+def test_split_within_and():
+    """The largest IN match within AND is split, keeping the other operands."""
+    type_crit = Criteria.with_unit_type(RpmUnit)
+    small = Criteria.with_field("arch", Matcher.in_(["x86_64", "s390x", "noarch"]))
+    crit = Criteria.and_(
+        type_crit,
+        small,
+        Criteria.with_field("sha256sum", Matcher.in_(["1", "2", "3", "4"])),
+    )
+
+    assert split_criteria(crit, 2, Unit) == [
+        Criteria.and_(
+            type_crit,
+            small,
+            Criteria.with_field("sha256sum", Matcher.in_(["1", "2"])),
+        ),
+        Criteria.and_(
+            type_crit,
+            small,
+            Criteria.with_field("sha256sum", Matcher.in_(["3", "4"])),
+        ),
+    ]
+
+
+def test_no_split_unsafe():
+    """Criteria which could match an object more than once when split are
+    not split."""
+    values = ["a", "b", "c"]
+
+    # IN within OR
+    crit = Criteria.or_(
+        Criteria.with_field("name", Matcher.in_(values)),
+        Criteria.with_field("other", "x"),
+    )
+    assert split_criteria(crit, 2) == [crit]
+
+    # IN on list fields, by model or Pulp field name
+    for field in ("repository_memberships", "provides.name", "notes.signatures"):
+        crit = Criteria.with_field(field, Matcher.in_(values))
+        assert split_criteria(crit, 2, Repository if "notes" in field else Unit) == [
+            crit
+        ]
+
+
+def test_search_split(client, requests_mocker):
+    """A search with a large IN match is done via several requests, with all
+    results returned."""
+    client._MAX_IN_VALUES = 3
+    ids = ["repo%s" % i for i in range(0, 8)]
+
+    def search(request, _context):
+        wanted = request.json()["criteria"]["filters"]["id"]["$in"]
+        assert len(wanted) <= 3
+        return [{"id": repo_id} for repo_id in wanted if repo_id != "repo5"]
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/", json=search
+    )
+
+    repos = client.search_repository(Criteria.with_id(ids)).result()
+
+    assert sorted(repo.id for repo in repos) == [i for i in ids if i != "repo5"]
+    assert len(requests_mocker.request_history) == 3
+
+
+def test_copy_split(fast_poller, requests_mocker, client):
+    """Copy with a large IN match is done via several tasks."""
+    client._MAX_IN_VALUES = 2
+
+    src = Repository(id="src-repo")
+    dest = Repository(id="dest-repo")
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/dest-repo/actions/associate/",
+        [
+            {"json": {"spawned_tasks": [{"task_id": "task1"}]}},
+            {"json": {"spawned_tasks": [{"task_id": "task2"}]}},
+        ],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[
+            {"task_id": "task1", "state": "finished"},
+            {"task_id": "task2", "state": "finished"},
+        ],
+    )
+
+    crit = Criteria.and_(
+        Criteria.with_unit_type(RpmUnit),
+        Criteria.with_field("sha256sum", Matcher.in_(["1", "2", "3"])),
+    )
+    tasks = client.copy_content(src, dest, crit).result()
+
+    assert sorted(t.id for t in tasks) == ["task1", "task2"]
+
+    filters = [
+        req.json()["criteria"]["filters"]["unit"]
+        for req in requests_mocker.request_history
+        if req.url.endswith("/associate/")
+    ]
+    assert sorted(f["checksum"]["$in"] for f in filters) == [["1", "2"], ["3"]]
+
+
+def test_remove_split(fast_poller, requests_mocker, client):
+    """Remove with a large IN match is done via several tasks."""
+    client._MAX_IN_VALUES = 2
+
+    repo = Repository(id="some-repo")
+    repo.__dict__["_client"] = client
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/some-repo/actions/unassociate/",
+        [
+            {"json": {"spawned_tasks": [{"task_id": "task1"}]}},
+            {"json": {"spawned_tasks": [{"task_id": "task2"}]}},
+        ],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[
+            {"task_id": "task1", "state": "finished"},
+            {"task_id": "task2", "state": "finished"},
+        ],
+    )
+
+    crit = Criteria.and_(
+        Criteria.with_unit_type(RpmUnit),
+        Criteria.with_field("sha256sum", Matcher.in_(["1", "2", "3"])),
+    )
+    tasks = repo.remove_content(crit).result()
+
+    assert sorted(t.id for t in tasks) == ["task1", "task2"]
+
+    requests = [
+        req.json()["criteria"]
+        for req in requests_mocker.request_history
+        if req.url.endswith("/unassociate/")
+    ]
+    assert [r["type_ids"] for r in requests] == [["rpm", "srpm"]] * 2
+    assert sorted(r["filters"]["unit"]["checksum"]["$in"] for r in requests) == [
+        ["1", "2"],
+        ["3"],
+    ]
+
+
+def test_remove_with_limit_not_split(fast_poller, requests_mocker, client):
+    """Remove with a limit is never split, as the limit applies across all
+    removed units."""
+    client._MAX_IN_VALUES = 2
+
+    repo = Repository(id="some-repo")
+    repo.__dict__["_client"] = client
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/some-repo/actions/unassociate/",
+        json={"spawned_tasks": [{"task_id": "task1"}]},
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[{"task_id": "task1", "state": "finished"}],
+    )
+
+    crit = Criteria.and_(
+        Criteria.with_unit_type(RpmUnit),
+        Criteria.with_field("sha256sum", Matcher.in_(["1", "2", "3"])),
+    )
+    tasks = repo.remove_content(crit, limit=10).result()
+
+    assert [t.id for t in tasks] == ["task1"]
+
+
+def test_split_non_attrs_type_hint():
+    """Classes without attrs fields under the type hint don't prevent
+    splitting."""
+
+    class Base(object):
+        pass
+
+    class Plain(Base):
+        pass
+
+    crit = Criteria.with_field("name", Matcher.in_(["a", "b", "c"]))
+
+    assert len(split_criteria(crit, 2, Base)) == 2
+
+
+def test_split_deduplicates():
+    """Repeated values are removed before splitting, so no value appears in
+    more than one of the split criteria."""
+    crit = Criteria.with_field("name", Matcher.in_(["a", "b", "c", "b", "d", "a"]))
+
+    assert split_criteria(crit, 2) == [
+        Criteria.with_field("name", Matcher.in_(["a", "b"])),
+        Criteria.with_field("name", Matcher.in_(["c", "d"])),
+    ]
+
+    # Once deduplicated, small enough => no split
+    assert split_criteria(crit, 4) == [crit]
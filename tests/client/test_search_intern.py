@@ -0,0 +1,50 @@
+from pubtools.pulplib import Unit
+from pubtools.pulplib._impl.model.common import InternPool, interning
+
+
+def rpm_dict(name, arch, repos):
+    return {
+        "_id": "id-%s-%s" % (name, arch),
+        "_content_type_id": "rpm",
+        "name": name,
+        "version": "1.0",
+        "release": "1",
+        "arch": arch,
+        "repository_memberships": repos,
+    }
+
+
+def test_search_values_shared(client, requests_mocker):
+    """Repeated values are shared between units loaded from one search."""
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/", json=[{"id": "rpm"}]
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        json=[
+            rpm_dict("bash", "x86_64", ["repo2", "repo1"]),
+            rpm_dict("glibc", "x86_64", ["repo1", "repo2"]),
+            rpm_dict("kernel", "s390x", ["repo3"]),
+        ],
+    )
+
+    units = sorted(client.search_content().result(), key=lambda u: u.name)
+
+    assert units[0].arch is units[1].arch
+    assert units[0].repository_memberships == ["repo1", "repo2"]
+    assert units[0].repository_memberships is units[1].repository_memberships
+    assert units[2].repository_memberships == ["repo3"]
+
+
+def test_no_sharing_without_pool():
+    """Values are not shared when loading outside of an intern pool."""
+    data = [
+        rpm_dict("bash", "x86_64", ["repo1"]),
+        rpm_dict("glibc", "x86_64", ["repo1"]),
+    ]
+    units = [Unit.from_data(elem) for elem in data]
+    assert units[0].repository_memberships is not units[1].repository_memberships
+
+    with interning(InternPool()):
+        units = [Unit.from_data(elem) for elem in data]
+    assert units[0].repository_memberships is units[1].repository_memberships
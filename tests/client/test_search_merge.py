@@ -0,0 +1,268 @@
+import gc
+import threading
+import weakref
+from concurrent.futures import Future
+
+from more_executors.futures import f_flat_map, f_return
+
+from pubtools.pulplib import Criteria, Matcher, Page, RpmUnit
+from pubtools.pulplib._impl.client.paging import PageMerger, merge_pages
+
+
+def rpm_dict(type_id, name):
+    return {
+        "_id": "id-%s" % name,
+        "_content_type_id": type_id,
+        "name": name,
+        "version": "1.0",
+        "release": "1",
+        "arch": "x86_64" if type_id == "rpm" else "src",
+    }
+
+
+def test_search_content_types_independent(client, requests_mocker):
+    """search_content over several types yields pages from fast types without
+    waiting on slower types."""
+    client._PAGE_SIZE = 2
+
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "rpm"}, {"id": "srpm"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        [
+            {"json": [rpm_dict("rpm", "a"), rpm_dict("rpm", "b")]},
+            {"json": [rpm_dict("rpm", "c"), rpm_dict("rpm", "d")]},
+            {"json": [rpm_dict("rpm", "e")]},
+        ],
+    )
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/srpm/search/",
+        json=[rpm_dict("srpm", "f")],
+    )
+
+    # Arrange for the srpm search to be stalled until we say otherwise.
+    srpm_gate = Future()
+    do_search = client._do_search
+
+    def fake_do_search(pager, object_class):
+        if "/srpm/" in pager.url:
+            return f_flat_map(srpm_gate, lambda _: do_search(pager, object_class))
+        return do_search(pager, object_class)
+
+    client._do_search = fake_do_search
+
+    page = client.search_content(
+        Criteria.with_field("content_type_id", Matcher.in_(["rpm", "srpm"]))
+    ).result(10.0)
+
+    # Although srpm search hasn't completed, we can walk all the rpm pages.
+    names = []
+    while True:
+        names.extend([unit.name for unit in page.data])
+        if names == ["a", "b", "c", "d", "e"]:
+            break
+        page = page.next.result(10.0)
+
+    # There should now be just the srpm page left, which is not ready.
+    assert page.next
+    assert not page.next.done()
+
+    # Let srpm search complete and we should get the final page.
+    srpm_gate.set_result(None)
+    page = page.next.result(10.0)
+
+    assert page.data == [
+        RpmUnit(
+            unit_id="id-f",
+            content_type_id="srpm",
+            name="f",
+            version="1.0",
+            release="1",
+            arch="src",
+        )
+    ]
+    assert not page.next
+
+
+def test_search_content_types_error(client, requests_mocker):
+    """search_content over several types fails if any type fails."""
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "rpm"}, {"id": "srpm"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        json=[rpm_dict("rpm", "a")],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/srpm/search/",
+        status_code=400,
+    )
+
+    units_f = client.search_content()
+
+    # One page might have been yielded already, but iterating over all
+    # results must eventually fail.
+    exception = None
+    try:
+        list(units_f.result(10.0))
+    except Exception as ex:  # pylint: disable=broad-except
+        exception = ex
+
+    assert "400" in str(exception)
+
+
+class Elem(object):
+    pass
+
+
+def fast_stream(elems):
+    # Returns a future for a stream of pages, one per elem, all available.
+    page_f = None
+    for elem in reversed(elems):
+        page_f = f_return(Page(data=[elem], next=page_f))
+    return page_f
+
+
+def test_merge_pages_releases_delivered():
+    """Pages delivered from merged streams are not kept alive while waiting
+    on a slow stream."""
+
+    elems = [Elem() for _ in range(0, 5)]
+    refs = [weakref.ref(elem) for elem in elems]
+
+    slow_f = Future()
+    next_f = merge_pages([slow_f, fast_stream(elems)])
+    del elems
+
+    # Walk through all pages of the fast stream.
+    count = 0
+    while count < len(refs):
+        page = next_f.result(10.0)
+        count += len(page.data)
+        next_f = page.next
+        del page
+
+    gc.collect()
+
+    # The slow stream is still pending...
+    assert not next_f.done()
+
+    # ...but nothing delivered so far should still be alive.
+    assert [ref() for ref in refs] == [None] * len(refs)
+
+    # Once the slow stream completes, its page is delivered last.
+    slow_f.set_result(Page(data=["slow"]))
+    page = next_f.result(10.0)
+    assert page.data == ["slow"]
+    assert not page.next
+
+
+def test_merge_pages_input_error():
+    """If any input fails mid-merge, the merged stream fails and the other
+    inputs are cancelled."""
+    pending_f = Future()
+    first_f = f_return(Page(data=["a"], next=pending_f))
+    failing_f = Future()
+
+    page = merge_pages([first_f, failing_f]).result(10.0)
+    assert page.data == ["a"]
+
+    failing_f.set_exception(RuntimeError("simulated error"))
+
+    # The other input isn't needed any more.
+    assert pending_f.cancelled()
+
+    # And the merged stream fails with the same error.
+    exception = page.next.exception(10.0)
+    assert "simulated error" in str(exception)
+
+
+def test_merge_pages_cancel():
+    """Cancelling the merged stream cancels every input."""
+    input_fs = [Future(), Future()]
+
+    merged_f = merge_pages(input_fs)
+    assert merged_f.cancel()
+
+    assert [f.cancelled() for f in input_fs] == [True, True]
+
+
+def test_merge_pages_cancelled_while_delivering():
+    """The merged stream may be cancelled from within the merger while it's
+    delivering a page, as when garbage collection of an earlier page happens
+    to run at that point."""
+    input_fs = [Future(), Future()]
+    merger = PageMerger(input_fs)
+    out = merger.start()
+
+    new_output = merger._new_output
+
+    def new_output_cancelling():
+        # Delivering a page needs a future for the following page; simulate
+        # GC cancelling the current page as that's allocated.
+        out.cancel()
+        return new_output()
+
+    merger._new_output = new_output_cancelling
+
+    next_f = Future()
+    input_fs[0].set_result(Page(data=["a"], next=next_f))
+
+    # The page was not delivered, and all inputs were cancelled.
+    assert out.cancelled()
+    assert input_fs[1].cancelled()
+    assert next_f.cancelled()
+
+
+def test_search_content_gc_cancels(client, requests_mocker):
+    """Dropping a page of a search over several types cancels the search of
+    every type, with no more pages requested."""
+    client._PAGE_SIZE = 1
+
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "rpm"}, {"id": "srpm"}],
+    )
+
+    # Each type has several pages, but the second page of each one stays
+    # pending until the test says otherwise.
+    gate = threading.Event()
+    requested = []
+
+    def responder(type_id):
+        def respond(request, _context):
+            skip = request.json()["criteria"].get("skip", 0)
+            requested.append((type_id, skip))
+            if skip:
+                gate.wait(10.0)
+            return [rpm_dict(type_id, "%s-%s" % (type_id, skip))]
+
+        return respond
+
+    for type_id in ("rpm", "srpm"):
+        requests_mocker.post(
+            "https://pulp.example.com/pulp/api/v2/content/units/%s/search/" % type_id,
+            json=responder(type_id),
+        )
+
+    client._KEYSET_PAGINATION = False
+    page = client.search_content().result(10.0)
+    next_ref = weakref.ref(page.next)
+    assert page.data
+
+    # Drop the page without ever looking at the next one.
+    del page
+    gc.collect()
+
+    gate.set()
+    client._request_executor.shutdown(wait=True)
+
+    # The rest of the stream was cancelled...
+    assert next_ref() is None or next_ref().cancelled()
+
+    # ...and no page beyond the second of each type was requested.
+    assert all(skip <= 1 for (_, skip) in requested)
@@ -0,0 +1,103 @@
+from pubtools.pulplib import Criteria, FakeController, Matcher, RpmUnit
+from pubtools.pulplib._impl.client.optimize import optimize_criteria
+from pubtools.pulplib._impl.criteria import TrueCriteria
+from pubtools.pulplib._impl.client.search import filters_for_criteria
+
+
+def test_flatten_and_fold_true():
+    """Nested AND/OR are flattened and TRUE is folded out."""
+    a = Criteria.with_field("a", 1)
+    b = Criteria.with_field("b", 2)
+    c = Criteria.with_field("c", 3)
+
+    crit = Criteria.and_(a, Criteria.true(), Criteria.and_(b, Criteria.and_(c)))
+    assert optimize_criteria(crit) == Criteria.and_(a, b, c)
+
+    assert isinstance(optimize_criteria(Criteria.and_(Criteria.true())), TrueCriteria)
+    assert isinstance(optimize_criteria(Criteria.or_(a, Criteria.true())), TrueCriteria)
+    assert optimize_criteria(Criteria.and_(a)) == a
+
+
+def test_remove_duplicates():
+    """Duplicate operands are removed."""
+    a = Criteria.with_field("a", Matcher.regex("x"))
+    b = Criteria.with_field("b", Matcher.exists())
+
+    assert optimize_criteria(Criteria.and_(a, b, a)) == Criteria.and_(a, b)
+    assert optimize_criteria(Criteria.or_(a, Criteria.or_(a, b))) == Criteria.or_(a, b)
+
+
+def test_merge_eq_to_in():
+    """Equality matches on the same field within OR are merged to IN."""
+    crit = Criteria.or_(
+        Criteria.with_field("name", "a"),
+        Criteria.with_field("other", "x"),
+        Criteria.with_field("name", Matcher.in_(["b", "a"])),
+        Criteria.with_field("name", "c"),
+    )
+
+    assert filters_for_criteria(crit) == {
+        "$or": [
+            {"name": {"$in": ["a", "b", "c"]}},
+            {"other": {"$eq": "x"}},
+        ]
+    }
+
+
+def test_merge_keeps_distinct_types():
+    """Values equal in Python but not in Pulp are kept when merging."""
+    crit = Criteria.or_(Criteria.with_field("x", 1), Criteria.with_field("x", True))
+    assert filters_for_criteria(crit) == {"x": {"$in": [1, True]}}
+
+
+def test_no_merge_of_collections():
+    """Equality matches against collections are left alone."""
+    crit = Criteria.or_(
+        Criteria.with_field("x", ["a"]), Criteria.with_field("x", ["b"])
+    )
+    assert optimize_criteria(crit) == crit
+
+
+def test_empty_and_or_untouched():
+    """Empty AND/OR are not simplified, as Pulp rejects them."""
+    crit = Criteria.and_()
+    assert optimize_criteria(crit) is crit
+
+    crit = Criteria.or_()
+    assert optimize_criteria(crit) is crit
+
+
+def test_fake_search_optimized():
+    """Fake client gives same results for optimized criteria."""
+    controller = FakeController()
+    controller.insert_units(
+        None,
+        [
+            RpmUnit(
+                name=name,
+                version="1.0",
+                release="1",
+                arch="x86_64",
+                repository_memberships=["repo1", "repo2"],
+            )
+            for name in ("bash", "glibc", "kernel")
+        ],
+    )
+
+    crit = Criteria.or_(
+        *[
+            Criteria.and_(
+                Criteria.with_field("name", name),
+                Criteria.with_field("repository_memberships", "repo2"),
+            )
+            for name in ("bash", "kernel", "bash")
+        ]
+    )
+    units = list(controller.client.search_content(crit))
+    assert sorted(u.name for u in units) == ["bash", "kernel"]
+
+    crit = Criteria.or_(
+        Criteria.with_field("repository_memberships", "repo2"),
+        Criteria.with_field("repository_memberships", "repo3"),
+    )
+    assert len(list(controller.client.search_content(crit))) == 3
@@ -0,0 +1,127 @@
+import threading
+
+from pubtools.pulplib import Client
+
+
+class InFlightCounter(object):
+    # Wraps Client._do_search to track the number of searches in flight.
+    def __init__(self, client):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delegate = client._do_search
+        client._do_search = self
+
+    def done(self, _):
+        with self.lock:
+            self.in_flight -= 1
+
+    def __call__(self, *args):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        out = self.delegate(*args)
+        out.add_done_callback(self.done)
+        return out
+
+
+def make_repo_responder(page_size, count):
+    repo_ids = ["repo-%03d" % i for i in range(0, count)]
+
+    def respond(request, _context):
+        criteria = request.json()["criteria"]
+        skip = criteria.get("skip", 0)
+        after = criteria["filters"].get("id", {}).get("$gt", "")
+        found = [{"id": repo_id} for repo_id in repo_ids if repo_id > after]
+        return found[skip : skip + page_size]
+
+    return repo_ids, respond
+
+
+def test_search_readahead(requests_mocker):
+    """search_repository with page_readahead fetches later pages concurrently,
+    while still returning all results in order."""
+
+    with Client("https://pulp.example.com/", page_readahead=3) as client:
+        client._PAGE_SIZE = 10
+        counter = InFlightCounter(client)
+
+        repo_ids, respond = make_repo_responder(10, 95)
+        requests_mocker.post(
+            "https://pulp.example.com/pulp/api/v2/repositories/search/", json=respond
+        )
+
+        repos = list(client.search_repository())
+
+    # It should have returned all repos in the expected order
+    assert [r.id for r in repos] == repo_ids
+
+    # Several requests should have been in flight at once
+    assert 1 < counter.max_in_flight <= 3
+
+    # Pages were requested by offset, starting from the beginning
+    criteria = [h.json()["criteria"] for h in requests_mocker.request_history]
+    skips = sorted(c["skip"] for c in criteria)
+    assert skips[:10] == list(range(0, 100, 10))
+
+    # It can't have requested anything beyond a few pages past the end
+    assert max(skips) <= 120
+
+
+def test_search_readahead_default(requests_mocker):
+    """search_repository without page_readahead has only one request in flight."""
+
+    with Client("https://pulp.example.com/") as client:
+        client._PAGE_SIZE = 10
+        counter = InFlightCounter(client)
+
+        repo_ids, respond = make_repo_responder(10, 35)
+        requests_mocker.post(
+            "https://pulp.example.com/pulp/api/v2/repositories/search/", json=respond
+        )
+
+        repos = list(client.search_repository())
+
+    assert [r.id for r in repos] == repo_ids
+    assert counter.max_in_flight == 1
+    assert requests_mocker.call_count == 4
+
+
+def test_search_readahead_beyond_end(requests_mocker):
+    """search_repository with page_readahead larger than the number of pages
+    returns each result once, and discards pages read beyond the end."""
+
+    with Client("https://pulp.example.com/", page_readahead=5) as client:
+        client._PAGE_SIZE = 10
+        counter = InFlightCounter(client)
+
+        searches = []
+        delegate = counter.delegate
+
+        def record(pager, *args):
+            out = delegate(pager, *args)
+            searches.append((pager, out))
+            return out
+
+        counter.delegate = record
+
+        repo_ids, respond = make_repo_responder(10, 15)
+        requests_mocker.post(
+            "https://pulp.example.com/pulp/api/v2/repositories/search/", json=respond
+        )
+
+        repos = list(client.search_repository())
+
+    # It should have returned all repos once, in order
+    assert [r.id for r in repos] == repo_ids
+
+    # It kept reading ahead as far as allowed until the last page arrived,
+    # and no further
+    skips = sorted(pager.offset for (pager, _) in searches)
+    assert skips == [0, 10, 20, 30, 40, 50]
+    assert counter.max_in_flight <= 5
+
+    # Pages past the end were either cancelled or found nothing
+    for (pager, response_f) in searches:
+        if pager.offset >= 20:
+            assert response_f.cancelled() or response_f.result().count == 0
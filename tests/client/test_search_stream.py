@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from pubtools.pulplib import InvalidDataException, Repository
+from pubtools.pulplib._impl.client.stream import iter_json_array, iter_response_text
+
+
+def chunked(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class FakeResponse(object):
+    def __init__(self, content, encoding):
+        self.content = content
+        self.encoding = encoding
+
+    def iter_content(self, chunk_size):
+        return iter(chunked(self.content, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_iter_json_array(chunk_size):
+    """iter_json_array yields the same elements as json.loads, however the
+    input is split into chunks."""
+    values = [
+        {"id": "repo1", "notes": {"x": [1, 2, 3]}},
+        12345,
+        "some ] tricky, [ string",
+        [],
+        {},
+        None,
+        1.5e10,
+    ]
+    text = " \n[ %s ]\n " % " ,\n".join(json.dumps(v) for v in values)
+
+    assert list(iter_json_array(chunked(text, chunk_size))) == values
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "[\n]"])
+def test_iter_json_array_empty(text):
+    """iter_json_array handles empty arrays."""
+    assert list(iter_json_array(chunked(text, 1))) == []
+
+
+@pytest.mark.parametrize(
+    "text", ["", '{"a": 1}', "[1, 2", "[1 2]", '[{"a": 1]', "[1,]"]
+)
+def test_iter_json_array_invalid(text):
+    """iter_json_array raises on anything other than a complete JSON array."""
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunked(text, 2)))
+
+
+@pytest.mark.parametrize("encoding", [None, "utf-8", "utf-16", "iso-8859-1"])
+def test_iter_response_text(encoding):
+    """iter_response_text decodes multibyte characters split across chunks,
+    using UTF-8 if the response doesn't declare an encoding."""
+    text = '["caf\u00e9", "\u65e5\u672c", "\U0001f600"]'
+    if encoding == "iso-8859-1":
+        text = '["caf\u00e9", "na\u00efve"]'
+    response = FakeResponse(text.encode(encoding or "utf-8"), encoding)
+
+    chunks = list(iter_response_text(response, chunk_size=1))
+
+    assert "".join(chunks) == text
+    assert "" not in chunks
+    assert list(iter_json_array(chunks)) == json.loads(text)
+
+
+def test_iter_response_text_truncated():
+    """iter_response_text replaces an incomplete character at the end of a
+    response rather than dropping it or raising."""
+    response = FakeResponse('["caf\u00e9"]\u00e9'.encode("utf-8")[:-1], None)
+
+    chunks = list(iter_response_text(response, chunk_size=3))
+
+    assert "".join(chunks) == '["caf\u00e9"]\ufffd'
+    assert chunks[-1] == "\ufffd"
+
+
+def test_search_invalid_data_not_retried(client, requests_mocker):
+    """A search returning data which can't be converted to models fails
+    without retrying."""
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/",
+        json=[{"id": "repo1"}, {"not-a-repo": True}],
+    )
+
+    with pytest.raises(InvalidDataException):
+        client.search_repository().result()
+
+    assert requests_mocker.call_count == 1
+
+
+def test_search_large_response(client, requests_mocker):
+    """A search can handle a response much larger than the streaming chunk size."""
+    repos = [
+        {"id": "repo%s" % i, "notes": {"description": "x" * 5000}}
+        for i in range(0, 200)
+    ]
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/", json=repos
+    )
+
+    found = list(client.search_repository())
+
+    assert [r.id for r in found] == [r["id"] for r in repos]
+    assert all(isinstance(r, Repository) for r in found)
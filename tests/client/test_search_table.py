@@ -0,0 +1,257 @@
+import pytest
+
+from more_executors.futures import f_return
+
+from pubtools.pulplib import (
+    Criteria,
+    FakeController,
+    FileUnit,
+    Page,
+    RpmDependency,
+    RpmUnit,
+    Unit,
+    UnitTable,
+)
+from pubtools.pulplib._impl.table import table_from_pages
+
+
+def rpm_dict(name, version, arch, type_id="rpm"):
+    return {
+        "_id": "id-%s-%s-%s" % (name, version, arch),
+        "_content_type_id": type_id,
+        "name": name,
+        "version": version,
+        "release": "1",
+        "arch": arch,
+        "repository_memberships": ["repo1"],
+    }
+
+
+RPMS = [
+    rpm_dict("bash", "4.0", "x86_64"),
+    rpm_dict("bash", "5.0", "x86_64"),
+    rpm_dict("bash", "5.0", "s390x"),
+    rpm_dict("glibc", "2.28", "x86_64"),
+]
+
+FILES = [
+    {
+        "_id": "id-file",
+        "_content_type_id": "iso",
+        "name": "some.iso",
+        "size": 100,
+        "checksum": "a" * 64,
+    }
+]
+
+
+@pytest.fixture
+def table(client, requests_mocker):
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "rpm"}, {"id": "iso"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        json=RPMS,
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/iso/search/",
+        json=FILES,
+    )
+
+    out = client.search_content(as_table=True).result()
+    assert isinstance(out, UnitTable)
+    return out
+
+
+def sorted_table(table):
+    return table._take(
+        sorted(range(0, len(table)), key=lambda idx: table["unit_id"][idx])
+    )
+
+
+def test_search_as_table(table):
+    """search_content with as_table returns all results as columns."""
+    table = sorted_table(table)
+
+    assert len(table) == 5
+    assert "name" in table
+    assert "files" not in table
+
+    assert table["unit_id"] == [
+        "id-bash-4.0-x86_64",
+        "id-bash-5.0-s390x",
+        "id-bash-5.0-x86_64",
+        "id-file",
+        "id-glibc-2.28-x86_64",
+    ]
+    assert table["name"] == ["bash", "bash", "bash", None, "glibc"]
+    assert table["path"] == [None, None, None, "some.iso", None]
+
+    # Columns not applicable to some units hold None
+    assert table["arch"] == ["x86_64", "s390x", "x86_64", None, "x86_64"]
+    assert table["size"] == [None, None, None, 100, None]
+
+    # Values are converted in the same way as on units
+    assert table["repository_memberships"][0] == ["repo1"]
+
+
+def test_table_units_same_as_search(client, table):
+    """Units obtained from a table are the same as from a regular search."""
+    units = client.search_content().result()
+
+    assert sorted(table.units(), key=repr) == sorted(units, key=repr)
+    assert table.unit(-1) in units
+
+
+def test_table_where(table):
+    """where selects rows by column values."""
+    x86 = table.where(arch="x86_64")
+    assert sorted(x86["unit_id"]) == [
+        "id-bash-4.0-x86_64",
+        "id-bash-5.0-x86_64",
+        "id-glibc-2.28-x86_64",
+    ]
+
+    bash5 = table.where(name="bash", version=["5.0", "6.0"])
+    assert sorted(bash5["arch"]) == ["s390x", "x86_64"]
+
+    # Non-existent column never matches
+    assert len(table.where(whatever="x")) == 0
+
+
+def test_table_group_by(table):
+    """group_by splits a table by the values of columns."""
+    by_name = table.group_by("name")
+    assert set(by_name.keys()) == set(["bash", "glibc", None])
+    assert by_name[None]["path"] == ["some.iso"]
+    assert sorted(by_name["bash"]["version"]) == ["4.0", "5.0", "5.0"]
+
+    by_name_arch = table.where(content_type_id="rpm").group_by("name", "arch")
+    assert sorted(by_name_arch.keys()) == [
+        ("bash", "s390x"),
+        ("bash", "x86_64"),
+        ("glibc", "x86_64"),
+    ]
+    assert len(by_name_arch[("bash", "x86_64")]) == 2
+
+    with pytest.raises(TypeError):
+        table.group_by()
+
+
+def test_table_strings_interned(table):
+    """Repeated strings in a table are shared."""
+    names = [name for name in table["name"] if name == "bash"]
+    assert len(names) == 3
+    assert names[0] is names[1] is names[2]
+
+
+def test_table_with_projection(client, requests_mocker):
+    """Field projection in criteria is applied to search and table."""
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "rpm"}, {"id": "srpm"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        json=RPMS,
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/srpm/search/",
+        json=[rpm_dict("bash", "5.0", "src", "srpm")],
+    )
+
+    crit = Criteria.with_unit_type(RpmUnit, unit_fields=["name"])
+    table = client.search_content(crit, as_table=True).result()
+
+    for request in requests_mocker.request_history:
+        if request.method == "POST":
+            assert request.json()["criteria"]["fields"] == [
+                "arch",
+                "name",
+                "release",
+                "version",
+            ]
+    assert len(table) == 5
+    assert sorted(set(table["content_type_id"])) == ["rpm", "srpm"]
+
+
+def test_table_errors():
+    """UnitTable refuses inconsistent columns and bad indexes."""
+    with pytest.raises(ValueError):
+        UnitTable({"name": ["a", "b"], "arch": ["x86_64"]})
+
+    table = UnitTable({"content_type_id": ["iso"], "name": ["a"]})
+    with pytest.raises(IndexError):
+        table.unit(1)
+    assert repr(table) == "UnitTable(columns=['content_type_id', 'name'], len=1)"
+
+
+def test_table_from_units():
+    """A table can be created from units and converted back."""
+    units = [
+        RpmUnit(
+            name="bash",
+            version="4.0",
+            release="1",
+            arch="x86_64",
+            provides=[RpmDependency(name="sh")],
+        ),
+        FileUnit(path="some.iso", size=100, sha256sum="a" * 64),
+        Unit(content_type_id="other"),
+    ]
+
+    table = UnitTable.from_units(units)
+    assert table["path"] == [None, "some.iso", None]
+    assert table.units() == units
+
+
+def test_fake_search_as_table():
+    """Fake client supports as_table."""
+    controller = FakeController()
+    units = [
+        RpmUnit(name="bash", version="4.0", release="1", arch="x86_64"),
+        RpmUnit(name="bash", version="4.0", release="1", arch="s390x"),
+    ]
+    controller.insert_units(None, units)
+
+    client = controller.client
+    table = client.search_content(as_table=True).result()
+    assert sorted(table["arch"]) == ["s390x", "x86_64"]
+    assert sorted(table.units(), key=repr) == sorted(
+        client.search_content().result(), key=repr
+    )
+
+
+def test_table_lazy_fields(client, requests_mocker):
+    """Fields loaded lazily on units are loaded in full into a table."""
+    rpm = rpm_dict("bash", "4.0", "x86_64")
+    rpm["files"] = {"file": ["/bin/bash"]}
+    rpm["requires"] = [{"name": "glibc"}]
+
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/", json=[{"id": "rpm"}]
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/rpm/search/",
+        json=[rpm],
+    )
+
+    table = client.search_content(as_table=True).result()
+
+    assert table["files"] == [["/bin/bash"]]
+    assert table["requires"] == [[RpmDependency(name="glibc")]]
+    assert table.units() == list(client.search_content().result())
+
+
+def test_table_from_completed_pages():
+    """A table can be built from pages which were all fetched already."""
+    rows = [{"content_type_id": "iso", "name": str(i)} for i in range(0, 3)]
+
+    page = Page(data=[rows[2]])
+    page = Page(data=[rows[1]], next=f_return(page))
+    page = Page(data=[rows[0]], next=f_return(page))
+
+    table = table_from_pages(f_return(page)).result()
+    assert table["name"] == ["0", "1", "2"]
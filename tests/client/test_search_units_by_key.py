@@ -0,0 +1,59 @@
+import pytest
+
+from pubtools.pulplib import FileUnit, Unit
+
+
+def test_get_units_by_key(client, requests_mocker):
+    """get_units_by_key searches Pulp by unit key and returns the found unit,
+    or None, for each key."""
+    requests_mocker.get(
+        "https://pulp.example.com/pulp/api/v2/plugins/types/",
+        json=[{"id": "iso"}],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/units/iso/search/",
+        json=[
+            {
+                "_content_type_id": "iso",
+                "_id": "unit-a",
+                "name": "a.iso",
+                "checksum": "a" * 64,
+                "size": 1,
+            }
+        ],
+    )
+
+    wanted = [
+        FileUnit(path="a.iso", size=1, sha256sum="a" * 64),
+        FileUnit(path="a.iso", size=1, sha256sum="b" * 64),
+        FileUnit(path="a.iso", size=1, sha256sum="a" * 64),
+    ]
+
+    found = client.get_units_by_key(wanted).result()
+
+    # There's an entry per distinct key, keyed by type and public unit key.
+    assert found == {
+        (FileUnit, wanted[0].unit_key): FileUnit(
+            path="a.iso", size=1, sha256sum="a" * 64, unit_id="unit-a"
+        ),
+        (FileUnit, wanted[1].unit_key): None,
+    }
+    assert FileUnit.unit_key_fields() == ("path", "size", "sha256sum")
+    assert wanted[0].unit_key == ("a.iso", 1, "a" * 64)
+
+    # It was found by a single search, with all keys grouped into an in_.
+    [request] = [r for r in requests_mocker.request_history if r.method == "POST"]
+    assert request.json()["criteria"]["filters"] == {
+        "$and": [
+            {"name": {"$eq": "a.iso"}},
+            {"size": {"$eq": 1}},
+            {"checksum": {"$in": ["a" * 64, "b" * 64]}},
+        ]
+    }
+
+
+def test_get_units_by_key_no_unit_key(client):
+    """get_units_by_key raises for units of a type without a unit key."""
+    with pytest.raises(TypeError) as exc_info:
+        client.get_units_by_key([Unit(content_type_id="x")])
+    assert "Unit has no unit key" in str(exc_info.value)
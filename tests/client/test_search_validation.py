@@ -0,0 +1,85 @@
+import pytest
+
+from pubtools.pulplib import Client, InvalidDataException, Repository
+from pubtools.pulplib._impl.model.common import schema_validator
+
+
+# Data which doesn't match the repository schema, but can still be loaded.
+SCHEMA_INVALID_REPO = {"id": "bad-repo", "notes": {"include_in_download_service": "x"}}
+
+
+def mock_repos(requests_mocker, repos):
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/search/", json=repos
+    )
+
+
+def test_validation_full_by_default(client, requests_mocker):
+    """Search results are validated against the schema by default."""
+    mock_repos(requests_mocker, [{"id": "repo1"}, SCHEMA_INVALID_REPO])
+
+    with pytest.raises(InvalidDataException):
+        client.search_repository().result()
+
+
+def test_validation_off(requests_mocker):
+    """With validation off, search results are loaded without schema validation."""
+    mock_repos(requests_mocker, [{"id": "repo1"}, SCHEMA_INVALID_REPO])
+
+    with Client("https://pulp.example.com/", validation="off") as client:
+        repos = list(client.search_repository())
+
+    assert [r.id for r in repos] == ["repo1", "bad-repo"]
+
+
+def test_validation_off_still_fails_unloadable(requests_mocker):
+    """With validation off, data which can't be loaded still raises."""
+    mock_repos(requests_mocker, [{"id": "repo1"}, {"not-a-repo": True}])
+
+    with Client("https://pulp.example.com/", validation="off") as client:
+        with pytest.raises(InvalidDataException):
+            client.search_repository().result()
+
+
+def test_validation_sampled(requests_mocker):
+    """With sampled validation, only some of the search results are validated."""
+    with Client("https://pulp.example.com/", validation="sampled") as client:
+        mock_repos(requests_mocker, [{"id": "repo1"}, SCHEMA_INVALID_REPO])
+
+        # Only the first object is sampled, so the invalid one gets through.
+        repos = list(client.search_repository())
+        assert [r.id for r in repos] == ["repo1", "bad-repo"]
+
+        # A sample is taken every 100 objects, so this time the invalid data
+        # is validated.
+        mock_repos(requests_mocker, [{"id": "repo%s" % i} for i in range(0, 98)])
+        assert len(list(client.search_repository())) == 98
+
+        mock_repos(requests_mocker, [SCHEMA_INVALID_REPO])
+        with pytest.raises(InvalidDataException):
+            client.search_repository().result()
+
+
+def test_validation_invalid_mode():
+    """Client refuses unknown validation modes."""
+    with pytest.raises(ValueError) as exc_info:
+        Client("https://pulp.example.com/", validation="some")
+
+    assert "Invalid validation mode 'some'" in str(exc_info.value)
+
+
+def test_validation_does_not_leak(requests_mocker):
+    """The client's validation setting does not apply to from_data calls
+    made outside of the client."""
+    mock_repos(requests_mocker, [{"id": "repo1"}])
+
+    with Client("https://pulp.example.com/", validation="off") as client:
+        assert list(client.search_repository())
+
+    with pytest.raises(InvalidDataException):
+        Repository.from_data(SCHEMA_INVALID_REPO)
+
+
+def test_schema_validator_cached():
+    """Compiled schema validators are reused across calls."""
+    assert schema_validator(Repository) is schema_validator(Repository)
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from pubtools.pulplib._impl.client.upload_state import UploadStateStore
+
+
+@pytest.fixture
+def state_dir(tmpdir):
+    return str(tmpdir.mkdir("upload-state"))
+
+
+def test_claim_locked_across_stores(state_dir, somefile):
+    """A state in use via one store can't be claimed via another store on the
+    same directory, as with another process."""
+    store1 = UploadStateStore(state_dir)
+    store2 = UploadStateStore(state_dir)
+
+    store1.create(somefile, "upload1", 10)
+
+    # In use by store1, so store2 can't have it.
+    assert store2.claim(somefile) is None
+
+    # Once released, it can be claimed, but then only once.
+    store1.release("upload1")
+    state = store2.claim(somefile)
+    assert state.upload_id == "upload1"
+    assert store1.claim(somefile) is None
+
+    # Closing a store releases everything it holds.
+    store2.close()
+    assert store1.claim(somefile).upload_id == "upload1"
+
+
+def test_claim_after_remove(state_dir, somefile):
+    """A state removed while another store was trying to claim it is not
+    claimed."""
+    store1 = UploadStateStore(state_dir)
+    store2 = UploadStateStore(state_dir)
+
+    store1.create(somefile, "upload1", 10)
+    store1.remove("upload1")
+
+    assert store2.claim(somefile) is None
+    assert os.listdir(state_dir) == []
+
+
+def test_claim_skips_other_files(state_dir, somefile, tmpdir):
+    """Claiming state of a file ignores state of other files and state which
+    can't be loaded."""
+    store = UploadStateStore(state_dir)
+
+    otherfile = tmpdir.join("other-file")
+    otherfile.write(b"other content")
+    store.create(str(otherfile), "other", 10)
+    store.release("other")
+
+    # Corrupt state for this file.
+    state = store.create(somefile, "broken", 10)
+    store.release("broken")
+    with open(state.filename, "wt") as f:
+        f.write("{not json")
+
+    assert store.claim(somefile) is None
+
+
+def test_matches_missing_file(state_dir, somefile):
+    """State doesn't match a file which no longer exists."""
+    store = UploadStateStore(state_dir)
+    state = store.create(somefile, "upload1", 10)
+    assert state.matches(somefile)
+
+    os.remove(somefile)
+    assert not state.matches(somefile)
+
+
+def test_remove_inactive(state_dir, somefile):
+    """State of an upload which isn't active can be removed by upload ID,
+    even if some files are already gone."""
+    store = UploadStateStore(state_dir)
+    state = store.create(somefile, "upload1", 10)
+    store.release("upload1")
+    os.remove(state.filename + ".lock")
+
+    store.remove("upload1")
+
+    assert os.listdir(state_dir) == []
@@ -2,7 +2,12 @@
 
 import os
 
-from pubtools.pulplib._impl.comps import units_for_xml, fill_unit_field_defaults
+from pubtools.pulplib._impl.comps import (
+    units_for_xml,
+    fill_unit_field_defaults,
+    unit_key,
+    units_equal,
+)
 
 # Don't use autoformatting in this file because we use u'' string literals
 # at least until py2 support is dropped, and black wants to remove them...
@@ -248,3 +253,20 @@ def test_fill_unit_field_defaults():
     units = fill_unit_field_defaults(units)
 
     assert units == expected
+
+
+def test_unit_key_and_equal():
+    """Units are identified by type and id, and compared on comps fields only."""
+    group = {"_content_type_id": "package_group", "id": "group1",
+             "repo_id": "repo1", "name": "Group 1"}
+    stored = dict(group, _id="unit-1", _last_updated=1234)
+    category = dict(group, _content_type_id="package_category")
+
+    assert unit_key(group) == unit_key(stored) == ("package_group", "group1")
+    assert unit_key(category) != unit_key(group)
+    assert unit_key({"_content_type_id": "package_langpacks"}) == \
+        ("package_langpacks", None)
+
+    assert units_equal(group, stored)
+    assert not units_equal(group, dict(group, name="Other"))
+    assert not units_equal(group, category)
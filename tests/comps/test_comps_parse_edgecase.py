@@ -1,9 +1,10 @@
+import os
 from io import BytesIO
 from xml.parsers import expat
 
 import pytest
 
-from pubtools.pulplib._impl.comps import units_for_xml
+from pubtools.pulplib._impl.comps import CompsParser, units_for_xml
 
 
 def test_can_parse_empty_root():
@@ -35,3 +36,40 @@ def test_unclosed_error():
 
     with pytest.raises(expat.ExpatError):
         units_for_xml(buf)
+
+
+def test_feed_incremental(data_path):
+    """CompsParser gives the same units when fed a document in tiny pieces."""
+
+    with open(os.path.join(data_path, "sample-comps.xml"), "rb") as f:
+        doc = f.read()
+
+    parser = CompsParser()
+    units = []
+    for i in range(0, len(doc), 7):
+        units.extend(parser.feed(doc[i : i + 7]))
+    units.extend(parser.feed(b"", final=True))
+
+    assert units == units_for_xml(BytesIO(doc))
+
+
+def test_iter_yields_early():
+    """iter_units_for_xml yields each unit once its element has closed, before
+    the rest of the document has been parsed."""
+
+    buf = BytesIO(
+        b"<comps><group><id>g1</id></group><category><id>c1</id></category>"
+        b"<group><id>oops, unclosed"
+    )
+    parser = CompsParser()
+    parser.READ_SIZE = 10
+
+    units = parser.parse(buf)
+
+    # The complete units can be obtained...
+    assert next(units)["id"] == "g1"
+    assert next(units)["id"] == "c1"
+
+    # ...and only then is the error found.
+    with pytest.raises(expat.ExpatError):
+        next(units)
@@ -7,6 +7,9 @@ from pubtools.pulplib import Client
 from pubtools.pulplib._impl.client.poller import TaskPoller
 from pubtools.pulplib._impl.client.retry import PulpRetryPolicy
 
+# Content of the somefile fixture: 5 lines of 10 bytes.
+UPLOAD_CONTENT = b"".join(b"%09d\n" % i for i in range(0, 5))
+
 
 @pytest.fixture
 def requests_mocker():
@@ -58,6 +61,14 @@ def data_path():
     return os.path.join(os.path.dirname(__file__), "data")
 
 
+@pytest.fixture
+def somefile(tmpdir):
+    """Returns path to a small file, holding UPLOAD_CONTENT, to be uploaded."""
+    out = tmpdir.join("some-file")
+    out.write(UPLOAD_CONTENT)
+    return str(out)
+
+
 class FastRetryPolicy(PulpRetryPolicy):
     def __init__(self):
         super(FastRetryPolicy, self).__init__(max_attempts=6, max_sleep=0.001)
@@ -1,6 +1,7 @@
 import pytest
 
-from pubtools.pulplib import Criteria
+from pubtools.pulplib import Criteria, ErratumUnit, FileUnit, Unit
+from pubtools.pulplib._impl.client.search import filters_for_criteria
 
 
 def test_field_in_str_invalid():
@@ -20,3 +21,48 @@ def test_unit_type_invalid():
     with pytest.raises(TypeError) as exc_info:
         Criteria.with_unit_type([1, 2, 3])
     assert "Expected a Unit type, got: [1, 2, 3]" in str(exc_info.value)
+
+
+def test_unit_keys_grouped():
+    """Criteria.with_unit_keys groups keys into in_ matches."""
+    units = [
+        FileUnit(path="a.iso", size=1, sha256sum="a" * 64),
+        FileUnit(path="a.iso", size=1, sha256sum="b" * 64),
+        FileUnit(path="c.iso", size=2, sha256sum="c" * 64),
+        FileUnit(path="c.iso", size=2, sha256sum="c" * 64),
+    ]
+    crit = Criteria.with_unit_keys(units)
+
+    assert filters_for_criteria(crit, Unit) == {
+        "$or": [
+            {
+                "$and": [
+                    {"name": {"$eq": "a.iso"}},
+                    {"size": {"$eq": 1}},
+                    {"checksum": {"$in": ["a" * 64, "b" * 64]}},
+                ]
+            },
+            {
+                "$and": [
+                    {"name": {"$eq": "c.iso"}},
+                    {"size": {"$eq": 2}},
+                    {"checksum": {"$eq": "c" * 64}},
+                ]
+            },
+        ]
+    }
+
+
+def test_unit_keys_invalid():
+    """Criteria.with_unit_keys raises on empty or mixed units."""
+    with pytest.raises(ValueError):
+        Criteria.with_unit_keys([])
+
+    with pytest.raises(ValueError) as exc_info:
+        Criteria.with_unit_keys([ErratumUnit(id="x"), Unit(content_type_id="x")])
+    assert "got: ErratumUnit, Unit" in str(exc_info.value)
+
+    # A unit type needs a unit key to be searched by it.
+    with pytest.raises(TypeError) as exc_info:
+        Criteria.with_unit_keys([Unit(content_type_id="x")])
+    assert "Unit has no unit key" in str(exc_info.value)
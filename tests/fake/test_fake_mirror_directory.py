@@ -0,0 +1,149 @@
+import hashlib
+
+import pytest
+from mock import patch
+from more_executors.futures import f_return_error
+
+from pubtools.pulplib import FakeController, FileRepository, FileUnit, DetachedException
+
+
+def unit_for(path, content):
+    return FileUnit(
+        path=path, sha256sum=hashlib.sha256(content).hexdigest(), size=len(content)
+    )
+
+
+@pytest.fixture
+def local_dir(tmpdir):
+    out = tmpdir.mkdir("local")
+    out.join("same.txt").write(b"same content")
+    out.join("changed.txt").write(b"new content!")
+    out.join("sub").mkdir().join("new.txt").write(b"new file")
+    return out
+
+
+def test_mirror_directory(local_dir):
+    """mirror_directory uploads only new and changed files, and removes
+    stale files."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+    controller.insert_units(
+        FileRepository(id="repo1"),
+        [
+            unit_for("same.txt", b"same content"),
+            # Same size, different content
+            unit_for("changed.txt", b"old content!"),
+            unit_for("stale.txt", b"whatever"),
+        ],
+    )
+
+    client = controller.client
+    repo1 = client.get_repository("repo1").result()
+
+    with patch.object(
+        client, "_do_upload_file", wraps=client._do_upload_file
+    ) as upload:
+        tasks = repo1.mirror_directory(str(local_dir)).result()
+
+    uploaded = sorted(call.args[1] for call in upload.call_args_list)
+    assert uploaded == [
+        str(local_dir.join("changed.txt")),
+        str(local_dir.join("sub", "new.txt")),
+    ]
+    assert tasks
+
+    units = sorted(repo1.search_content(), key=lambda u: u.path)
+    assert [(u.path, u.size) for u in units] == [
+        ("changed.txt", 12),
+        ("same.txt", 12),
+        ("sub/new.txt", 8),
+    ]
+    assert units[0].sha256sum == hashlib.sha256(b"new content!").hexdigest()
+
+    # Doing it again does nothing at all.
+    with patch.object(client, "_do_upload_file") as upload:
+        assert repo1.mirror_directory(str(local_dir)).result() == []
+    assert upload.call_count == 0
+
+
+def test_mirror_directory_prefix(local_dir):
+    """mirror_directory with a prefix only touches files under the prefix."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+    controller.insert_units(
+        FileRepository(id="repo1"),
+        [
+            unit_for("isos/same.txt", b"same content"),
+            unit_for("isos/stale.txt", b"whatever"),
+            unit_for("other/stale.txt", b"whatever"),
+        ],
+    )
+
+    repo1 = controller.client.get_repository("repo1").result()
+    repo1.mirror_directory(str(local_dir), prefix="isos").result()
+
+    assert sorted(u.path for u in repo1.search_content()) == [
+        "isos/changed.txt",
+        "isos/same.txt",
+        "isos/sub/new.txt",
+        "other/stale.txt",
+    ]
+
+
+def test_mirror_directory_detached(tmpdir):
+    """mirror_directory raises if called on a detached repo."""
+    with pytest.raises(DetachedException):
+        FileRepository(id="repo").mirror_directory(str(tmpdir))
+
+
+def test_mirror_directory_upload_fails(local_dir):
+    """If any upload fails, mirror_directory fails without removing anything."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+    controller.insert_units(
+        FileRepository(id="repo1"), [unit_for("stale.txt", b"whatever")]
+    )
+
+    client = controller.client
+    repo1 = client.get_repository("repo1").result()
+
+    error = RuntimeError("simulated error")
+    with patch.object(client, "_do_upload_file", return_value=f_return_error(error)):
+        with pytest.raises(RuntimeError) as excinfo:
+            repo1.mirror_directory(str(local_dir)).result()
+
+    assert excinfo.value is error
+    assert [u.path for u in repo1.search_content()] == ["stale.txt"]
+
+
+def test_mirror_missing_directory(tmpdir):
+    """mirror_directory raises, and removes nothing, if the local directory
+    doesn't exist."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+    controller.insert_units(
+        FileRepository(id="repo1"), [unit_for("some.txt", b"some content")]
+    )
+
+    repo1 = controller.client.get_repository("repo1").result()
+
+    with pytest.raises(OSError):
+        repo1.mirror_directory(str(tmpdir.join("no-such-dir")))
+
+    # The repo's content is untouched.
+    assert [u.path for u in repo1.search_content()] == ["some.txt"]
+
+
+def test_mirror_unreadable_directory(local_dir):
+    """mirror_directory raises if part of the local directory can't be read."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+
+    def broken_scandir(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    with patch("os.scandir", broken_scandir):
+        with pytest.raises(PermissionError):
+            repo1.mirror_directory(str(local_dir))
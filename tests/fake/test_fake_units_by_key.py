@@ -0,0 +1,84 @@
+from pubtools.pulplib import (
+    FakeController,
+    ErratumUnit,
+    FileUnit,
+    RpmUnit,
+)
+
+
+def test_get_units_by_key():
+    """get_units_by_key finds units of several types by key."""
+    controller = FakeController()
+
+    iso = FileUnit(path="a.iso", size=1, sha256sum="a" * 64, description="A")
+    other_iso = FileUnit(path="b.iso", size=1, sha256sum="a" * 64)
+    rpm = RpmUnit(
+        name="bash",
+        version="5.0",
+        release="1",
+        arch="x86_64",
+        sha256sum="b" * 64,
+        filename="bash-5.0-1.x86_64.rpm",
+    )
+    erratum = ErratumUnit(id="RHSA-1234", title="fix")
+    controller.insert_units(None, [iso, other_iso, rpm, erratum])
+
+    wanted = [
+        FileUnit(path="a.iso", size=1, sha256sum="a" * 64),
+        FileUnit(path="missing.iso", size=1, sha256sum="a" * 64),
+        RpmUnit(
+            name="bash", version="5.0", release="1", arch="x86_64", sha256sum="b" * 64
+        ),
+        ErratumUnit(id="RHSA-1234"),
+        ErratumUnit(id="RHSA-missing"),
+    ]
+
+    found = controller.client.get_units_by_key(wanted).result()
+
+    # Result is keyed by unit type and unit key, with missing units
+    # reported as None.
+    keys = [(type(unit), unit.unit_key) for unit in wanted]
+    assert set(found.keys()) == set(keys)
+    assert found[keys[0]].description == "A"
+    assert found[keys[1]] is None
+    assert found[keys[2]].filename == "bash-5.0-1.x86_64.rpm"
+    assert found[keys[3]].title == "fix"
+    assert found[keys[4]] is None
+
+    # Unit keys are ordered as the unit key fields.
+    assert keys[2] == (RpmUnit, ("bash", "5.0", "1", "x86_64", "0", "b" * 64))
+    assert RpmUnit.unit_key_fields() == (
+        "name",
+        "version",
+        "release",
+        "arch",
+        "epoch",
+        "sha256sum",
+    )
+
+
+def test_get_units_by_key_many(monkeypatch):
+    """get_units_by_key finds units needing several searches."""
+    monkeypatch.setattr("pubtools.pulplib._impl.client.unit_keys.KEYS_PER_SEARCH", 4)
+    controller = FakeController()
+
+    units = [
+        FileUnit(path="file%d" % i, size=i, sha256sum="%064x" % i) for i in range(0, 10)
+    ]
+    controller.insert_units(None, units[::2])
+
+    found = controller.client.get_units_by_key(units).result()
+
+    assert len(found) == 10
+    for (i, unit) in enumerate(units):
+        key = (FileUnit, unit.unit_key)
+        if i % 2 == 0:
+            assert found[key].unit_id
+        else:
+            assert found[key] is None
+
+
+def test_get_units_by_key_empty():
+    """get_units_by_key with no units returns an empty dict."""
+    client = FakeController().client
+    assert client.get_units_by_key([]).result() == {}
@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from mock import patch
+
+from pubtools.pulplib import (
+    FakeController,
+    FileRepository,
+    YumRepository,
+    Task,
+    DetachedException,
+)
+
+
+def test_upload_files(tmpdir):
+    """upload_files uploads every file, returning an outcome per item."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+
+    items = []
+    for i in range(0, 10):
+        somefile = tmpdir.join("file%s.txt" % i)
+        # Sizes vary, so files are not uploaded in the given order.
+        somefile.write(b"x" * ((i * 7919) % 100))
+        items.append(str(somefile))
+
+    items.append({"file_obj": str(items.pop(0)), "relative_url": "other/"})
+    items.append({"file_obj": io.BytesIO(b"data"), "relative_url": "obj.txt"})
+    # A file object with no name can't be uploaded without relative_url.
+    items.append(io.BytesIO(b"no name"))
+
+    outcomes = repo1.upload_files(items).result()
+
+    assert len(outcomes) == len(items)
+    for outcome in outcomes[:-1]:
+        assert isinstance(outcome[0], Task)
+        assert outcome[0].succeeded
+    assert isinstance(outcomes[-1], ValueError)
+
+    paths = sorted(unit.path for unit in repo1.search_content())
+    assert paths == ["file%s.txt" % i for i in range(1, 10)] + [
+        "obj.txt",
+        "other/file0.txt",
+    ]
+
+
+def test_upload_files_weight(tmpdir):
+    """upload_files passes the weight of each item through to the upload."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+
+    client = controller.client
+    repo1 = client.get_repository("repo1").result()
+
+    files = []
+    for name in ["a.txt", "b.txt"]:
+        somefile = tmpdir.join(name)
+        somefile.write(name)
+        files.append(str(somefile))
+
+    with patch.object(client, "_do_upload_file", wraps=client._do_upload_file) as spy:
+        repo1.upload_files(
+            [files[0], {"file_obj": files[1], "weight": 5}], weight=2
+        ).result()
+
+    weights = sorted((c[0][1], c[0][3]) for c in spy.call_args_list)
+    assert weights == [(files[0], 2), (files[1], 5)]
+
+
+def test_upload_files_empty():
+    """upload_files with no items succeeds with no outcomes."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+    assert repo1.upload_files([]).result() == []
+
+
+def test_upload_rpms_failure_isolated(tmpdir):
+    """upload_rpms returns the failure of each item separately."""
+    controller = FakeController()
+    controller.insert_repository(YumRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+    outcomes = repo1.upload_rpms(
+        [str(tmpdir.join("missing1.rpm")), {"file_obj": str(tmpdir.join("m2.rpm"))}]
+    ).result()
+
+    assert len(outcomes) == 2
+    assert all(isinstance(o, Exception) for o in outcomes)
+
+
+def test_upload_batch_detached():
+    """Batch uploads raise if called on a detached repo."""
+    with pytest.raises(DetachedException):
+        FileRepository(id="repo").upload_files(["some-file"])
+
+    with pytest.raises(DetachedException):
+        YumRepository(id="repo").upload_rpms(["some-file"])
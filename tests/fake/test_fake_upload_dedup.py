@@ -0,0 +1,101 @@
+import hashlib
+import io
+
+from mock import patch
+
+from pubtools.pulplib import FakeController, FileRepository, YumRepository, RpmUnit
+
+
+def upload_spy(client):
+    return patch.object(client, "_do_upload_file", wraps=client._do_upload_file)
+
+
+def test_upload_file_dedup(tmpdir):
+    """upload_file with dedup reuses a unit with the same key."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+    controller.insert_repository(FileRepository(id="repo2"))
+
+    client = controller.client
+    repo1 = client.get_repository("repo1").result()
+    repo2 = client.get_repository("repo2").result()
+
+    somefile = tmpdir.join("some-file.txt")
+    somefile.write(b"there is some binary data:\x00\x01\x02")
+
+    repo1.upload_file(str(somefile)).result()
+
+    with upload_spy(client) as spy:
+        # Same content at same path => no upload, copied into repo2.
+        repo2.upload_file(str(somefile), dedup=True, cdn_path="/some/path").result()
+        assert spy.call_count == 0
+
+        [unit] = list(repo2.search_content())
+        assert unit.path == "some-file.txt"
+        assert unit.cdn_path == "/some/path"
+        assert sorted(unit.repository_memberships) == ["repo1", "repo2"]
+
+        # Uploading again into a repo already holding the unit does nothing.
+        repo1.upload_file(str(somefile), dedup=True).result()
+        assert spy.call_count == 0
+
+        # Same content at a different path is a different unit => uploaded.
+        repo2.upload_file(str(somefile), relative_url="other.txt", dedup=True).result()
+        assert spy.call_count == 1
+        assert sorted(u.path for u in repo2.search_content()) == [
+            "other.txt",
+            "some-file.txt",
+        ]
+
+
+def test_upload_file_dedup_unseekable():
+    """upload_file with dedup always uploads from unseekable file objects."""
+    controller = FakeController()
+    controller.insert_repository(FileRepository(id="repo1"))
+
+    client = controller.client
+    repo1 = client.get_repository("repo1").result()
+
+    class Unseekable(io.BytesIO):
+        def seekable(self):
+            return False
+
+    repo1.upload_file(io.BytesIO(b"data"), relative_url="a.txt").result()
+
+    with upload_spy(client) as spy:
+        repo1.upload_file(
+            Unseekable(b"data"), relative_url="a.txt", dedup=True
+        ).result()
+        assert spy.call_count == 1
+
+
+def test_upload_rpm_dedup():
+    """upload_rpm with dedup reuses an RPM with the same checksum."""
+    controller = FakeController()
+    controller.insert_repository(YumRepository(id="repo1"))
+    controller.insert_repository(YumRepository(id="repo2"))
+
+    rpm_bytes = b"not really an RPM"
+    controller.insert_units(
+        controller.client.get_repository("repo1").result(),
+        [
+            RpmUnit(
+                name="walrus",
+                version="5.21",
+                release="1",
+                arch="noarch",
+                sha256sum=hashlib.sha256(rpm_bytes).hexdigest(),
+            )
+        ],
+    )
+
+    client = controller.client
+    repo2 = client.get_repository("repo2").result()
+
+    with upload_spy(client) as spy:
+        repo2.upload_rpm(io.BytesIO(rpm_bytes), dedup=True).result()
+        assert spy.call_count == 0
+
+    [unit] = list(repo2.search_content())
+    assert unit.name == "walrus"
+    assert sorted(unit.repository_memberships) == ["repo1", "repo2"]
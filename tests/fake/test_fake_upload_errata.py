@@ -0,0 +1,109 @@
+import pytest
+
+from pubtools.pulplib import (
+    FakeController,
+    ErratumUnit,
+    ErratumPackageCollection,
+    ErratumPackage,
+    YumRepository,
+    Task,
+    DetachedException,
+)
+
+
+def make_erratum(i, **kwargs):
+    fields = dict(
+        id="RHBA-1234:%02d" % i,
+        summary="advisory %s" % i,
+        version="1",
+        pkglist=[
+            ErratumPackageCollection(
+                name="coll",
+                packages=[
+                    ErratumPackage(
+                        name="pkg%s" % i,
+                        filename="pkg%s-1.0-1.noarch.rpm" % i,
+                        arch="noarch",
+                        version="1.0",
+                        release="1",
+                        epoch="0",
+                    )
+                ],
+            )
+        ],
+    )
+    fields.update(kwargs)
+    return ErratumUnit(**fields)
+
+
+def test_upload_errata():
+    """upload_errata uploads every erratum, returning an outcome per erratum."""
+    controller = FakeController()
+    controller.insert_repository(YumRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+
+    errata = [make_erratum(i) for i in range(0, 10)]
+    outcomes = repo1.upload_errata(errata).result()
+
+    assert len(outcomes) == len(errata)
+    for outcome in outcomes:
+        assert isinstance(outcome[0], Task)
+        assert outcome[0].succeeded
+
+    assert sorted(u.id for u in repo1.search_content()) == sorted(e.id for e in errata)
+
+
+def test_upload_errata_skips_unchanged():
+    """upload_errata does not upload errata identical to those in the repo."""
+    controller = FakeController()
+    controller.insert_repository(YumRepository(id="repo1"))
+    controller.insert_repository(YumRepository(id="repo2"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+    repo2 = controller.client.get_repository("repo2").result()
+
+    assert repo1.upload_errata([make_erratum(i) for i in range(0, 4)]).result()
+
+    errata = [
+        # unchanged
+        make_erratum(0),
+        # changed
+        make_erratum(1, summary="updated", version="2"),
+        # unchanged, and other repo memberships make no difference
+        make_erratum(2, repository_memberships=["other"]),
+        # new
+        make_erratum(4),
+    ]
+    outcomes = repo1.upload_errata(errata).result()
+
+    # Only the changed and new errata were uploaded
+    assert outcomes[0] == []
+    assert outcomes[1][0].succeeded
+    assert outcomes[2] == []
+    assert outcomes[3][0].succeeded
+
+    units = {u.id: u for u in repo1.search_content()}
+    assert sorted(units) == ["RHBA-1234:%02d" % i for i in range(0, 5)]
+    assert units["RHBA-1234:01"].summary == "updated"
+
+    # Errata in a different repo are still uploaded to this repo
+    outcomes = repo2.upload_errata([make_erratum(0)]).result()
+    assert outcomes[0][0].succeeded
+    assert [u.id for u in repo2.search_content()] == ["RHBA-1234:00"]
+
+
+def test_upload_errata_empty():
+    """upload_errata with no errata does nothing."""
+    controller = FakeController()
+    controller.insert_repository(YumRepository(id="repo1"))
+
+    repo1 = controller.client.get_repository("repo1").result()
+
+    assert repo1.upload_errata([]).result() == []
+
+
+def test_upload_errata_detached():
+    """upload_errata raises if called on a detached repo."""
+    with pytest.raises(DetachedException):
+        YumRepository(id="repo1").upload_errata([make_erratum(0)])
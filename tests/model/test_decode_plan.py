@@ -0,0 +1,27 @@
+import datetime
+
+from pubtools.pulplib import Repository
+from pubtools.pulplib._impl.model.common import decode_plan
+
+
+def test_decode_plan_cached():
+    """Decode plans are computed once per class."""
+    assert decode_plan(Repository) is decode_plan(Repository)
+
+
+def test_decode_plan_nested_fields():
+    """Fields nested under notes are loaded, and tolerate missing parents."""
+    repo = Repository.from_data(
+        {
+            "id": "repo",
+            "notes": {"signatures": "a,b", "created": "2024-01-02T03:04:05Z"},
+        }
+    )
+    assert repo.signing_keys == ["a", "b"]
+
+    # datetime fields without an explicit converter are parsed from strings
+    assert repo.created == datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+    # notes absent or empty
+    assert Repository.from_data({"id": "repo"}).signing_keys == []
+    assert Repository.from_data({"id": "repo", "notes": {}}).signing_keys == []
@@ -95,10 +95,10 @@ def test_search_fields(client, requests_mocker):
     assert body == {
         "criteria": {
             "type_ids": ["iso"],
-            "skip": 0,
             "limit": 2000,
             "filters": {"unit": {"name": {"$eq": "hello.txt"}}},
             "fields": {"unit": ["checksum", "name", "size"]},
+            "sort": {"unit": [["_id", "ascending"]]},
         }
     }
 
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import logging
+import re
+import threading
 import time
 import pytest
 import json
 
-from io import StringIO
+from io import BytesIO, StringIO
 
 from pubtools.pulplib import (
     Repository,
@@ -17,6 +20,7 @@ from pubtools.pulplib import (
 from pubtools.pulplib._impl.log import TimedLogger
 from pubtools.pulplib._impl.client import client
 
+from ..conftest import FastRetryClient
 from ..ioutil import ZeroesIO
 
 
@@ -39,6 +43,12 @@ def test_upload_detached():
         FileRepository(id="some-repo").upload_file("some-file")
 
 
+def test_upload_dedup_detached():
+    """upload_file with dedup raises if called on a detached repo"""
+    with pytest.raises(DetachedException):
+        FileRepository(id="some-repo").upload_file("some-file", dedup=True)
+
+
 def test_upload_file(client, requests_mocker, tmpdir, caplog, fast_timed_logger):
     """test upload a file to a repo in pulp"""
 
@@ -228,3 +238,209 @@ def test_upload_file_verylarge(client, requests_mocker):
         "2e0c654b6cba3a1e816726bae0eac481eb7fd0351633768c3c18392e0f02b619",
         file_size,
     )
+
+
+def test_upload_file_reuses_buffers(client, requests_mocker, tmpdir):
+    """Uploading a file by path reads chunks into a fixed set of buffers,
+    with the right data sent for every chunk."""
+
+    client._CHUNK_SIZE = 10
+    upload_id = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+
+    content = b"".join(b"%09d\n" % i for i in range(0, 50))
+    somefile = tmpdir.join("some-file")
+    somefile.write(content)
+
+    sent = {}
+    buffers = set()
+
+    def on_put(request, context):
+        offset = int(request.url.rstrip("/").split("/")[-1])
+        buffers.add(id(request.body.obj))
+        # Copy the data as it is being sent, since the buffer will be reused.
+        sent[offset] = bytes(request.body)
+        return []
+
+    requests_mocker.put(
+        re.compile(
+            r"https://pulp.example.com/pulp/api/v2/content/uploads/%s/" % upload_id
+        ),
+        json=on_put,
+    )
+
+    upload_f = client._do_upload_file(upload_id, str(somefile))
+
+    assert upload_f.result() == (hashlib.sha256(content).hexdigest(), len(content))
+
+    # Every chunk was sent with the right data...
+    assert b"".join(sent[offset] for offset in sorted(sent)) == content
+    assert sorted(sent) == list(range(0, len(content), 10))
+
+    # ...but no more buffers were used than chunks which can be in flight.
+    assert len(buffers) <= client._REQUEST_THREADS + 1
+
+
+def test_upload_file_hashes_in_separate_thread(client, requests_mocker, monkeypatch):
+    """Checksums are calculated outside of the thread reading the file,
+    giving the same result as hashing all content at once."""
+
+    client._CHUNK_SIZE = 10
+    upload_id = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+    content = b"x" * 95
+
+    requests_mocker.put(
+        re.compile(
+            r"https://pulp.example.com/pulp/api/v2/content/uploads/%s/" % upload_id
+        ),
+        json=[],
+    )
+
+    threads = set()
+    real_sha256 = hashlib.sha256
+
+    class RecordingHash(object):
+        def __init__(self):
+            self._delegate = real_sha256()
+
+        def update(self, data):
+            threads.add(threading.current_thread().name)
+            self._delegate.update(data)
+
+        def hexdigest(self):
+            return self._delegate.hexdigest()
+
+    monkeypatch.setattr(
+        "pubtools.pulplib._impl.client.client.hashlib.sha256", RecordingHash
+    )
+
+    upload_f = client._do_upload_file(upload_id, BytesIO(content))
+    assert upload_f.result() == (real_sha256(content).hexdigest(), 95)
+
+    # All hashing happened in a single thread, not the thread reading the file.
+    assert len(threads) == 1
+    assert "checksum" in threads.pop()
+
+
+def test_upload_file_adaptive_chunk_size(client, requests_mocker, tmpdir, caplog):
+    """With adaptive chunk size, chunks grow on a fast link while still
+    uploading the right data at the right offsets."""
+
+    client._ADAPTIVE_CHUNK_SIZE = True
+    client._CHUNK_SIZE = 10
+    client._MIN_CHUNK_SIZE = 10
+    client._MAX_CHUNK_SIZE = 80
+    upload_id = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+
+    content = b"".join(b"%09d\n" % i for i in range(0, 100))
+    somefile = tmpdir.join("some-file")
+    somefile.write(content)
+
+    sent = {}
+
+    def on_put(request, context):
+        offset = int(request.url.rstrip("/").split("/")[-1])
+        sent[offset] = bytes(request.body)
+        return []
+
+    requests_mocker.put(
+        re.compile(
+            r"https://pulp.example.com/pulp/api/v2/content/uploads/%s/" % upload_id
+        ),
+        json=on_put,
+    )
+
+    caplog.set_level(logging.INFO)
+    upload_f = client._do_upload_file(upload_id, str(somefile), "some-file")
+
+    assert upload_f.result() == (hashlib.sha256(content).hexdigest(), len(content))
+
+    # Every chunk was sent with the right data, at the right offset...
+    assert b"".join(sent[offset] for offset in sorted(sent)) == content
+    for offset in sent:
+        assert content[offset : offset + len(sent[offset])] == sent[offset]
+
+    # ...and chunks got bigger, up to the limit.
+    assert sent[0] == content[:10]
+    assert max(len(data) for data in sent.values()) == 80
+
+    # Stats for the upload were logged.
+    assert [m for m in caplog.messages if m.startswith("Uploaded some-file: 1.0 kB")]
+
+
+def test_upload_file_bandwidth_limited(requests_mocker, tmpdir):
+    """With upload_bandwidth, every chunk is paced via the limiter, with the
+    upload's weight."""
+    upload_id = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+    requests_mocker.put(
+        re.compile(
+            r"https://pulp.example.com/pulp/api/v2/content/uploads/%s/" % upload_id
+        ),
+        json=[],
+    )
+
+    content = b"x" * 95
+    somefile = tmpdir.join("some-file")
+    somefile.write(content)
+
+    with FastRetryClient(
+        "https://pulp.example.com/", upload_bandwidth=1024 * 1024
+    ) as client:
+        client._CHUNK_SIZE = 10
+
+        acquired = []
+        limiter = client._upload_bandwidth
+        real_acquire = limiter._acquire
+
+        def acquire(flow, size):
+            acquired.append((size, flow.weight))
+            return real_acquire(flow, size)
+
+        limiter._acquire = acquire
+
+        upload_f = client._do_upload_file(upload_id, str(somefile), weight=3)
+        assert upload_f.result() == (hashlib.sha256(content).hexdigest(), 95)
+
+    assert acquired == [(10, 3.0)] * 9 + [(5, 3.0)]
+
+
+def test_upload_chunk_timing_excludes_failed_attempts(
+    client, requests_mocker, monkeypatch
+):
+    """Only the successful attempt at uploading a chunk is reported to the
+    adaptive chunk sizer."""
+
+    class Clock(object):
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr("pubtools.pulplib._impl.client.client.monotonic", clock)
+
+    class Sizer(object):
+        def __init__(self):
+            self.observed = []
+
+        def observe(self, size, seconds):
+            self.observed.append((size, seconds))
+
+    do_request = client._do_request
+    attempts = []
+
+    def slow_request(**kwargs):
+        # The first (failing) attempt is slow, the retry is fast.
+        attempts.append(kwargs)
+        clock.now += 100.0 if len(attempts) == 1 else 2.0
+        return do_request(**kwargs)
+
+    client._do_request = slow_request
+
+    url = "https://pulp.example.com/pulp/api/v2/content/uploads/some-upload/0/"
+    requests_mocker.put(url, [{"status_code": 500}, {"json": []}])
+
+    sizer = Sizer()
+    client._do_upload(b"x" * 1000, "some-upload", 0, sizer).result()
+
+    assert len(attempts) == 2
+    assert sizer.observed == [(1000, 2.0)]
@@ -0,0 +1,100 @@
+import io
+from concurrent.futures import CancelledError, Future
+
+from pubtools.pulplib._impl.model.repository.upload_batch import UploadBatch
+
+
+class Uploads(object):
+    # Fake upload_fn recording which items have been started, leaving their
+    # futures to be resolved by the test.
+    def __init__(self):
+        self.started = []
+        self.futures = {}
+
+    def __call__(self, item):
+        self.started.append(item)
+        self.futures[item] = Future()
+        return self.futures[item]
+
+    def finish(self, item, result=None, error=None):
+        if error:
+            self.futures[item].set_exception(error)
+        else:
+            self.futures[item].set_result(result or [item])
+
+
+def test_batch_order_and_limits(tmpdir):
+    """Files are uploaded smallest first, within item and byte limits."""
+    sizes = {"a": 50, "b": 10, "c": 30, "d": 20, "e": 100}
+    items = []
+    for (name, size) in sizes.items():
+        path = tmpdir.join(name)
+        path.write(b"x" * size)
+        items.append((str(path), name))
+    items.append((io.BytesIO(), "obj"))
+
+    uploads = Uploads()
+    out = UploadBatch("repo", items, uploads, max_items=3, max_bytes=60).start()
+
+    # b, d and c (60 bytes) fit in the limit; a doesn't.
+    assert uploads.started == ["b", "d", "c"]
+
+    uploads.finish("b")
+    assert uploads.started == ["b", "d", "c"]
+
+    uploads.finish("d")
+    uploads.finish("c")
+    assert uploads.started == ["b", "d", "c", "a"]
+
+    # A file bigger than the limit is still uploaded, once nothing else is.
+    uploads.finish("a")
+    assert uploads.started == ["b", "d", "c", "a", "e"]
+
+    # Files of unknown size come last.
+    uploads.finish("e", error=RuntimeError("simulated"))
+    assert uploads.started[-1] == "obj"
+    assert not out.done()
+
+    uploads.finish("obj")
+    outcomes = out.result()
+    assert outcomes[:4] == [["a"], ["b"], ["c"], ["d"]]
+    assert isinstance(outcomes[4], RuntimeError)
+    assert outcomes[5] == ["obj"]
+
+
+def test_batch_immediate_completion():
+    """Uploads completing immediately don't recurse per item."""
+    items = [(io.BytesIO(), idx) for idx in range(0, 5000)]
+
+    def upload_fn(item):
+        if item % 2:
+            raise ValueError(item)
+        out = Future()
+        out.set_result(item)
+        return out
+
+    outcomes = UploadBatch("repo", items, upload_fn, 1, 1).start().result()
+    assert len(outcomes) == 5000
+    assert outcomes[0] == 0
+    assert isinstance(outcomes[1], ValueError)
+    assert outcomes[4998] == 4998
+
+
+def test_batch_cancelled_upload():
+    """A cancelled upload is reported as such, and doesn't stop the batch."""
+    items = [(io.BytesIO(), name) for name in ["a", "b", "c"]]
+
+    uploads = Uploads()
+    out = UploadBatch("repo", items, uploads, max_items=1, max_bytes=100).start()
+
+    assert uploads.started == ["a"]
+    uploads.futures["a"].cancel()
+
+    # The next upload started regardless.
+    assert uploads.started == ["a", "b"]
+    uploads.finish("b")
+    uploads.finish("c")
+
+    outcomes = out.result(timeout=10)
+    assert isinstance(outcomes[0], CancelledError)
+    assert outcomes[1:] == [["b"], ["c"]]
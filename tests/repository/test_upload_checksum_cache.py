@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import os
+import re
+
+import pytest
+
+from pubtools.pulplib._impl.client.client import checksum_file
+from pubtools.pulplib._impl.client.checksum_cache import ChecksumCache, file_key
+
+from ..conftest import UPLOAD_CONTENT, FastRetryClient
+
+UPLOAD_ID = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return str(tmpdir.join("checksums"))
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    # Records all data hashed by the client.
+    out = []
+    real_sha256 = hashlib.sha256
+
+    class RecordingHash(object):
+        def __init__(self, data=b""):
+            # Data passed here is from the test itself, not recorded.
+            self._delegate = real_sha256(data)
+
+        def update(self, data):
+            out.append(bytes(data))
+            self._delegate.update(data)
+
+        def hexdigest(self):
+            return self._delegate.hexdigest()
+
+    monkeypatch.setattr(
+        "pubtools.pulplib._impl.client.client.hashlib.sha256", RecordingHash
+    )
+    return out
+
+
+def test_upload_uses_cache(requests_mocker, cache_dir, somefile, hashed):
+    """Checksums calculated during upload are reused by later uploads."""
+    requests_mocker.put(
+        re.compile("https://pulp.example.com/pulp/api/v2/content/uploads/"), json=[]
+    )
+    expected = (hashlib.sha256(UPLOAD_CONTENT).hexdigest(), len(UPLOAD_CONTENT))
+
+    with FastRetryClient(
+        "https://pulp.example.com/", checksum_cache_dir=cache_dir
+    ) as client:
+        client._CHUNK_SIZE = 10
+
+        assert client._do_upload_file(UPLOAD_ID, somefile).result() == expected
+        assert len(os.listdir(cache_dir)) == 1
+
+        # Second time, the file is uploaded but not hashed.
+        del hashed[:]
+        requests_mocker.reset_mock()
+        assert client._do_upload_file(UPLOAD_ID, somefile).result() == expected
+        assert requests_mocker.call_count == 5
+        assert hashed == []
+        assert client._do_checksum(somefile).result() == expected
+
+
+def test_checksum_file_cache(cache_dir, somefile, hashed):
+    """checksum_file uses the cache, but not for modified files."""
+    cache = ChecksumCache(cache_dir)
+
+    first = checksum_file(somefile, 10, cache)
+    assert first == (hashlib.sha256(UPLOAD_CONTENT).hexdigest(), len(UPLOAD_CONTENT))
+    assert b"".join(hashed) == UPLOAD_CONTENT
+
+    del hashed[:]
+    assert checksum_file(somefile, 10, cache) == first
+    assert hashed == []
+
+    with open(somefile, "ab") as f:
+        f.write(b"more")
+
+    assert checksum_file(somefile, 10, cache) == (
+        hashlib.sha256(UPLOAD_CONTENT + b"more").hexdigest(),
+        len(UPLOAD_CONTENT) + 4,
+    )
+    assert b"".join(hashed) == UPLOAD_CONTENT + b"more"
+
+
+def test_checksum_text_file(cache_dir, somefile):
+    """checksum_file accepts files opened in text mode, hashing them as UTF-8,
+    without using the cache."""
+    cache = ChecksumCache(cache_dir)
+
+    with open(somefile, "rt") as f:
+        assert checksum_file(f, 10, cache) == (
+            hashlib.sha256(UPLOAD_CONTENT).hexdigest(),
+            len(UPLOAD_CONTENT),
+        )
+        # File position is restored
+        assert f.tell() == 0
+
+    assert os.listdir(cache_dir) == []
+
+
+def test_cache_ignores_broken_entries(cache_dir, somefile):
+    """Unreadable cache entries are treated as missing."""
+    cache = ChecksumCache(cache_dir)
+    checksum_file(somefile, 10, cache)
+
+    for name in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, name), "wt") as f:
+            f.write("not json")
+
+    assert cache.get(somefile) is None
+    assert checksum_file(somefile, 10, cache)[1] == len(UPLOAD_CONTENT)
+    assert cache.get(somefile) is not None
+
+
+def test_cache_existing_dir(cache_dir, somefile):
+    """A cache can be created on a directory which already exists, as when
+    another process created it first."""
+    ChecksumCache(cache_dir)
+    cache = ChecksumCache(cache_dir)
+
+    checksum_file(somefile, 10, cache)
+    assert cache.get(somefile)[1] == len(UPLOAD_CONTENT)
+
+
+def test_cache_missing_file(cache_dir, tmpdir):
+    """Nothing is cached for files which can't be stat'd."""
+    cache = ChecksumCache(cache_dir)
+    path = str(tmpdir.join("no-such-file"))
+
+    assert file_key(path) is None
+    assert cache.get(path) is None
+
+    cache.put(path, None, "abc", 123)
+    assert os.listdir(cache_dir) == []
+
+
+def test_cache_put_changed_file(cache_dir, somefile):
+    """Nothing is cached if the file changed since its key was taken."""
+    cache = ChecksumCache(cache_dir)
+    key = file_key(somefile)
+
+    with open(somefile, "ab") as f:
+        f.write(b"more")
+
+    cache.put(somefile, key, "abc", len(UPLOAD_CONTENT))
+    assert os.listdir(cache_dir) == []
+    assert cache.get(somefile) is None
+
+
+def test_cache_write_fails(cache_dir, somefile, caplog):
+    """Failing to write to the cache is logged, but doesn't fail checksums."""
+    cache = ChecksumCache(cache_dir)
+    os.rmdir(cache_dir)
+
+    with caplog.at_level(logging.DEBUG, "pubtools.pulplib"):
+        assert checksum_file(somefile, 10, cache)[1] == len(UPLOAD_CONTENT)
+
+    assert "Failed to write checksum cache" in caplog.text
+    assert not os.path.exists(cache_dir)
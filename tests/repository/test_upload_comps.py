@@ -3,7 +3,49 @@ from xml.parsers.expat import ExpatError
 
 import pytest
 
-from pubtools.pulplib import YumRepository
+from pubtools.pulplib import DetachedException, YumRepository
+
+COMPS_XML = b"""
+    <comps>
+        <group>
+            <id>group1</id>
+            <name>Group 1</name>
+        </group>
+        <group>
+            <id>group2</id>
+            <name>Group 2</name>
+        </group>
+        <langpacks>
+            <match install="tkgate-%s" name="tkgate"/>
+        </langpacks>
+    </comps>
+"""
+
+
+def existing_unit(type_id, comps_id, unit_id, **kwargs):
+    # Returns metadata of a comps unit as stored in Pulp, as if uploaded
+    # from COMPS_XML.
+    out = {
+        "_id": unit_id,
+        "_content_type_id": type_id,
+        "_storage_path": None,
+        "_last_updated": 1234,
+        "pulp_user_metadata": {},
+        "repo_id": "repo1",
+    }
+    if type_id == "package_group":
+        out.update(
+            {
+                "id": comps_id,
+                "name": "Group %s" % comps_id[-1],
+                "default": False,
+                "user_visible": False,
+            }
+        )
+    if type_id == "package_langpacks":
+        out["matches"] = [{"install": "tkgate-%s", "name": "tkgate"}]
+    out.update(kwargs)
+    return out
 
 
 def test_upload_comps_xml(client, requests_mocker):
@@ -66,20 +108,17 @@ def test_upload_comps_xml(client, requests_mocker):
 
     # Set up the requests it'll do:
     #
-    # It should unassociate previous units
+    # It should search for previous units, finding none
     requests_mocker.post(
-        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/unassociate/",
-        json={"spawned_tasks": [{"task_id": "remove-task"}]},
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[],
     )
 
     # It'll search for the status of tasks.
-    # Note: to avoid an overly complex mock we just let every task search return all
-    # tasks rather than differentiating between remove and upload tasks
     upload_count = 4
     requests_mocker.post(
         "https://pulp.example.com/pulp/api/v2/tasks/search/",
-        json=[{"task_id": "remove-task", "state": "finished"}]
-        + [
+        json=[
             {"task_id": "upload-task-%d" % i, "state": "finished"}
             for i in range(0, upload_count)
         ],
@@ -203,6 +242,15 @@ def test_upload_empty_comps_xml(client, requests_mocker):
 
     # Set up the requests it'll do:
     #
+    # It should search for previous units
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[
+            {"metadata": existing_unit("package_group", "group1", "unit-1")},
+            {"metadata": existing_unit("package_langpacks", None, "unit-2")},
+        ],
+    )
+
     # It should unassociate previous units
     requests_mocker.post(
         "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/unassociate/",
@@ -228,15 +276,24 @@ def test_upload_empty_comps_xml(client, requests_mocker):
     assert tasks[0].completed
     assert tasks[0].succeeded
 
-    # Check exactly the removed types
-    assert requests_mocker.request_history[0].json() == {
+    # Check exactly the searched types
+    assert requests_mocker.request_history[0].json()["criteria"]["type_ids"] == [
+        "package_group",
+        "package_category",
+        "package_environment",
+        "package_langpacks",
+    ]
+
+    # Check exactly the removed units
+    assert requests_mocker.request_history[1].json() == {
         "criteria": {
             "type_ids": [
                 "package_group",
                 "package_category",
                 "package_environment",
                 "package_langpacks",
-            ]
+            ],
+            "filters": {"unit": {"_id": {"$in": ["unit-1", "unit-2"]}}},
         }
     }
 
@@ -259,3 +316,172 @@ def test_bad_comps_xml(client, requests_mocker, tmpdir):
     # As we did not register anything in requests_mocker, we've already
     # implicitly tested that no requests happened. But just to be clear...
     assert not requests_mocker.request_history
+
+
+def test_upload_comps_xml_detached():
+    """upload_comps_xml raises if called on a detached repo."""
+    with pytest.raises(DetachedException):
+        YumRepository(id="repo1").upload_comps_xml(BytesIO(COMPS_XML))
+
+
+def test_upload_unchanged_comps_xml(client, requests_mocker):
+    """Uploading a comps.xml identical to the comps data already in a repo
+    does nothing beyond a single search."""
+
+    repo = YumRepository(id="repo1")
+    repo.__dict__["_client"] = client
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[
+            {"metadata": existing_unit("package_group", "group1", "unit-1")},
+            {"metadata": existing_unit("package_group", "group2", "unit-2")},
+            {"metadata": existing_unit("package_langpacks", None, "unit-3")},
+        ],
+    )
+
+    tasks = repo.upload_comps_xml(BytesIO(COMPS_XML)).result()
+
+    # There's nothing to be done
+    assert tasks == []
+
+    # And only the search was done
+    assert len(requests_mocker.request_history) == 1
+
+
+def test_upload_changed_comps_xml(client, requests_mocker):
+    """Uploading a comps.xml with some changes to the comps data already in
+    a repo removes and uploads only the changed units."""
+
+    repo = YumRepository(id="repo1")
+    repo.__dict__["_client"] = client
+
+    # In the repo:
+    # - group1 is unchanged
+    # - group2 is missing
+    # - langpacks are different
+    # - group3 is not in the XML
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[
+            {"metadata": existing_unit("package_group", "group1", "unit-1")},
+            {
+                "metadata": existing_unit(
+                    "package_langpacks", None, "unit-3", matches=[]
+                )
+            },
+            {"metadata": existing_unit("package_group", "group3", "unit-4")},
+        ],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/unassociate/",
+        json={"spawned_tasks": [{"task_id": "remove-task"}]},
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[
+            {"task_id": "remove-task", "state": "finished"},
+            {"task_id": "upload-task-0", "state": "finished"},
+            {"task_id": "upload-task-1", "state": "finished"},
+        ],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/content/uploads/",
+        [{"json": {"upload_id": "upload-%d" % i}} for i in range(0, 2)],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/import_upload/",
+        [
+            {"json": {"spawned_tasks": [{"task_id": "upload-task-%d" % i}]}}
+            for i in range(0, 2)
+        ],
+    )
+    for i in range(0, 2):
+        requests_mocker.delete(
+            "https://pulp.example.com/pulp/api/v2/content/uploads/upload-%d/" % i
+        )
+
+    tasks = repo.upload_comps_xml(BytesIO(COMPS_XML)).result()
+
+    # It should return the removal and upload tasks
+    assert sorted([t.id for t in tasks]) == [
+        "remove-task",
+        "upload-task-0",
+        "upload-task-1",
+    ]
+
+    # It should have removed the changed and stale units
+    removals = [
+        req.json()
+        for req in requests_mocker.request_history
+        if req.url.endswith("/unassociate/")
+    ]
+    assert len(removals) == 1
+    assert removals[0]["criteria"]["filters"] == {
+        "unit": {"_id": {"$in": ["unit-3", "unit-4"]}}
+    }
+
+    # It should have imported only the missing and changed units
+    imported = [
+        req.json()["unit_metadata"]
+        for req in requests_mocker.request_history
+        if req.url.endswith("/import_upload/")
+    ]
+    assert sorted((u["_content_type_id"], u.get("id")) for u in imported) == [
+        ("package_group", "group2"),
+        ("package_langpacks", None),
+    ]
+
+    # The changed unit must only have been imported after the removal
+    urls = [req.url for req in requests_mocker.request_history]
+    remove_idx = [i for (i, url) in enumerate(urls) if url.endswith("/unassociate/")]
+    langpacks_idx = [
+        i
+        for (i, req) in enumerate(requests_mocker.request_history)
+        if req.url.endswith("/import_upload/")
+        and req.json()["unit_metadata"]["_content_type_id"] == "package_langpacks"
+    ]
+    assert langpacks_idx[0] > remove_idx[0]
+
+
+def test_upload_comps_xml_removes_duplicates(client, requests_mocker):
+    """Uploading a comps.xml into a repo holding several units with the same
+    key keeps only one of them, without uploading anything."""
+
+    repo = YumRepository(id="repo1")
+    repo.__dict__["_client"] = client
+
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[
+            {"metadata": existing_unit("package_group", "group1", "unit-1")},
+            {"metadata": existing_unit("package_group", "group2", "unit-2")},
+            {"metadata": existing_unit("package_group", "group2", "unit-5")},
+            {"metadata": existing_unit("package_langpacks", None, "unit-3")},
+        ],
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/unassociate/",
+        json={"spawned_tasks": [{"task_id": "remove-task"}]},
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[{"task_id": "remove-task", "state": "finished"}],
+    )
+
+    tasks = repo.upload_comps_xml(BytesIO(COMPS_XML)).result()
+
+    # It should only have removed the duplicate
+    assert [t.id for t in tasks] == ["remove-task"]
+    removals = [
+        req.json()
+        for req in requests_mocker.request_history
+        if req.url.endswith("/unassociate/")
+    ]
+    assert len(removals) == 1
+    assert removals[0]["criteria"]["filters"] == {"unit": {"_id": {"$in": ["unit-5"]}}}
+
+    # Nothing was uploaded
+    assert not [
+        req for req in requests_mocker.request_history if "/uploads/" in req.url
+    ]
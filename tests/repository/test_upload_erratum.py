@@ -120,3 +120,40 @@ def test_upload_erratum(client, requests_mocker):
             "solution": None,
         },
     }
+
+
+def test_upload_errata_unchanged(client, requests_mocker):
+    """upload_errata does nothing beyond a single search when every erratum
+    is identical to one already in the repo."""
+
+    repo = YumRepository(id="repo1")
+    repo.__dict__["_client"] = client
+
+    unit = ErratumUnit(
+        id="RHBA-1234:56",
+        summary="A great advisory",
+        version="1",
+        references=[
+            ErratumReference(
+                title="a link",
+                href="https://example.com/test-advisory",
+                type="self",
+                id="self-id",
+            )
+        ],
+        pkglist=[],
+    )
+
+    # Pulp has the same erratum, though with a unit ID and memberships
+    stored = unit._to_data()
+    stored.update(_id="unit-1", repository_memberships=["repo1", "repo2"])
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/search/units/",
+        json=[{"metadata": stored}],
+    )
+
+    outcomes = repo.upload_errata([unit]).result()
+
+    # It should not have uploaded anything
+    assert outcomes == [[]]
+    assert len(requests_mocker.request_history) == 1
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import Future
+
+import pytest
+from mock import patch
+
+from pubtools.pulplib import FileRepository, Task
+
+from ..conftest import UPLOAD_CONTENT, FastRetryClient
+
+UPLOADS_URL = "https://pulp.example.com/pulp/api/v2/content/uploads/"
+UPLOAD_ID = "cfb1fed0-752b-439e-aa68-fba68eababa3"
+
+
+@pytest.fixture
+def state_dir(tmpdir):
+    return str(tmpdir.mkdir("upload-state"))
+
+
+def new_client(state_dir):
+    out = FastRetryClient("https://pulp.example.com/", upload_state_dir=state_dir)
+    out._CHUNK_SIZE = 10
+    return out
+
+
+def repo_for(client):
+    repo = FileRepository(id="repo1")
+    repo.__dict__["_client"] = client
+    return repo
+
+
+def saved_states(state_dir):
+    out = []
+    for name in os.listdir(state_dir):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(state_dir, name)) as f:
+            out.append(json.load(f))
+    return out
+
+
+def mock_import(requests_mocker):
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/import_upload/",
+        json={"spawned_tasks": [{"task_id": "task1"}]},
+    )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[{"task_id": "task1", "state": "finished"}],
+    )
+    requests_mocker.delete(UPLOADS_URL + "%s/" % UPLOAD_ID, json=[])
+
+
+def put_offsets(requests_mocker):
+    return sorted(
+        int(req.url.rstrip("/").split("/")[-1])
+        for req in requests_mocker.request_history
+        if req.method == "PUT"
+    )
+
+
+def test_upload_resumes(requests_mocker, state_dir, somefile):
+    """An interrupted upload of a file is resumed by a later client,
+    uploading only the chunks not yet received by Pulp."""
+
+    requests_mocker.post(UPLOADS_URL, json={"upload_id": UPLOAD_ID})
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    requests_mocker.put(UPLOADS_URL + "%s/20/" % UPLOAD_ID, status_code=404)
+
+    with new_client(state_dir) as client:
+        with pytest.raises(Exception):
+            repo_for(client).upload_file(somefile).result()
+
+    # Progress of the upload was saved, excluding the failed chunk.
+    (state,) = saved_states(state_dir)
+    assert state["upload_id"] == UPLOAD_ID
+    assert state["path"] == os.path.abspath(somefile)
+    assert 20 not in state["confirmed"]
+    confirmed = sorted(state["confirmed"])
+    assert confirmed
+
+    # Now try again with everything working.
+    requests_mocker.reset_mock()
+    requests_mocker.get(UPLOADS_URL, json={"upload_ids": ["other", UPLOAD_ID]})
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    mock_import(requests_mocker)
+
+    with new_client(state_dir) as client:
+        assert repo_for(client).upload_file(somefile).result() == [
+            Task(id="task1", succeeded=True, completed=True)
+        ]
+
+        # It should not have requested a new upload...
+        assert not [
+            r
+            for r in requests_mocker.request_history
+            if r.method == "POST" and r.url == UPLOADS_URL
+        ]
+
+        # ...and should only have uploaded the chunks missing from Pulp.
+        assert put_offsets(requests_mocker) == sorted(
+            set(range(0, 50, 10)) - set(confirmed)
+        )
+
+        # The checksum still covers the entire file.
+        import_request = [
+            r for r in requests_mocker.request_history if "import_upload" in r.url
+        ][0]
+        assert (
+            import_request.json()["unit_key"]["checksum"]
+            == hashlib.sha256(UPLOAD_CONTENT).hexdigest()
+        )
+
+        # Once complete, there's nothing left to resume.
+        client._delete_upload_request(UPLOAD_ID, "some-file").result()
+        assert saved_states(state_dir) == []
+
+
+def test_upload_not_resumed_if_modified(requests_mocker, state_dir, somefile):
+    """An upload is not resumed if the file has changed, and the stale upload
+    is deleted from Pulp."""
+
+    with new_client(state_dir) as client:
+        client._upload_states.create(somefile, "old-upload", 10).confirm(0)
+
+    with open(somefile, "ab") as f:
+        f.write(b"more\n")
+
+    requests_mocker.post(UPLOADS_URL, json={"upload_id": UPLOAD_ID})
+    requests_mocker.delete(UPLOADS_URL + "old-upload/", json=[])
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    mock_import(requests_mocker)
+
+    with new_client(state_dir) as client:
+        repo_for(client).upload_file(somefile).result()
+
+    # Stale upload was deleted and all chunks were uploaded to the new one.
+    assert any(
+        r.method == "DELETE" and "old-upload" in r.url
+        for r in requests_mocker.request_history
+    )
+    assert put_offsets(requests_mocker) == [0, 10, 20, 30, 40, 50]
+
+
+def test_upload_not_resumed_if_gone(requests_mocker, state_dir, somefile):
+    """An upload is not resumed if Pulp no longer has it."""
+
+    with new_client(state_dir) as client:
+        client._upload_states.create(somefile, "old-upload", 10).confirm(0)
+
+    requests_mocker.get(UPLOADS_URL, json={"upload_ids": []})
+    requests_mocker.post(UPLOADS_URL, json={"upload_id": UPLOAD_ID})
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    mock_import(requests_mocker)
+
+    with new_client(state_dir) as client:
+        repo_for(client).upload_file(somefile).result()
+
+    # Everything was uploaded again, to a new upload.
+    assert put_offsets(requests_mocker) == [0, 10, 20, 30, 40]
+    assert all(
+        UPLOAD_ID in r.url for r in requests_mocker.request_history if r.method == "PUT"
+    )
+
+
+def test_upload_resumes_with_cached_checksum(requests_mocker, state_dir, somefile):
+    """A resumed upload with a cached checksum skips over chunks already
+    received by Pulp."""
+
+    with new_client(state_dir) as client:
+        state = client._upload_states.create(somefile, UPLOAD_ID, 10)
+        state.confirm(0)
+        state.confirm(20)
+
+    requests_mocker.get(UPLOADS_URL, json={"upload_ids": [UPLOAD_ID]})
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    mock_import(requests_mocker)
+
+    cache_dir = os.path.join(state_dir, "checksums")
+    with FastRetryClient(
+        "https://pulp.example.com/",
+        upload_state_dir=state_dir,
+        checksum_cache_dir=cache_dir,
+    ) as client:
+        client._CHUNK_SIZE = 10
+        client._do_checksum(somefile).result()
+
+        repo_for(client).upload_file(somefile).result()
+
+        import_request = [
+            r for r in requests_mocker.request_history if "import_upload" in r.url
+        ][0]
+        assert (
+            import_request.json()["unit_key"]["checksum"]
+            == hashlib.sha256(UPLOAD_CONTENT).hexdigest()
+        )
+
+    assert put_offsets(requests_mocker) == [10, 30, 40]
+
+
+def test_concurrent_uploads_not_shared(requests_mocker, state_dir, somefile):
+    """Concurrent uploads of the same file never resume the same upload."""
+
+    with new_client(state_dir) as client:
+        client._upload_states.create(somefile, UPLOAD_ID, 10).confirm(0)
+
+    requests_mocker.get(UPLOADS_URL, json={"upload_ids": [UPLOAD_ID]})
+    requests_mocker.post(UPLOADS_URL, json={"upload_id": "other-upload"})
+    requests_mocker.put(re.compile(UPLOADS_URL), json=[])
+    requests_mocker.delete(re.compile(UPLOADS_URL), json=[])
+    for repo_id in ("repo1", "repo2"):
+        requests_mocker.post(
+            "https://pulp.example.com/pulp/api/v2/repositories/%s/actions/import_upload/"
+            % repo_id,
+            json={"spawned_tasks": [{"task_id": "task-%s" % repo_id}]},
+        )
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/tasks/search/",
+        json=[
+            {"task_id": "task-repo1", "state": "finished"},
+            {"task_id": "task-repo2", "state": "finished"},
+        ],
+    )
+
+    with new_client(state_dir) as client:
+        repo1 = repo_for(client)
+        repo2 = FileRepository(id="repo2")
+        repo2.__dict__["_client"] = client
+
+        fts = [repo1.upload_file(somefile), repo2.upload_file(somefile)]
+        for ft in fts:
+            ft.result()
+
+        # One of them resumed the earlier upload and the other used a new upload.
+        imported = sorted(
+            r.json()["upload_id"]
+            for r in requests_mocker.request_history
+            if "import_upload" in r.url
+        )
+        assert imported == sorted([UPLOAD_ID, "other-upload"])
+
+        # Both uploads were complete, so nothing is left to resume.
+        for upload_id in imported:
+            client._delete_upload_request(upload_id, "some-file").result()
+        assert saved_states(state_dir) == []
+
+
+def test_import_failure_clears_state(requests_mocker, state_dir, somefile):
+    """If import of a fully uploaded file fails, the upload is not left to
+    be resumed."""
+
+    requests_mocker.post(UPLOADS_URL, json={"upload_id": UPLOAD_ID})
+    requests_mocker.put(re.compile(UPLOADS_URL + UPLOAD_ID), json=[])
+    requests_mocker.post(
+        "https://pulp.example.com/pulp/api/v2/repositories/repo1/actions/import_upload/",
+        status_code=500,
+    )
+
+    with new_client(state_dir) as client:
+        with pytest.raises(Exception):
+            repo_for(client).upload_file(somefile).result()
+
+        assert put_offsets(requests_mocker) == [0, 10, 20, 30, 40]
+        assert client._upload_states.get(UPLOAD_ID) is None
+
+    assert saved_states(state_dir) == []
+
+
+def test_cancelled_upload_released(state_dir, somefile):
+    """A cancelled upload is no longer active, so it may be resumed."""
+
+    with new_client(state_dir) as client:
+        states = client._upload_states
+        states.create(somefile, UPLOAD_ID, 10)
+
+        upload_f = Future()
+        with patch.object(client._upload_executor, "submit", return_value=upload_f):
+            assert client._do_upload_file(UPLOAD_ID, somefile) is upload_f
+        assert states.get(UPLOAD_ID)
+
+        upload_f.cancel()
+        assert states.get(UPLOAD_ID) is None
+
+        assert states.claim(somefile).upload_id == UPLOAD_ID
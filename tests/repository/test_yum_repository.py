@@ -316,9 +316,9 @@ def test_create_repository(client, requests_mocker):
     search_query = hist[1].json()
     assert search_query == {
         "criteria": {
-            "skip": 0,
             "limit": 2000,
             "filters": {"id": {"$eq": "yum_repo_new"}},
+            "sort": [["id", "ascending"]],
         },
         "distributors": True,
         "importers": True,
@@ -375,9 +375,9 @@ def test_create_repository_already_exists(client, requests_mocker, caplog):
         search_query = hist[1].json()
         assert search_query == {
             "criteria": {
-                "skip": 0,
                 "limit": 2000,
                 "filters": {"id": {"$eq": "yum_repo_existing"}},
+                "sort": [["id", "ascending"]],
             },
             "distributors": True,
             "importers": True,
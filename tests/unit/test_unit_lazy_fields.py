@@ -0,0 +1,118 @@
+import json
+import os
+
+import attr
+import pytest
+
+from frozenlist2 import frozenlist
+
+from pubtools.pulplib import Unit, RpmUnit, RpmDependency, ErratumPackageCollection
+from pubtools.pulplib._impl.model.lazy import LazyAttribute, LazyValue
+
+
+RPM_DATA = {
+    "_content_type_id": "rpm",
+    "name": "bash",
+    "version": "4.0",
+    "release": "1",
+    "arch": "x86_64",
+    "files": {"file": ["/bin/bash", "/etc/bashrc"]},
+    "provides": [{"name": "bash", "version": "4.0", "flags": "EQ"}],
+    "requires": [{"name": "glibc"}, {"name": "/bin/sh"}],
+}
+
+
+def raw_slot(unit, name):
+    # Returns the value held in the slot for a field, without resolving it.
+    return type(unit).__dict__[name].slot.__get__(unit, type(unit))
+
+
+def test_rpm_fields_loaded_lazily():
+    """Heavy RPM fields are not converted until accessed."""
+    unit = Unit.from_data(RPM_DATA)
+
+    for name in ("files", "provides", "requires"):
+        assert isinstance(raw_slot(unit, name), LazyValue)
+
+    # Accessing a field converts it, once.
+    assert unit.files == ["/bin/bash", "/etc/bashrc"]
+    assert isinstance(unit.files, frozenlist)
+    assert unit.files is unit.files
+    assert raw_slot(unit, "files") is unit.files
+
+    # Other fields remain unconverted.
+    assert isinstance(raw_slot(unit, "requires"), LazyValue)
+
+
+def test_rpm_lazy_class_access():
+    """Lazy fields can be introspected on the class, e.g. for documentation,
+    and can't be deleted from instances."""
+    assert isinstance(RpmUnit.files, LazyAttribute)
+    assert attr.fields(RpmUnit).files.name == "files"
+
+    unit = Unit.from_data(RPM_DATA)
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        del unit.files
+
+    assert unit.files == ["/bin/bash", "/etc/bashrc"]
+
+
+def test_rpm_lazy_same_as_eager():
+    """Lazily loaded units are identical to those constructed directly."""
+    unit = Unit.from_data(RPM_DATA)
+
+    assert unit == RpmUnit(
+        content_type_id="rpm",
+        name="bash",
+        version="4.0",
+        release="1",
+        arch="x86_64",
+        files=["/bin/bash", "/etc/bashrc"],
+        provides=[RpmDependency(name="bash", version="4.0", flags="EQ")],
+        requires=[RpmDependency(name="glibc"), RpmDependency(name="/bin/sh")],
+    )
+
+    # evolve works as usual
+    assert attr.evolve(Unit.from_data(RPM_DATA), name="other").files == unit.files
+
+
+def test_rpm_lazy_empty_fields():
+    """Empty and absent lists are loaded as usual."""
+    unit = Unit.from_data(
+        {
+            "_content_type_id": "rpm",
+            "name": "bash",
+            "version": "4.0",
+            "release": "1",
+            "arch": "x86_64",
+            "files": {"file": []},
+        }
+    )
+
+    assert unit.files == []
+    assert unit.provides is None
+    assert unit.requires is None
+
+
+def test_rpm_lazy_fields_still_validated():
+    """Lazy fields are validated when constructed directly."""
+    with pytest.raises(TypeError):
+        RpmUnit(name="bash", version="4.0", release="1", arch="x86_64", files=[1])
+
+    with pytest.raises(TypeError):
+        RpmUnit(
+            name="bash", version="4.0", release="1", arch="x86_64", requires=["glibc"]
+        )
+
+
+def test_erratum_pkglist_lazy(data_path):
+    """ErratumUnit.pkglist is loaded lazily, with the same result as eagerly."""
+    with open(os.path.join(data_path, "sample-erratum.json"), "rt") as f:
+        data = json.load(f)
+
+    unit = Unit.from_data(data)
+    assert isinstance(raw_slot(unit, "pkglist"), LazyValue)
+
+    pkglist = ErratumPackageCollection._from_data(data["pkglist"])
+    assert unit.pkglist == pkglist
+    assert attr.evolve(unit, pkglist=pkglist) == unit